@@ -10,34 +10,35 @@ import os
 import time
 
 from rewrite_for_kids import _call_gemini_dual as rewrite_text_for_kids
-from generate_voiceovers import generate_mp3, ElevenLabs
+from generate_voiceovers import generate_mp3, ElevenLabs, is_valid_mp3
 from utils.workflow import get_page_directories, get_extraction_dir
+from utils.media import mux_page_video
 from utils.logger import (
     log_user_action, log_api_call, log_file_operation, log_session_info
 )
 from utils.versioning import (
     create_new_version, get_latest_version_path, get_all_versions,
     set_as_latest, migrate_legacy_files, get_version_count, fast_forward_version,
-    get_latest_version_number
+    get_latest_version_number, max_versions_in_dir, load_version_metadata
 )
 
+# Content types whose version number is their count in versions.json
+METADATA_VERSION_TYPES = ('en_text', 'hi_text', 'en_audio', 'hi_audio', 'image', 'image_video')
+
 
 def get_expected_version_for_pdf(pdf_stem: str) -> int:
     """Calculate the expected version for entire PDF (max across ALL pages and assets)."""
     page_dirs = get_page_directories(pdf_stem)
     max_version = 0
     
+    # One versions.json load per page for the version counts; page videos aren't in the
+    # metadata, so (as get_latest_version_number does) their highest on-disk version is used
     for page_dir in page_dirs:
-        en_text_v = get_latest_version_number(page_dir, 'en_text')
-        hi_text_v = get_latest_version_number(page_dir, 'hi_text')
-        en_audio_v = get_latest_version_number(page_dir, 'en_audio')
-        hi_audio_v = get_latest_version_number(page_dir, 'hi_audio')
-        en_video_v = get_latest_version_number(page_dir, 'en_video')
-        hi_video_v = get_latest_version_number(page_dir, 'hi_video')
-        image_v = get_latest_version_number(page_dir, 'image')
-        image_video_v = get_latest_version_number(page_dir, 'image_video')
-        
-        page_max = max(en_text_v, hi_text_v, en_audio_v, hi_audio_v, en_video_v, hi_video_v, image_v, image_video_v)
+        metadata = load_version_metadata(page_dir)
+        page_max = max(len(metadata.get(content_type, {}).get('versions', []))
+                       for content_type in METADATA_VERSION_TYPES)
+        on_disk = max_versions_in_dir(page_dir)
+        page_max = max(page_max, on_disk.get('en_video', 0), on_disk.get('hi_video', 0))
         max_version = max(max_version, page_max)
     
     return max_version
@@ -309,6 +310,9 @@ def render_page_content(page_dir: Path, pdf_stem: str):
                         temp_en_audio = page_dir / 'temp_audio_en.mp3'
                         generate_mp3(client, en_text, "7tRwuZTD1EWi6nydVerp", 
                                    "eleven_flash_v2_5", temp_en_audio)
+                        if not is_valid_mp3(temp_en_audio):
+                            temp_en_audio.unlink(missing_ok=True)
+                            raise RuntimeError("ElevenLabs returned an empty or truncated EN audio file")
                         create_new_version(page_dir, 'en_audio', str(temp_en_audio), model='eleven_flash_v2_5')
                         temp_en_audio.unlink()  # Delete temp file
                         
@@ -322,6 +326,9 @@ def render_page_content(page_dir: Path, pdf_stem: str):
                             temp_hi_audio = page_dir / 'temp_audio_hi.mp3'
                             generate_mp3(client, hi_text, "trxRCYtDC6qFREKq6Ek2", 
                                        "eleven_flash_v2_5", temp_hi_audio)
+                            if not is_valid_mp3(temp_hi_audio):
+                                temp_hi_audio.unlink(missing_ok=True)
+                                raise RuntimeError("ElevenLabs returned an empty or truncated HI audio file")
                             create_new_version(page_dir, 'hi_audio', str(temp_hi_audio), model='eleven_flash_v2_5')
                             temp_hi_audio.unlink()
                             
@@ -933,41 +940,8 @@ def render_page_content(page_dir: Path, pdf_stem: str):
                     log_user_action("GENERATE_EN_VIDEO", pdf_stem, {"page": page_dir.name, "version": page_expected_version})
                     try:
                         with st.spinner(f"Creating EN video v{page_expected_version}..."):
-                            from moviepy.editor import VideoFileClip, AudioFileClip, CompositeAudioClip, concatenate_videoclips
-                            
-                            # Load animated image video
-                            video_clip = VideoFileClip(str(image_video_latest_path))
-                            
-                            # Load audio
-                            audio_clip = AudioFileClip(str(en_audio_path))
-                            audio_duration = audio_clip.duration
-                            video_duration = video_clip.duration
-                            
-                            # Adjust video to match audio duration
-                            if video_duration < audio_duration:
-                                # Loop video to match audio length
-                                loops_needed = int(audio_duration / video_duration) + 1
-                                video_clip = concatenate_videoclips([video_clip] * loops_needed).subclip(0, audio_duration)
-                            elif video_duration > audio_duration:
-                                # Trim video to match audio
-                                video_clip = video_clip.subclip(0, audio_duration)
-                            
-                            # Set audio to video
-                            final_clip = video_clip.set_audio(audio_clip)
-                            
-                            # Write video file
-                            final_clip.write_videofile(
-                                str(en_video_path),
-                                fps=24,
-                                codec='libx264',
-                                audio_codec='aac',
-                                logger=None
-                            )
-                            
-                            # Clean up
-                            final_clip.close()
-                            video_clip.close()
-                            audio_clip.close()
+                            # Loop/trim the animated image video to the audio length and mux in one ffmpeg pass
+                            mux_page_video(image_video_latest_path, en_audio_path, en_video_path)
                             
                             log_file_operation(f"video_en_{page_dir.name}_v{page_expected_version}", page_dir, success=True)
                         
@@ -1027,41 +1001,8 @@ def render_page_content(page_dir: Path, pdf_stem: str):
                     log_user_action("GENERATE_HI_VIDEO", pdf_stem, {"page": page_dir.name, "version": page_expected_version})
                     try:
                         with st.spinner(f"Creating HI video v{page_expected_version}..."):
-                            from moviepy.editor import VideoFileClip, AudioFileClip, CompositeAudioClip, concatenate_videoclips
-                            
-                            # Load animated image video
-                            video_clip = VideoFileClip(str(image_video_latest_path))
-                            
-                            # Load audio
-                            audio_clip = AudioFileClip(str(hi_audio_path))
-                            audio_duration = audio_clip.duration
-                            video_duration = video_clip.duration
-                            
-                            # Adjust video to match audio duration
-                            if video_duration < audio_duration:
-                                # Loop video to match audio length
-                                loops_needed = int(audio_duration / video_duration) + 1
-                                video_clip = concatenate_videoclips([video_clip] * loops_needed).subclip(0, audio_duration)
-                            elif video_duration > audio_duration:
-                                # Trim video to match audio
-                                video_clip = video_clip.subclip(0, audio_duration)
-                            
-                            # Set audio to video
-                            final_clip = video_clip.set_audio(audio_clip)
-                            
-                            # Write video file
-                            final_clip.write_videofile(
-                                str(hi_video_path),
-                                fps=24,
-                                codec='libx264',
-                                audio_codec='aac',
-                                logger=None
-                            )
-                            
-                            # Clean up
-                            final_clip.close()
-                            video_clip.close()
-                            audio_clip.close()
+                            # Loop/trim the animated image video to the audio length and mux in one ffmpeg pass
+                            mux_page_video(image_video_latest_path, hi_audio_path, hi_video_path)
                             
                             log_file_operation(f"video_hi_{page_dir.name}_v{page_expected_version}", page_dir, success=True)
                         
@@ -5,30 +5,102 @@ UI components for each stage of the PDF-to-slideshow pipeline.
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import os
 import time
+import tempfile
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 
 from extract_pdfs import process_pdf
 from clean_and_concatenate import process_pdf_dir as clean_and_plan_story
 from rewrite_for_kids import _call_gemini_dual as rewrite_text_for_kids
-from generate_voiceovers import generate_mp3, ElevenLabs
-from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips
+from generate_voiceovers import generate_mp3, ElevenLabs, is_valid_mp3
+from generate_image_captions import generate_image_caption
+from generate_image_videos import generate_video_from_image
+from enhance_video_prompt import batch_enhance_prompts
 from PIL import Image
 
 from utils.workflow import get_overwrite_files, get_page_directories, get_extraction_dir
 from utils.logger import (
     log_user_action, log_stage_start, log_stage_complete, log_stage_error,
-    log_file_operation, log_api_call, log_overwrite_warning, log_session_info
+    log_file_operation, log_file_operations_bulk, log_api_call, log_overwrite_warning, log_session_info, logger
 )
-from utils.versioning import create_new_version, get_version_count, migrate_legacy_files
+from utils.versioning import (
+    create_new_version, get_version_count, migrate_legacy_files, load_version_metadata,
+    get_latest_version_path, fast_forward_version, bulk_fast_forward
+)
+from utils.queue_manager import queue_image_to_video_prompt
+from utils.media import (
+    mux_page_videos, mux_shared_video_pages, can_concat_copy, concat_videos, encode_image_segment
+)
+
+
+# Background executor for PDF extraction so long documents don't block the UI. MuPDF is not
+# thread-safe, so each extraction runs in its own spawned process rather than a thread here
+EXTRACTION_POOL = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+
+# Scene worker processes per extraction; two extractions can run at once, so each gets half the cores
+EXTRACTION_SCENE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Maximum Replicate requests in flight for batch caption/video generation
+REPLICATE_CONCURRENCY = 8
+
+# Worker threads for writing queued prompt files
+QUEUE_WRITE_WORKERS = 16
+
+# Encode slideshows with the slower x264 "medium" preset instead of "veryfast"
+SLIDESHOW_HIGH_QUALITY = False
 
 
 # ============================================================================
 # STAGE 1: EXTRACTION
 # ============================================================================
 
+def _submit_extraction(pdf_path: Path, pdf_stem: str, pdf_format: str):
+    """Submit process_pdf to the extraction pool and track the future in session state."""
+    log_stage_start("EXTRACT", pdf_stem, pdf_path=str(pdf_path))
+    future = EXTRACTION_POOL.submit(
+        process_pdf, pdf_path, Path('extracted'), force=True,
+        pdf_format=pdf_format, workers=EXTRACTION_SCENE_WORKERS
+    )
+    st.session_state[f'extract_future_{pdf_stem}'] = future
+    st.session_state[f'extract_started_{pdf_stem}'] = time.time()
+    log_session_info(f'extract_future_{pdf_stem}', "submitted", "SET")
+
+
+def _poll_extraction(pdf_stem: str, extraction_dir: Path) -> bool:
+    """Report status of a background extraction. Returns True while it is still running."""
+    future_key = f'extract_future_{pdf_stem}'
+    future = st.session_state.get(future_key)
+    if future is None:
+        return False
+
+    if not future.done():
+        elapsed = time.time() - st.session_state.get(f'extract_started_{pdf_stem}', time.time())
+        st.info(f"⏳ Extracting content in the background... ({elapsed:.0f}s elapsed)")
+        if st.button("🔄 Refresh status", key=f"{pdf_stem}_extract_refresh_btn", use_container_width=True):
+            st.rerun()
+        return True
+
+    st.session_state.pop(future_key, None)
+    start_time = st.session_state.pop(f'extract_started_{pdf_stem}', time.time())
+    try:
+        future.result()
+        log_file_operation("extract_pdf", extraction_dir, success=True)
+        log_stage_complete("EXTRACT", pdf_stem, duration=time.time() - start_time)
+        st.success("✅ Extraction complete!")
+    except Exception as e:
+        log_stage_error("EXTRACT", pdf_stem, e)
+        st.error(f"❌ Extraction failed: {str(e)}")
+    return False
+
+
 def render_extraction_stage(pdf_path: Path, pdf_stem: str):
     """Render the extraction stage UI. LEGACY FORMAT DISABLED - only updated format supported."""
     st.subheader("Step 1: Extract Content")
@@ -49,6 +121,10 @@ def render_extraction_stage(pdf_path: Path, pdf_stem: str):
     extraction_dir = get_extraction_dir(pdf_stem)
     confirm_key = f'{pdf_stem}_confirm_extract'
     
+    # An extraction running in the background takes over the stage until it finishes
+    if _poll_extraction(pdf_stem, extraction_dir):
+        return
+    
     if st.session_state.get(confirm_key):
         overwrite_files = get_overwrite_files(pdf_stem, 'extract')
         if overwrite_files:
@@ -58,21 +134,10 @@ def render_extraction_stage(pdf_path: Path, pdf_stem: str):
         col1, col2 = st.columns(2)
         if col1.button("✅ Confirm Extract", key=f"{pdf_stem}_confirm_extract_btn", use_container_width=True):
             log_user_action("CONFIRM_EXTRACT", pdf_stem, {"overwrite": bool(overwrite_files)})
-            log_stage_start("EXTRACT", pdf_stem, pdf_path=str(pdf_path))
-            start_time = time.time()
-            try:
-                with st.spinner("Extracting content..."):
-                    process_pdf(pdf_path, Path('extracted'), force=True, pdf_format=st.session_state[format_key])
-                    log_file_operation("extract_pdf", extraction_dir, success=True)
-                duration = time.time() - start_time
-                log_stage_complete("EXTRACT", pdf_stem, duration=duration)
-                st.session_state[confirm_key] = False
-                log_session_info(confirm_key, False, "CLEAR")
-                st.success("✅ Extraction complete!")
-                st.rerun()
-            except Exception as e:
-                log_stage_error("EXTRACT", pdf_stem, e)
-                st.error(f"❌ Extraction failed: {str(e)}")
+            _submit_extraction(pdf_path, pdf_stem, st.session_state[format_key])
+            st.session_state[confirm_key] = False
+            log_session_info(confirm_key, False, "CLEAR")
+            st.rerun()
         if col2.button("❌ Cancel", key=f"{pdf_stem}_cancel_extract_btn", use_container_width=True):
             log_user_action("CANCEL_EXTRACT", pdf_stem)
             st.session_state[confirm_key] = False
@@ -87,19 +152,8 @@ def render_extraction_stage(pdf_path: Path, pdf_stem: str):
                 log_session_info(confirm_key, True, "SET")
                 st.rerun()
             else:
-                log_stage_start("EXTRACT", pdf_stem, pdf_path=str(pdf_path))
-                start_time = time.time()
-                try:
-                    with st.spinner("Extracting content..."):
-                        process_pdf(pdf_path, Path('extracted'), force=True, pdf_format=st.session_state[format_key])
-                        log_file_operation("extract_pdf", extraction_dir, success=True)
-                    duration = time.time() - start_time
-                    log_stage_complete("EXTRACT", pdf_stem, duration=duration)
-                    st.success("✅ Extraction complete!")
-                    st.rerun()
-                except Exception as e:
-                    log_stage_error("EXTRACT", pdf_stem, e)
-                    st.error(f"❌ Extraction failed: {str(e)}")
+                _submit_extraction(pdf_path, pdf_stem, st.session_state[format_key])
+                st.rerun()
 
 
 # ============================================================================
@@ -287,7 +341,6 @@ def render_audio_generation_stage(pdf_stem: str):
         return
     
     # Check if any page has final text (check versioned files)
-    from utils.versioning import get_latest_version_path
     has_final_text = any(
         (p / 'final_text_en.txt').exists() or 
         get_latest_version_path(p, 'en_text') 
@@ -315,16 +368,20 @@ def render_audio_generation_stage(pdf_stem: str):
                     if en_source and en_source.exists():
                         temp_en_audio = page_dir / 'temp_gen_en_audio.mp3'
                         generate_mp3(client, en_source.read_text(), "7tRwuZTD1EWi6nydVerp", "eleven_flash_v2_5", temp_en_audio)
-                        if temp_en_audio.exists():
+                        if is_valid_mp3(temp_en_audio):
                             create_new_version(page_dir, 'en_audio', str(temp_en_audio), model='eleven_flash_v2_5')
-                            temp_en_audio.unlink(missing_ok=True)
+                        else:
+                            logger.warning(f"Skipping EN audio version for {page_dir.name}: generated file missing or truncated")
+                        temp_en_audio.unlink(missing_ok=True)
                     # Hindi audio
                     if hi_source and hi_source.exists():
                         temp_hi_audio = page_dir / 'temp_gen_hi_audio.mp3'
                         generate_mp3(client, hi_source.read_text(), "trxRCYtDC6qFREKq6Ek2", "eleven_flash_v2_5", temp_hi_audio)
-                        if temp_hi_audio.exists():
+                        if is_valid_mp3(temp_hi_audio):
                             create_new_version(page_dir, 'hi_audio', str(temp_hi_audio), model='eleven_flash_v2_5')
-                            temp_hi_audio.unlink(missing_ok=True)
+                        else:
+                            logger.warning(f"Skipping HI audio version for {page_dir.name}: generated file missing or truncated")
+                        temp_hi_audio.unlink(missing_ok=True)
             st.session_state[confirm_key] = False
             st.success("✅ Audio generation complete!")
             st.rerun()
@@ -348,15 +405,19 @@ def render_audio_generation_stage(pdf_stem: str):
                         if en_source and en_source.exists():
                             temp_en_audio = page_dir / 'temp_gen_en_audio.mp3'
                             generate_mp3(client, en_source.read_text(), "7tRwuZTD1EWi6nydVerp", "eleven_flash_v2_5", temp_en_audio)
-                            if temp_en_audio.exists():
+                            if is_valid_mp3(temp_en_audio):
                                 create_new_version(page_dir, 'en_audio', str(temp_en_audio), model='eleven_flash_v2_5')
-                                temp_en_audio.unlink(missing_ok=True)
+                            else:
+                                logger.warning(f"Skipping EN audio version for {page_dir.name}: generated file missing or truncated")
+                            temp_en_audio.unlink(missing_ok=True)
                         if hi_source and hi_source.exists():
                             temp_hi_audio = page_dir / 'temp_gen_hi_audio.mp3'
                             generate_mp3(client, hi_source.read_text(), "trxRCYtDC6qFREKq6Ek2", "eleven_flash_v2_5", temp_hi_audio)
-                            if temp_hi_audio.exists():
+                            if is_valid_mp3(temp_hi_audio):
                                 create_new_version(page_dir, 'hi_audio', str(temp_hi_audio), model='eleven_flash_v2_5')
-                                temp_hi_audio.unlink(missing_ok=True)
+                            else:
+                                logger.warning(f"Skipping HI audio version for {page_dir.name}: generated file missing or truncated")
+                            temp_hi_audio.unlink(missing_ok=True)
                 st.success("✅ Audio generation complete!")
                 st.rerun()
 
@@ -365,21 +426,282 @@ def render_audio_generation_stage(pdf_stem: str):
 # STAGE 5: VIDEO GENERATION
 # ============================================================================
 
+@dataclass(slots=True)
+class PageState:
+    """Snapshot of a page directory taken with a single scandir pass."""
+    page_dir: Path
+    entries: frozenset
+    latest: Dict[str, str]
+    version_counts: Dict[str, int]
+    has_caption: bool
+    has_enhanced: bool
+    has_queued_prompt: bool
+    
+    def latest_path(self, content_type: str) -> Optional[Path]:
+        """Latest version path for content_type, or None if it is missing on disk."""
+        filename = self.latest.get(content_type)
+        return self.page_dir / filename if filename else None
+    
+    @property
+    def image_path(self) -> Optional[Path]:
+        """Latest image version, falling back to the extracted image_to_use.png."""
+        latest_image = self.latest_path('image')
+        if latest_image:
+            return latest_image
+        if 'image_to_use.png' in self.entries:
+            return self.page_dir / 'image_to_use.png'
+        return None
+
+
+def _scan_page(page_dir: Path) -> PageState:
+    """Build a PageState from one directory listing plus versions.json."""
+    with os.scandir(page_dir) as it:
+        entries = frozenset(entry.name for entry in it)
+    
+    latest = {}
+    version_counts = {}
+    if 'versions.json' in entries:
+        try:
+            metadata = load_version_metadata(page_dir)
+        except Exception:
+            metadata = {}
+        for content_type, info in metadata.items():
+            if not isinstance(info, dict):
+                continue
+            version_counts[content_type] = len(info.get('versions') or [])
+            filename = info.get('latest')
+            # Only report versions whose file is actually present
+            if filename and filename in entries:
+                latest[content_type] = filename
+    
+    return PageState(
+        page_dir=page_dir,
+        entries=entries,
+        latest=latest,
+        version_counts=version_counts,
+        has_caption='image_caption.txt' in entries,
+        has_enhanced='enhanced_video_prompt.txt' in entries,
+        has_queued_prompt=any(
+            name.startswith('image_to_video_prompt_for_v') and name.endswith('.txt')
+            for name in entries
+        ),
+    )
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_page_dirs(pdf_stem: str, mtime_ns: int) -> List[Path]:
+    """Cached get_page_directories; mtime_ns of the extraction dir is the cache key."""
+    return get_page_directories(pdf_stem)
+
+
+def _cached_page_dirs(pdf_stem: str) -> List[Path]:
+    """Page directories for a PDF, re-listed only when scenes are added or removed."""
+    try:
+        mtime_ns = get_extraction_dir(pdf_stem).stat().st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    return _list_page_dirs(pdf_stem, mtime_ns)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _scan_all(pdf_stem: str, signature: tuple) -> Dict[Path, PageState]:
+    """Scan every page listed in signature; cached until a page directory mtime changes."""
+    extraction_dir = get_extraction_dir(pdf_stem)
+    states = {}
+    for name, _mtime_ns in signature:
+        page_dir = extraction_dir / name
+        states[page_dir] = _scan_page(page_dir)
+    return states
+
+
+def _get_page_states(pdf_stem: str, page_dirs: List[Path]) -> Dict[Path, PageState]:
+    """
+    Scan all page directories, reusing the previous scan while nothing changed.
+    
+    Creating, replacing or deleting a file bumps its directory mtime, so the
+    tuple of page directory mtimes is enough to detect stale snapshots.
+    """
+    signature = []
+    for page_dir in page_dirs:
+        try:
+            signature.append((page_dir.name, page_dir.stat().st_mtime_ns))
+        except OSError:
+            signature.append((page_dir.name, 0))
+    return _scan_all(pdf_stem, tuple(signature))
+
+
+@functools.lru_cache(maxsize=2048)
+def _read_text_cached(path_str: str, mtime_ns: int) -> str:
+    """Read a small UTF-8 file; mtime_ns is part of the key so edits produce a cache miss."""
+    return Path(path_str).read_text(encoding='utf-8')
+
+
+def _read_text(path: Path) -> str:
+    """Read caption/prompt text, served from memory while the file is unchanged."""
+    return _read_text_cached(str(path), path.stat().st_mtime_ns)
+
+
+def _fast_write_text(path: Path, text: str):
+    """Write UTF-8 text with a single os.write, skipping the TextIOWrapper layer."""
+    fd = os.open(os.fspath(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        data = text.encode('utf-8')
+        written = os.write(fd, data)
+        # os.write may be partial on some filesystems; finish the remainder
+        while written < len(data):
+            written += os.write(fd, data[written:])
+    finally:
+        os.close(fd)
+
+
+def _should_update_progress(done: int, total: int) -> bool:
+    """Throttle batch progress widgets to roughly 50 updates per run (plus the final one)."""
+    tick = max(1, total // 50)
+    return done % tick == 0 or done == total
+
+
+def _resolve_prompt(state: PageState, batch_prompt: str, use_captions: bool) -> str:
+    """
+    Build the image-to-video prompt for a page.
+    
+    An AI-enhanced prompt is used as-is; otherwise the image caption is
+    prepended to the batch motion prompt. Without use_captions the batch
+    prompt is returned unchanged.
+    """
+    if not use_captions:
+        return batch_prompt
+    if state.has_enhanced:
+        # Use enhanced prompt directly (it's already complete)
+        return _read_text(state.page_dir / 'enhanced_video_prompt.txt').strip()
+    if state.has_caption:
+        # Fallback to caption + batch prompt
+        caption = _read_text(state.page_dir / 'image_caption.txt').strip()
+        return f"{caption}. {batch_prompt}"
+    return batch_prompt
+
+
+def _queue_video_prompts(pages: List[Path], page_prompts: Dict[Path, str], page_states: Dict[Path, PageState]) -> int:
+    """Write queued prompt files for all pages concurrently. Returns the number queued."""
+    queued_count = 0
+    with ThreadPoolExecutor(max_workers=QUEUE_WRITE_WORKERS) as executor:
+        # Target the next image_video version, counted from the cached page scan
+        futures = {
+            executor.submit(
+                queue_image_to_video_prompt,
+                page_dir,
+                page_prompts[page_dir],
+                page_states[page_dir].version_counts.get('image_video', 0) + 1
+            ): page_dir
+            for page_dir in pages
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+                queued_count += 1
+            except Exception as e:
+                st.warning(f"❌ Failed to queue {futures[future].name}: {str(e)}")
+    return queued_count
+
+
+def _caption_page(page_dir: Path, question: Optional[str], use_auto_caption: bool) -> Optional[str]:
+    """Caption the latest image of a page and save image_caption.txt. Safe to run in a worker thread."""
+    
+    image_path = get_latest_version_path(page_dir, 'image')
+    if not image_path:
+        image_path = page_dir / 'image_to_use.png'
+    if not image_path.exists():
+        return None
+    
+    caption = generate_image_caption(
+        image_path,
+        question=question,
+        use_caption_mode=use_auto_caption
+    )
+    
+    if caption:
+        caption_file = page_dir / 'image_caption.txt'
+        _fast_write_text(caption_file, caption)
+        log_api_call("Replicate", "blip-2", 0, success=True)
+    else:
+        log_api_call("Replicate", "blip-2", 0, success=False)
+    return caption
+
+
+def _generate_page_video(page_dir: Path, final_prompt: str, log_label: str) -> bool:
+    """Animate the latest image of a page and register it as a new image_video version. Safe to run in a worker thread."""
+    
+    image_path = get_latest_version_path(page_dir, 'image')
+    if not image_path:
+        image_path = page_dir / 'image_to_use.png'
+    if not image_path.exists():
+        return False
+    
+    temp_output = page_dir / 'temp_batch_image_video.mp4'
+    success = generate_video_from_image(
+        image_path,
+        final_prompt,
+        temp_output,
+        num_frames=81,
+        aspect_ratio="16:9",
+        frames_per_second=24,
+        sample_shift=5.0
+    )
+    
+    if success and temp_output.exists():
+        create_new_version(page_dir, 'image_video', str(temp_output), model='wan-video/wan-2.2-i2v-fast')
+        temp_output.unlink()
+        log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(final_prompt), success=True)
+        log_file_operation(f"{log_label}_{page_dir.name}", page_dir, success=True)
+        return True
+    
+    log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(final_prompt), success=False)
+    return False
+
+
+def _page_jobs(worker: Callable[[Path], object], pages: List[Path]) -> Iterator[Tuple[Path, bool, Optional[Exception]]]:
+    """
+    Run worker(page_dir) for every page on a thread pool.
+    
+    Yields (page_dir, ok, error) in completion order so UI code only has to
+    consume results; the executor never touches Streamlit widgets.
+    """
+    with ThreadPoolExecutor(max_workers=REPLICATE_CONCURRENCY) as executor:
+        futures = {executor.submit(worker, page_dir): page_dir for page_dir in pages}
+        for future in as_completed(futures):
+            page_dir = futures[future]
+            try:
+                yield page_dir, bool(future.result()), None
+            except Exception as e:
+                yield page_dir, False, e
+
+
+def _caption_jobs(pages: List[Path], question: Optional[str], use_auto_caption: bool) -> Iterator[Tuple[Path, bool, Optional[Exception]]]:
+    """Caption pages concurrently, yielding (page_dir, ok, error) as each finishes."""
+    return _page_jobs(lambda page_dir: _caption_page(page_dir, question, use_auto_caption), pages)
+
+
+def _video_jobs(pages: List[Path], page_prompts: Dict[Path, str], log_label: str) -> Iterator[Tuple[Path, bool, Optional[Exception]]]:
+    """Generate image videos concurrently, yielding (page_dir, ok, error) as each finishes."""
+    return _page_jobs(lambda page_dir: _generate_page_video(page_dir, page_prompts[page_dir], log_label), pages)
+
+
 def render_video_generation_stage(pdf_stem: str):
     """Render the video generation stage UI for batch processing."""
-    from utils.versioning import get_latest_version_path, get_version_count, fast_forward_version
     
     st.subheader("Step 5: Generate Videos")
     st.write("Create animated videos and combine with audio")
     
-    page_dirs = get_page_directories(pdf_stem)
+    page_dirs = _cached_page_dirs(pdf_stem)
     
     if not page_dirs:
         st.info("ℹ️ Complete Step 1 (Extract Content) first")
         return
     
+    # One directory scan per page, reused for every status check below
+    page_states = _get_page_states(pdf_stem, page_dirs)
+    
     # Check if images exist
-    has_images = any((p / 'image_to_use.png').exists() or get_latest_version_path(p, 'image') for p in page_dirs)
+    has_images = any(page_states[p].image_path for p in page_dirs)
     if not has_images:
         st.info("ℹ️ No images found. Complete Step 1 (Extract Content) first")
         return
@@ -394,8 +716,7 @@ def render_video_generation_stage(pdf_stem: str):
     pages_with_captions = []
     pages_without_captions = []
     for page_dir in page_dirs:
-        caption_file = page_dir / 'image_caption.txt'
-        if caption_file.exists():
+        if page_states[page_dir].has_caption:
             pages_with_captions.append(page_dir)
         else:
             pages_without_captions.append(page_dir)
@@ -430,6 +751,7 @@ def render_video_generation_stage(pdf_stem: str):
         )
     
     # Caption generation buttons
+    captions_status_ph = st.empty()
     col1, col2, col3 = st.columns(3)
     
     with col1:
@@ -438,9 +760,6 @@ def render_video_generation_stage(pdf_stem: str):
             key=f"{pdf_stem}_gen_all_captions",
             use_container_width=True
         ):
-            from generate_image_captions import batch_generate_captions
-            from utils.logger import log_user_action, log_api_call
-            
             log_user_action("GENERATE_ALL_CAPTIONS", pdf_stem, {
                 "pages": len(page_dirs),
                 "mode": caption_mode,
@@ -449,45 +768,32 @@ def render_video_generation_stage(pdf_stem: str):
             
             progress_bar = st.progress(0)
             status_text = st.empty()
+            status_text.text(f"Generating captions for {len(page_dirs)} page(s)...")
             
-            results = {}
             success_count = 0
             
-            for idx, page_dir in enumerate(page_dirs):
-                status_text.text(f"Generating caption for {page_dir.name}... ({idx+1}/{len(page_dirs)})")
-                
-                image_path = get_latest_version_path(page_dir, 'image')
-                if not image_path:
-                    image_path = page_dir / 'image_to_use.png'
-                
-                if image_path and image_path.exists():
-                    from generate_image_captions import generate_image_caption
-                    
-                    caption = generate_image_caption(
-                        image_path,
-                        question=caption_question,
-                        use_caption_mode=use_auto_caption
-                    )
-                    
-                    if caption:
-                        caption_file = page_dir / 'image_caption.txt'
-                        caption_file.write_text(caption, encoding='utf-8')
-                        results[page_dir.name] = caption
-                        success_count += 1
-                        log_api_call("Replicate", "blip-2", 0, success=True)
-                    else:
-                        log_api_call("Replicate", "blip-2", 0, success=False)
+            jobs = _caption_jobs(page_dirs, caption_question, use_auto_caption)
+            for idx, (page_dir, ok, error) in enumerate(jobs):
+                if ok:
+                    success_count += 1
+                elif error is not None:
+                    st.warning(f"❌ Failed for {page_dir.name}: {str(error)}")
                 
-                progress_bar.progress((idx + 1) / len(page_dirs))
+                if _should_update_progress(idx + 1, len(page_dirs)):
+                    status_text.text(f"Captioned {page_dir.name} ({idx+1}/{len(page_dirs)})")
+                    progress_bar.progress((idx + 1) / len(page_dirs))
             
             progress_bar.empty()
             status_text.empty()
             
+            _scan_all.clear()
             if success_count > 0:
-                st.success(f"✅ Generated {success_count} captions!")
-                st.rerun()
+                # First captions enable the "AI Enhance Prompts" button, which needs a rerun
+                if not pages_with_captions:
+                    st.rerun()
+                captions_status_ph.success(f"✅ Generated {success_count} captions!")
             else:
-                st.error("❌ Failed to generate captions")
+                captions_status_ph.error("❌ Failed to generate captions")
     
     with col2:
         if st.button(
@@ -496,9 +802,6 @@ def render_video_generation_stage(pdf_stem: str):
             use_container_width=True,
             disabled=(len(pages_without_captions) == 0)
         ):
-            from generate_image_captions import batch_generate_captions
-            from utils.logger import log_user_action, log_api_call
-            
             log_user_action("GENERATE_MISSING_CAPTIONS", pdf_stem, {
                 "pages": len(pages_without_captions),
                 "mode": caption_mode,
@@ -507,43 +810,32 @@ def render_video_generation_stage(pdf_stem: str):
             
             progress_bar = st.progress(0)
             status_text = st.empty()
+            status_text.text(f"Generating captions for {len(pages_without_captions)} page(s)...")
             
             success_count = 0
             
-            for idx, page_dir in enumerate(pages_without_captions):
-                status_text.text(f"Generating caption for {page_dir.name}... ({idx+1}/{len(pages_without_captions)})")
-                
-                image_path = get_latest_version_path(page_dir, 'image')
-                if not image_path:
-                    image_path = page_dir / 'image_to_use.png'
-                
-                if image_path and image_path.exists():
-                    from generate_image_captions import generate_image_caption
-                    
-                    caption = generate_image_caption(
-                        image_path,
-                        question=caption_question,
-                        use_caption_mode=use_auto_caption
-                    )
-                    
-                    if caption:
-                        caption_file = page_dir / 'image_caption.txt'
-                        caption_file.write_text(caption, encoding='utf-8')
-                        success_count += 1
-                        log_api_call("Replicate", "blip-2", 0, success=True)
-                    else:
-                        log_api_call("Replicate", "blip-2", 0, success=False)
+            jobs = _caption_jobs(pages_without_captions, caption_question, use_auto_caption)
+            for idx, (page_dir, ok, error) in enumerate(jobs):
+                if ok:
+                    success_count += 1
+                elif error is not None:
+                    st.warning(f"❌ Failed for {page_dir.name}: {str(error)}")
                 
-                progress_bar.progress((idx + 1) / len(pages_without_captions))
+                if _should_update_progress(idx + 1, len(pages_without_captions)):
+                    status_text.text(f"Captioned {page_dir.name} ({idx+1}/{len(pages_without_captions)})")
+                    progress_bar.progress((idx + 1) / len(pages_without_captions))
             
             progress_bar.empty()
             status_text.empty()
             
+            _scan_all.clear()
             if success_count > 0:
-                st.success(f"✅ Generated {success_count} captions!")
-                st.rerun()
+                # First captions enable the "AI Enhance Prompts" button, which needs a rerun
+                if not pages_with_captions:
+                    st.rerun()
+                captions_status_ph.success(f"✅ Generated {success_count} captions!")
             else:
-                st.error("❌ Failed to generate captions")
+                captions_status_ph.error("❌ Failed to generate captions")
     
     with col3:
         if st.button(
@@ -558,16 +850,15 @@ def render_video_generation_stage(pdf_stem: str):
     if st.session_state.get(f'{pdf_stem}_show_captions', False):
         st.markdown("### Generated Captions")
         for page_dir in sorted(page_dirs, key=lambda p: p.name):
-            caption_file = page_dir / 'image_caption.txt'
-            if caption_file.exists():
-                caption = caption_file.read_text(encoding='utf-8')
+            state = page_states[page_dir]
+            if state.has_caption:
+                caption_file = page_dir / 'image_caption.txt'
+                caption = _read_text(caption_file)
                 with st.expander(f"📄 {page_dir.name}", expanded=False):
                     st.write(caption)
                     # Show image
-                    image_path = get_latest_version_path(page_dir, 'image')
-                    if not image_path:
-                        image_path = page_dir / 'image_to_use.png'
-                    if image_path and image_path.exists():
+                    image_path = state.image_path
+                    if image_path:
                         st.image(str(image_path), width=300)
     
     st.divider()
@@ -579,18 +870,13 @@ def render_video_generation_stage(pdf_stem: str):
     pages_needing_video = []
     pages_already_queued = []
     for page_dir in page_dirs:
-        image_path = get_latest_version_path(page_dir, 'image')
-        if not image_path:
-            image_path = page_dir / 'image_to_use.png'
-        
-        if image_path and image_path.exists():
-            video_path = get_latest_version_path(page_dir, 'image_video')
-            if not video_path or not video_path.exists():
+        state = page_states[page_dir]
+        if state.image_path:
+            if not state.latest_path('image_video'):
                 pages_needing_video.append(page_dir)
                 
                 # Check if already queued
-                queued_prompts = list(page_dir.glob('image_to_video_prompt_for_v*.txt'))
-                if queued_prompts:
+                if state.has_queued_prompt:
                     pages_already_queued.append(page_dir)
     
     # Display status with queue information
@@ -632,9 +918,6 @@ def render_video_generation_stage(pdf_stem: str):
             disabled=(len(pages_with_captions) == 0),
             help="Create generic, visually exciting prompts (no character names - video model doesn't recognize them)"
         ):
-            from enhance_video_prompt import batch_enhance_prompts
-            from utils.logger import log_user_action, log_api_call
-            
             log_user_action("ENHANCE_ALL_PROMPTS", pdf_stem, {"pages": len(pages_with_captions)})
             
             with st.spinner("Creating generic, visually exciting prompts for all pages..."):
@@ -642,11 +925,12 @@ def render_video_generation_stage(pdf_stem: str):
                 
                 success_count = sum(1 for v in enhanced_prompts.values() if v)
                 
-                # Save enhanced prompts
-                for page_dir, enhanced_prompt in enhanced_prompts.items():
+                # Save enhanced prompts (results are keyed by page directory name)
+                name_to_dir = {p.name: p for p in page_dirs}
+                for page_name, enhanced_prompt in enhanced_prompts.items():
                     if enhanced_prompt:
-                        prompt_file = page_dirs[next(i for i, p in enumerate(page_dirs) if p.name == page_dir)] / 'enhanced_video_prompt.txt'
-                        prompt_file.write_text(enhanced_prompt, encoding='utf-8')
+                        prompt_file = name_to_dir[page_name] / 'enhanced_video_prompt.txt'
+                        _fast_write_text(prompt_file, enhanced_prompt)
                         log_api_call("Gemini", "gemini-2.0-flash-exp", 0, success=True)
                 
                 if success_count > 0:
@@ -655,11 +939,15 @@ def render_video_generation_stage(pdf_stem: str):
                     
                     # Set all text area session states to the enhanced prompts
                     for page_dir in page_dirs:
+                        text_area_key = f"img_video_prompt_{page_dir.name}"
+                        enhanced_prompt = enhanced_prompts.get(page_dir.name)
+                        if enhanced_prompt:
+                            # Just written above, no need to read it back
+                            st.session_state[text_area_key] = enhanced_prompt.strip()
+                            continue
                         enhanced_file = page_dir / 'enhanced_video_prompt.txt'
                         if enhanced_file.exists():
-                            text_area_key = f"img_video_prompt_{page_dir.name}"
-                            enhanced_prompt = enhanced_file.read_text(encoding='utf-8').strip()
-                            st.session_state[text_area_key] = enhanced_prompt
+                            st.session_state[text_area_key] = _read_text(enhanced_file).strip()
                     
                     st.rerun()
     
@@ -667,16 +955,17 @@ def render_video_generation_stage(pdf_stem: str):
         st.warning("⚠️ No captions generated yet. Generate captions first to use this option.")
     
     # Show enhanced prompts if they exist
-    enhanced_count = sum(1 for p in page_dirs if (p / 'enhanced_video_prompt.txt').exists())
+    enhanced_count = sum(1 for p in page_dirs if page_states[p].has_enhanced)
     if enhanced_count > 0:
         with st.expander(f"View {enhanced_count} Enhanced Prompt(s)", expanded=False):
             for page_dir in sorted(page_dirs, key=lambda p: p.name):
-                enhanced_file = page_dir / 'enhanced_video_prompt.txt'
-                if enhanced_file.exists():
-                    enhanced_prompt = enhanced_file.read_text(encoding='utf-8')
+                if page_states[page_dir].has_enhanced:
+                    enhanced_file = page_dir / 'enhanced_video_prompt.txt'
+                    enhanced_prompt = _read_text(enhanced_file)
                     st.markdown(f"**{page_dir.name}:** {enhanced_prompt}")
     
     # Execution mode selection
+    videos_status_ph = st.empty()
     video_gen_mode = st.radio(
         "Execution Mode",
         options=["Execute Now", "Queue for Later"],
@@ -707,47 +996,20 @@ def render_video_generation_stage(pdf_stem: str):
             if batch_prompt:
                 if video_gen_mode == "Queue for Later":
                     # Queue prompts for all pages
-                    from utils.queue_manager import queue_image_to_video_prompt
-                    from utils.logger import log_user_action
-                    
                     log_user_action("QUEUE_BATCH_IMAGE_VIDEOS", pdf_stem, {"pages": len(page_dirs), "prompt": batch_prompt})
                     
-                    queued_count = 0
-                    for page_dir in page_dirs:
-                        # Get current image version
-                        image_version = get_version_count(page_dir, 'image')
-                        video_version = get_version_count(page_dir, 'image_video')
-                        target_version = video_version + 1
-                        
-                        # Build prompt with optional caption/enhanced prompt
-                        final_prompt = batch_prompt
-                        if use_captions_in_prompt:
-                            enhanced_file = page_dir / 'enhanced_video_prompt.txt'
-                            caption_file = page_dir / 'image_caption.txt'
-                            
-                            if enhanced_file.exists():
-                                # Use enhanced prompt directly (it's already complete)
-                                final_prompt = enhanced_file.read_text(encoding='utf-8').strip()
-                            elif caption_file.exists():
-                                # Fallback to caption + batch prompt
-                                caption = caption_file.read_text(encoding='utf-8').strip()
-                                final_prompt = f"{caption}. {batch_prompt}"
-                        
-                        try:
-                            queue_image_to_video_prompt(page_dir, final_prompt, target_version)
-                            queued_count += 1
-                        except Exception as e:
-                            st.warning(f"❌ Failed to queue {page_dir.name}: {str(e)}")
+                    page_prompts = {
+                        page_dir: _resolve_prompt(page_states[page_dir], batch_prompt, use_captions_in_prompt)
+                        for page_dir in page_dirs
+                    }
+                    
+                    queued_count = _queue_video_prompts(page_dirs, page_prompts, page_states)
                     
                     st.success(f"✅ Queued {queued_count} video generation tasks!")
                     st.info(f"Prompts saved as `image_to_video_prompt_for_v*.txt`")
                     st.caption("Background service will process these when ready")
                 else:
                     # Execute immediately
-                    from generate_image_videos import generate_video_from_image
-                    from utils.versioning import create_new_version
-                    from utils.logger import log_user_action, log_api_call, log_file_operation
-                    
                     log_user_action("BATCH_GENERATE_IMAGE_VIDEOS", pdf_stem, {"pages": len(page_dirs), "prompt": batch_prompt})
                     
                     progress_bar = st.progress(0)
@@ -756,71 +1018,36 @@ def render_video_generation_stage(pdf_stem: str):
                     success_count = 0
                     fail_count = 0
                     
-                    for idx, page_dir in enumerate(page_dirs):
-                        status_text.text(f"Processing {page_dir.name}... ({idx+1}/{len(page_dirs)})")
-                        
-                        # Get image
-                        image_path = get_latest_version_path(page_dir, 'image')
-                        if not image_path:
-                            image_path = page_dir / 'image_to_use.png'
-                        
-                        if not image_path or not image_path.exists():
-                            fail_count += 1
-                            continue
-                        
-                        # Build prompt with optional caption/enhanced prompt
-                        final_prompt = batch_prompt
-                        if use_captions_in_prompt:
-                            enhanced_file = page_dir / 'enhanced_video_prompt.txt'
-                            caption_file = page_dir / 'image_caption.txt'
-                            
-                            if enhanced_file.exists():
-                                # Use enhanced prompt directly (it's already complete)
-                                final_prompt = enhanced_file.read_text(encoding='utf-8').strip()
-                            elif caption_file.exists():
-                                # Fallback to caption + batch prompt
-                                caption = caption_file.read_text(encoding='utf-8').strip()
-                                final_prompt = f"{caption}. {batch_prompt}"
-                        
-                        try:
-                            temp_output = page_dir / 'temp_batch_image_video.mp4'
-                            
-                            success = generate_video_from_image(
-                                image_path,
-                                final_prompt,
-                                temp_output,
-                                num_frames=81,
-                                aspect_ratio="16:9",
-                                frames_per_second=24,
-                                sample_shift=5.0
-                            )
-                            
-                            if success and temp_output.exists():
-                                create_new_version(page_dir, 'image_video', str(temp_output), model='wan-video/wan-2.2-i2v-fast')
-                                temp_output.unlink()
-                                log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(batch_prompt), success=True)
-                                log_file_operation(f"batch_gen_video_{page_dir.name}", page_dir, success=True)
-                                success_count += 1
-                            else:
-                                log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(batch_prompt), success=False)
-                                fail_count += 1
-                        
-                        except Exception as e:
-                            st.warning(f"❌ Failed for {page_dir.name}: {str(e)}")
-                            log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(batch_prompt), success=False)
+                    # Build prompts up front; only the Replicate calls run in worker threads
+                    page_prompts = {
+                        page_dir: _resolve_prompt(page_states[page_dir], batch_prompt, use_captions_in_prompt)
+                        for page_dir in page_dirs
+                    }
+                    
+                    status_text.text(f"Generating videos for {len(page_dirs)} page(s)...")
+                    jobs = _video_jobs(page_dirs, page_prompts, "batch_gen_video")
+                    for idx, (page_dir, ok, error) in enumerate(jobs):
+                        if ok:
+                            success_count += 1
+                        else:
+                            if error is not None:
+                                st.warning(f"❌ Failed for {page_dir.name}: {str(error)}")
+                                log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(page_prompts[page_dir]), success=False)
                             fail_count += 1
                         
-                        progress_bar.progress((idx + 1) / len(page_dirs))
+                        if _should_update_progress(idx + 1, len(page_dirs)):
+                            status_text.text(f"Processed {page_dir.name} ({idx+1}/{len(page_dirs)})")
+                            progress_bar.progress((idx + 1) / len(page_dirs))
                     
                     progress_bar.empty()
                     status_text.empty()
                     
-                    if success_count > 0:
-                        st.success(f"✅ Generated {success_count} videos successfully!")
-                    if fail_count > 0:
-                        st.warning(f"⚠️ {fail_count} videos failed")
-                    
-                    st.rerun()
+                    _scan_all.clear()
+                    with videos_status_ph.container():
+                        if success_count > 0:
+                            st.success(f"✅ Generated {success_count} videos successfully!")
+                        if fail_count > 0:
+                            st.warning(f"⚠️ {fail_count} videos failed")
     
     with col2:
         # Show queue count for missing videos
@@ -841,45 +1068,20 @@ def render_video_generation_stage(pdf_stem: str):
             if batch_prompt and pages_needing_video:
                 if video_gen_mode == "Queue for Later":
                     # Queue prompts for missing pages only
-                    from utils.queue_manager import queue_image_to_video_prompt
-                    from utils.logger import log_user_action
-                    
                     log_user_action("QUEUE_MISSING_IMAGE_VIDEOS", pdf_stem, {"pages": len(pages_needing_video), "prompt": batch_prompt})
                     
-                    queued_count = 0
-                    for page_dir in pages_needing_video:
-                        video_version = get_version_count(page_dir, 'image_video')
-                        target_version = video_version + 1
-                        
-                        # Build prompt with optional caption/enhanced prompt
-                        final_prompt = batch_prompt
-                        if use_captions_in_prompt:
-                            enhanced_file = page_dir / 'enhanced_video_prompt.txt'
-                            caption_file = page_dir / 'image_caption.txt'
-                            
-                            if enhanced_file.exists():
-                                # Use enhanced prompt directly (it's already complete)
-                                final_prompt = enhanced_file.read_text(encoding='utf-8').strip()
-                            elif caption_file.exists():
-                                # Fallback to caption + batch prompt
-                                caption = caption_file.read_text(encoding='utf-8').strip()
-                                final_prompt = f"{caption}. {batch_prompt}"
-                        
-                        try:
-                            queue_image_to_video_prompt(page_dir, final_prompt, target_version)
-                            queued_count += 1
-                        except Exception as e:
-                            st.warning(f"❌ Failed to queue {page_dir.name}: {str(e)}")
+                    page_prompts = {
+                        page_dir: _resolve_prompt(page_states[page_dir], batch_prompt, use_captions_in_prompt)
+                        for page_dir in pages_needing_video
+                    }
+                    
+                    queued_count = _queue_video_prompts(pages_needing_video, page_prompts, page_states)
                     
                     st.success(f"✅ Queued {queued_count} video generation tasks!")
                     st.info(f"Prompts saved as `image_to_video_prompt_for_v*.txt`")
                     st.caption("Background service will process these when ready")
                 else:
                     # Execute immediately
-                    from generate_image_videos import generate_video_from_image
-                    from utils.versioning import create_new_version
-                    from utils.logger import log_user_action, log_api_call, log_file_operation
-                    
                     log_user_action("BATCH_GENERATE_MISSING_IMAGE_VIDEOS", pdf_stem, {"pages": len(pages_needing_video), "prompt": batch_prompt})
                     
                     progress_bar = st.progress(0)
@@ -888,70 +1090,36 @@ def render_video_generation_stage(pdf_stem: str):
                     success_count = 0
                     fail_count = 0
                     
-                    for idx, page_dir in enumerate(pages_needing_video):
-                        status_text.text(f"Processing {page_dir.name}... ({idx+1}/{len(pages_needing_video)})")
-                        
-                        image_path = get_latest_version_path(page_dir, 'image')
-                        if not image_path:
-                            image_path = page_dir / 'image_to_use.png'
-                        
-                        if not image_path or not image_path.exists():
-                            fail_count += 1
-                            continue
-                        
-                        # Build prompt with optional caption/enhanced prompt
-                        final_prompt = batch_prompt
-                        if use_captions_in_prompt:
-                            enhanced_file = page_dir / 'enhanced_video_prompt.txt'
-                            caption_file = page_dir / 'image_caption.txt'
-                            
-                            if enhanced_file.exists():
-                                # Use enhanced prompt directly (it's already complete)
-                                final_prompt = enhanced_file.read_text(encoding='utf-8').strip()
-                            elif caption_file.exists():
-                                # Fallback to caption + batch prompt
-                                caption = caption_file.read_text(encoding='utf-8').strip()
-                                final_prompt = f"{caption}. {batch_prompt}"
-                        
-                        try:
-                            temp_output = page_dir / 'temp_batch_image_video.mp4'
-                            
-                            success = generate_video_from_image(
-                                image_path,
-                                final_prompt,
-                                temp_output,
-                                num_frames=81,
-                                aspect_ratio="16:9",
-                                frames_per_second=24,
-                                sample_shift=5.0
-                            )
-                            
-                            if success and temp_output.exists():
-                                create_new_version(page_dir, 'image_video', temp_output, model='wan-video/wan-2.2-i2v-fast')
-                                temp_output.unlink()
-                                log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(batch_prompt), success=True)
-                                log_file_operation(f"batch_gen_missing_video_{page_dir.name}", page_dir, success=True)
-                                success_count += 1
-                            else:
-                                log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(batch_prompt), success=False)
-                                fail_count += 1
-                        
-                        except Exception as e:
-                            st.warning(f"❌ Failed for {page_dir.name}: {str(e)}")
-                            log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(batch_prompt), success=False)
+                    # Build prompts up front; only the Replicate calls run in worker threads
+                    page_prompts = {
+                        page_dir: _resolve_prompt(page_states[page_dir], batch_prompt, use_captions_in_prompt)
+                        for page_dir in pages_needing_video
+                    }
+                    
+                    status_text.text(f"Generating videos for {len(pages_needing_video)} page(s)...")
+                    jobs = _video_jobs(pages_needing_video, page_prompts, "batch_gen_missing_video")
+                    for idx, (page_dir, ok, error) in enumerate(jobs):
+                        if ok:
+                            success_count += 1
+                        else:
+                            if error is not None:
+                                st.warning(f"❌ Failed for {page_dir.name}: {str(error)}")
+                                log_api_call("Replicate", "wan-video/wan-2.2-i2v-fast", len(page_prompts[page_dir]), success=False)
                             fail_count += 1
                         
-                        progress_bar.progress((idx + 1) / len(pages_needing_video))
+                        if _should_update_progress(idx + 1, len(pages_needing_video)):
+                            status_text.text(f"Processed {page_dir.name} ({idx+1}/{len(pages_needing_video)})")
+                            progress_bar.progress((idx + 1) / len(pages_needing_video))
                     
                     progress_bar.empty()
                     status_text.empty()
                     
-                    if success_count > 0:
-                        st.success(f"✅ Generated {success_count} videos successfully!")
-                    if fail_count > 0:
-                        st.warning(f"⚠️ {fail_count} videos failed")
-                    
-                    st.rerun()
+                    _scan_all.clear()
+                    with videos_status_ph.container():
+                        if success_count > 0:
+                            st.success(f"✅ Generated {success_count} videos successfully!")
+                        if fail_count > 0:
+                            st.warning(f"⚠️ {fail_count} videos failed")
     
     st.divider()
     
@@ -961,11 +1129,8 @@ def render_video_generation_stage(pdf_stem: str):
     # Count pages with videos and audio
     pages_ready_for_final = []
     for page_dir in page_dirs:
-        image_video_path = get_latest_version_path(page_dir, 'image_video')
-        en_audio_path = get_latest_version_path(page_dir, 'en_audio')
-        hi_audio_path = get_latest_version_path(page_dir, 'hi_audio')
-        
-        if image_video_path and image_video_path.exists() and (en_audio_path or hi_audio_path):
+        state = page_states[page_dir]
+        if state.latest_path('image_video') and (state.latest_path('en_audio') or state.latest_path('hi_audio')):
             pages_ready_for_final.append(page_dir)
     
     if pages_ready_for_final:
@@ -975,6 +1140,7 @@ def render_video_generation_stage(pdf_stem: str):
     
     expected_version = get_expected_version_for_pdf(pdf_stem)
     
+    page_videos_status_ph = st.empty()
     col1, col2 = st.columns(2)
     
     with col1:
@@ -984,9 +1150,6 @@ def render_video_generation_stage(pdf_stem: str):
             use_container_width=True,
             disabled=(len(pages_ready_for_final) == 0)
         ):
-            from moviepy.editor import VideoFileClip, AudioFileClip
-            from utils.logger import log_user_action, log_file_operation
-            
             log_user_action("BATCH_GENERATE_EN_PAGE_VIDEOS", pdf_stem, {"pages": len(pages_ready_for_final), "version": expected_version})
             
             progress_bar = st.progress(0)
@@ -995,63 +1158,47 @@ def render_video_generation_stage(pdf_stem: str):
             success_count = 0
             fail_count = 0
             
-            for idx, page_dir in enumerate(pages_ready_for_final):
-                status_text.text(f"Processing {page_dir.name}... ({idx+1}/{len(pages_ready_for_final)})")
-                
-                image_video_path = get_latest_version_path(page_dir, 'image_video')
-                en_audio_path = get_latest_version_path(page_dir, 'en_audio')
+            # Collect (image_video, audio, output) jobs so ffmpeg can mux several pages per process
+            mux_jobs = []
+            job_pages = {}
+            for page_dir in pages_ready_for_final:
+                image_video_path = page_states[page_dir].latest_path('image_video')
+                en_audio_path = page_states[page_dir].latest_path('en_audio')
                 
-                if not en_audio_path or not en_audio_path.exists():
+                if not en_audio_path:
                     fail_count += 1
                     continue
                 
-                try:
-                    video_clip = VideoFileClip(str(image_video_path))
-                    audio_clip = AudioFileClip(str(en_audio_path))
-                    
-                    audio_duration = audio_clip.duration
-                    video_duration = video_clip.duration
-                    
-                    # Adjust video to match audio
-                    if video_duration < audio_duration:
-                        loops_needed = int(audio_duration / video_duration) + 1
-                        video_clip = concatenate_videoclips([video_clip] * loops_needed).subclip(0, audio_duration)
-                    elif video_duration > audio_duration:
-                        video_clip = video_clip.subclip(0, audio_duration)
-                    
-                    final_clip = video_clip.set_audio(audio_clip)
-                    
-                    en_video_path = page_dir / f'page_video_en_v{expected_version}.mp4'
-                    final_clip.write_videofile(
-                        str(en_video_path),
-                        fps=24,
-                        codec='libx264',
-                        audio_codec='aac',
-                        logger=None
-                    )
-                    
-                    final_clip.close()
-                    video_clip.close()
-                    audio_clip.close()
-                    
-                    log_file_operation(f"batch_gen_en_page_video_{page_dir.name}_v{expected_version}", page_dir, success=True)
+                en_video_path = page_dir / f'page_video_en_v{expected_version}.mp4'
+                job = (image_video_path, en_audio_path, en_video_path)
+                mux_jobs.append(job)
+                job_pages[job] = page_dir
+            
+            status_text.text(f"Muxing {len(mux_jobs)} page video(s)...")
+            log_records = []
+            for idx, (job, error) in enumerate(mux_page_videos(mux_jobs)):
+                page_dir = job_pages[job]
+                if error is None:
+                    log_records.append({"op": f"batch_gen_en_page_video_{page_dir.name}_v{expected_version}", "path": page_dir})
                     success_count += 1
-                
-                except Exception as e:
-                    st.warning(f"❌ Failed for {page_dir.name}: {str(e)}")
+                else:
+                    st.warning(f"❌ Failed for {page_dir.name}: {str(error)}")
                     fail_count += 1
                 
-                progress_bar.progress((idx + 1) / len(pages_ready_for_final))
+                if _should_update_progress(idx + 1, len(mux_jobs)):
+                    status_text.text(f"Processed {page_dir.name} ({idx+1}/{len(mux_jobs)})")
+                    progress_bar.progress((idx + 1) / len(mux_jobs))
             
             progress_bar.empty()
             status_text.empty()
+            log_file_operations_bulk(log_records)
             
-            if success_count > 0:
-                st.success(f"✅ Generated {success_count} EN page videos!")
-            if fail_count > 0:
-                st.warning(f"⚠️ {fail_count} videos failed")
-            
-            st.rerun()
+            _scan_all.clear()
+            with page_videos_status_ph.container():
+                if success_count > 0:
+                    st.success(f"✅ Generated {success_count} EN page videos!")
+                if fail_count > 0:
+                    st.warning(f"⚠️ {fail_count} videos failed")
     
     with col2:
         if st.button(
@@ -1060,9 +1207,6 @@ def render_video_generation_stage(pdf_stem: str):
             use_container_width=True,
             disabled=(len(pages_ready_for_final) == 0)
         ):
-            from moviepy.editor import VideoFileClip, AudioFileClip
-            from utils.logger import log_user_action, log_file_operation
-            
             log_user_action("BATCH_GENERATE_HI_PAGE_VIDEOS", pdf_stem, {"pages": len(pages_ready_for_final), "version": expected_version})
             
             progress_bar = st.progress(0)
@@ -1071,63 +1215,102 @@ def render_video_generation_stage(pdf_stem: str):
             success_count = 0
             fail_count = 0
             
-            for idx, page_dir in enumerate(pages_ready_for_final):
-                status_text.text(f"Processing {page_dir.name}... ({idx+1}/{len(pages_ready_for_final)})")
-                
-                image_video_path = get_latest_version_path(page_dir, 'image_video')
-                hi_audio_path = get_latest_version_path(page_dir, 'hi_audio')
+            # Collect (image_video, audio, output) jobs so ffmpeg can mux several pages per process
+            mux_jobs = []
+            job_pages = {}
+            for page_dir in pages_ready_for_final:
+                image_video_path = page_states[page_dir].latest_path('image_video')
+                hi_audio_path = page_states[page_dir].latest_path('hi_audio')
                 
-                if not hi_audio_path or not hi_audio_path.exists():
+                if not hi_audio_path:
                     fail_count += 1
                     continue
                 
-                try:
-                    video_clip = VideoFileClip(str(image_video_path))
-                    audio_clip = AudioFileClip(str(hi_audio_path))
-                    
-                    audio_duration = audio_clip.duration
-                    video_duration = video_clip.duration
-                    
-                    # Adjust video to match audio
-                    if video_duration < audio_duration:
-                        loops_needed = int(audio_duration / video_duration) + 1
-                        video_clip = concatenate_videoclips([video_clip] * loops_needed).subclip(0, audio_duration)
-                    elif video_duration > audio_duration:
-                        video_clip = video_clip.subclip(0, audio_duration)
-                    
-                    final_clip = video_clip.set_audio(audio_clip)
-                    
-                    hi_video_path = page_dir / f'page_video_hi_v{expected_version}.mp4'
-                    final_clip.write_videofile(
-                        str(hi_video_path),
-                        fps=24,
-                        codec='libx264',
-                        audio_codec='aac',
-                        logger=None
-                    )
-                    
-                    final_clip.close()
-                    video_clip.close()
-                    audio_clip.close()
-                    
-                    log_file_operation(f"batch_gen_hi_page_video_{page_dir.name}_v{expected_version}", page_dir, success=True)
+                hi_video_path = page_dir / f'page_video_hi_v{expected_version}.mp4'
+                job = (image_video_path, hi_audio_path, hi_video_path)
+                mux_jobs.append(job)
+                job_pages[job] = page_dir
+            
+            status_text.text(f"Muxing {len(mux_jobs)} page video(s)...")
+            log_records = []
+            for idx, (job, error) in enumerate(mux_page_videos(mux_jobs)):
+                page_dir = job_pages[job]
+                if error is None:
+                    log_records.append({"op": f"batch_gen_hi_page_video_{page_dir.name}_v{expected_version}", "path": page_dir})
                     success_count += 1
-                
-                except Exception as e:
-                    st.warning(f"❌ Failed for {page_dir.name}: {str(e)}")
+                else:
+                    st.warning(f"❌ Failed for {page_dir.name}: {str(error)}")
                     fail_count += 1
                 
-                progress_bar.progress((idx + 1) / len(pages_ready_for_final))
+                if _should_update_progress(idx + 1, len(mux_jobs)):
+                    status_text.text(f"Processed {page_dir.name} ({idx+1}/{len(mux_jobs)})")
+                    progress_bar.progress((idx + 1) / len(mux_jobs))
             
             progress_bar.empty()
             status_text.empty()
+            log_file_operations_bulk(log_records)
             
+            _scan_all.clear()
+            with page_videos_status_ph.container():
+                if success_count > 0:
+                    st.success(f"✅ Generated {success_count} HI page videos!")
+                if fail_count > 0:
+                    st.warning(f"⚠️ {fail_count} videos failed")
+    
+    if st.button(
+        f"🎬 Generate BOTH EN+HI Page Videos (v{expected_version})",
+        key=f"{pdf_stem}_batch_gen_both_page_videos",
+        use_container_width=True,
+        disabled=(len(pages_ready_for_final) == 0)
+    ):
+        log_user_action("BATCH_GENERATE_BOTH_PAGE_VIDEOS", pdf_stem, {"pages": len(pages_ready_for_final), "version": expected_version})
+        
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        success_count = 0
+        fail_count = 0
+        
+        # One job per page: the image video is read once and feeds both language outputs
+        shared_jobs = []
+        job_pages = {}
+        for page_dir in pages_ready_for_final:
+            state = page_states[page_dir]
+            outputs = []
+            for lang in ('en', 'hi'):
+                audio_path = state.latest_path(f'{lang}_audio')
+                if audio_path:
+                    outputs.append((audio_path, page_dir / f'page_video_{lang}_v{expected_version}.mp4'))
+            job = (state.latest_path('image_video'), tuple(outputs))
+            shared_jobs.append(job)
+            job_pages[job] = page_dir
+        
+        status_text.text(f"Muxing EN+HI videos for {len(shared_jobs)} page(s)...")
+        log_records = []
+        for idx, (job, results) in enumerate(mux_shared_video_pages(shared_jobs)):
+            page_dir = job_pages[job]
+            for output_path, error in results:
+                if error is None:
+                    log_records.append({"op": f"batch_gen_{output_path.stem}_{page_dir.name}", "path": page_dir})
+                    success_count += 1
+                else:
+                    st.warning(f"❌ Failed for {page_dir.name} ({output_path.name}): {str(error)}")
+                    fail_count += 1
+            
+            if _should_update_progress(idx + 1, len(shared_jobs)):
+                status_text.text(f"Processed {page_dir.name} ({idx+1}/{len(shared_jobs)})")
+                progress_bar.progress((idx + 1) / len(shared_jobs))
+        
+        progress_bar.empty()
+        status_text.empty()
+        log_file_operations_bulk(log_records)
+        
+        _scan_all.clear()
+        with page_videos_status_ph.container():
             if success_count > 0:
-                st.success(f"✅ Generated {success_count} HI page videos!")
+                st.success(f"✅ Generated {success_count} EN+HI page videos!")
             if fail_count > 0:
                 st.warning(f"⚠️ {fail_count} videos failed")
-            
-            st.rerun()
     
     st.divider()
     
@@ -1143,9 +1326,6 @@ def render_video_generation_stage(pdf_stem: str):
             key=f"{pdf_stem}_batch_ff_en_text",
             use_container_width=True
         ):
-            from utils.versioning import fast_forward_version
-            from utils.logger import log_user_action
-            
             log_user_action("BATCH_FAST_FORWARD_EN_TEXT", pdf_stem, {"pages": len(page_dirs), "to_version": expected_version})
             
             success_count = 0
@@ -1161,9 +1341,6 @@ def render_video_generation_stage(pdf_stem: str):
             key=f"{pdf_stem}_batch_ff_hi_text",
             use_container_width=True
         ):
-            from utils.versioning import fast_forward_version
-            from utils.logger import log_user_action
-            
             log_user_action("BATCH_FAST_FORWARD_HI_TEXT", pdf_stem, {"pages": len(page_dirs), "to_version": expected_version})
             
             success_count = 0
@@ -1180,9 +1357,6 @@ def render_video_generation_stage(pdf_stem: str):
             key=f"{pdf_stem}_batch_ff_en_audio",
             use_container_width=True
         ):
-            from utils.versioning import fast_forward_version
-            from utils.logger import log_user_action
-            
             log_user_action("BATCH_FAST_FORWARD_EN_AUDIO", pdf_stem, {"pages": len(page_dirs), "to_version": expected_version})
             
             success_count = 0
@@ -1198,9 +1372,6 @@ def render_video_generation_stage(pdf_stem: str):
             key=f"{pdf_stem}_batch_ff_hi_audio",
             use_container_width=True
         ):
-            from utils.versioning import fast_forward_version
-            from utils.logger import log_user_action
-            
             log_user_action("BATCH_FAST_FORWARD_HI_AUDIO", pdf_stem, {"pages": len(page_dirs), "to_version": expected_version})
             
             success_count = 0
@@ -1217,9 +1388,6 @@ def render_video_generation_stage(pdf_stem: str):
             key=f"{pdf_stem}_batch_ff_en_video",
             use_container_width=True
         ):
-            from utils.versioning import fast_forward_version
-            from utils.logger import log_user_action
-            
             log_user_action("BATCH_FAST_FORWARD_EN_VIDEO", pdf_stem, {"pages": len(page_dirs), "to_version": expected_version})
             
             success_count = 0
@@ -1235,9 +1403,6 @@ def render_video_generation_stage(pdf_stem: str):
             key=f"{pdf_stem}_batch_ff_hi_video",
             use_container_width=True
         ):
-            from utils.versioning import fast_forward_version
-            from utils.logger import log_user_action
-            
             log_user_action("BATCH_FAST_FORWARD_HI_VIDEO", pdf_stem, {"pages": len(page_dirs), "to_version": expected_version})
             
             success_count = 0
@@ -1256,36 +1421,31 @@ def render_video_generation_stage(pdf_stem: str):
         use_container_width=True,
         type="primary"
     ):
-        from utils.versioning import fast_forward_version
-        from utils.logger import log_user_action
-        
         log_user_action("BATCH_FAST_FORWARD_ALL", pdf_stem, {"pages": len(page_dirs), "to_version": expected_version})
         
-        total_ff = 0
-        for page_dir in page_dirs:
-            for content_type in ['en_text', 'hi_text', 'en_audio', 'hi_audio', 'en_video', 'hi_video', 'image_video']:
-                if fast_forward_version(page_dir, content_type, expected_version):
-                    total_ff += 1
+        total_ff = sum(bulk_fast_forward(page_dir, expected_version) for page_dir in page_dirs)
         
         st.success(f"✅ Fast forwarded {total_ff} items across all pages to v{expected_version}")
         st.rerun()
 
 
+# Content types whose version counts define a PDF's expected version
+EXPECTED_VERSION_TYPES = ('en_text', 'hi_text', 'en_audio', 'hi_audio', 'en_video', 'hi_video', 'image_video')
+
+
 def get_expected_version_for_pdf(pdf_stem: str) -> int:
-    """Get the expected version number for a PDF based on the highest version across all pages."""
-    from utils.versioning import get_version_count
-    page_dirs = get_page_directories(pdf_stem)
+    """
+    Get the expected version number for a PDF based on the highest version across all pages.
+    
+    Reads the version counts from the cached page scan, so reruns only re-read
+    versions.json for pages whose directory changed.
+    """
+    page_states = _get_page_states(pdf_stem, _cached_page_dirs(pdf_stem))
     
     max_version = 1
-    for page_dir in page_dirs:
-        for content_type in ['en_text', 'hi_text', 'en_audio', 'hi_audio', 'en_video', 'hi_video', 'image_video']:
-            try:
-                version = get_version_count(page_dir, content_type)
-                if version > max_version:
-                    max_version = version
-            except (KeyError, FileNotFoundError):
-                # Content type doesn't exist yet, skip it
-                continue
+    for state in page_states.values():
+        for content_type in EXPECTED_VERSION_TYPES:
+            max_version = max(max_version, state.version_counts.get(content_type, 0))
     
     return max_version
 
@@ -1294,142 +1454,191 @@ def get_expected_version_for_pdf(pdf_stem: str) -> int:
 # STAGE 6: SLIDESHOW CREATION
 # ============================================================================
 
-def resize_image(image_path: Path, target_size: tuple):
-    """Resize an image to target size."""
+def resize_image_cached(image_path: Path, target_size: tuple) -> Path:
+    """
+    Return a copy of image_path resized to target_size.
+    
+    The resized copy lives in page_dir/.cache/ and is only regenerated when the
+    source image is newer, so the source asset is never rewritten and repeated
+    slideshow builds skip the resize entirely.
+    """
+    width, height = target_size
+    cache_path = image_path.parent / '.cache' / f'{image_path.stem}_{width}x{height}.png'
     try:
+        if cache_path.exists() and cache_path.stat().st_mtime >= image_path.stat().st_mtime:
+            return cache_path
         with Image.open(image_path) as img:
-            if img.size != target_size:
-                resized_img = img.resize(target_size, Image.Resampling.LANCZOS)
-                resized_img.save(image_path)
+            if img.size == target_size:
+                return image_path
+            # LANCZOS' wide kernel only pays off for large scale changes
+            scale = max(img.size[0] / width, img.size[1] / height)
+            resample = Image.Resampling.BILINEAR if 1 / 1.5 <= scale <= 1.5 else Image.Resampling.LANCZOS
+            resized_img = img.resize(target_size, resample)
+            cache_path.parent.mkdir(exist_ok=True)
+            # Unique temp name: the EN and HI slideshows resize the same image concurrently,
+            # and neither may see a half-written cache file
+            tmp_path = cache_path.with_name(f'{cache_path.stem}.{threading.get_ident()}.tmp.png')
+            try:
+                resized_img.save(tmp_path, optimize=False, compress_level=1)
+                tmp_path.replace(cache_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+        return cache_path
     except Exception as e:
         st.error(f"Failed to resize {image_path.name}: {e}")
+        return image_path
 
 
 def concatenate_page_videos(page_dirs, language: str, expected_version: int, output_path: Path):
     """Concatenate page videos (animated video + audio) into final slideshow."""
-    from moviepy.editor import VideoFileClip
-    
-    clips = []
-    FPS = 24
-    
+    video_paths = []
     for page_dir in page_dirs:
         video_path = page_dir / f'page_video_{language}_v{expected_version}.mp4'
         
         if not video_path.exists():
             st.warning(f"⚠️ Missing: {video_path.name}")
             continue
-        
-        try:
-            video_clip = VideoFileClip(str(video_path))
-            clips.append(video_clip)
-        except Exception as e:
-            st.warning(f"Failed to load {page_dir.name}: {e}")
-            continue
+        video_paths.append(video_path)
     
-    if not clips:
+    if not video_paths:
         raise ValueError(f"No valid {language.upper()} page videos found to concatenate")
     
-    # Concatenate all page videos
-    final = concatenate_videoclips(clips, method="compose")
-    final.write_videofile(
-        str(output_path),
-        fps=FPS,
-        codec="libx264",
-        audio_codec="aac",
-        threads=4,
-        logger=None
-    )
-    
-    # Cleanup
-    for clip in clips:
+    # Page videos come out of the same mux step, so normally they can be
+    # joined packet-for-packet without decoding anything
+    if can_concat_copy(video_paths):
         try:
-            clip.close()
-        except:
-            pass
+            concat_videos(video_paths, output_path)
+            return
+        except Exception as e:
+            logger.warning(f"Concat stream copy failed, re-encoding: {e}")
     
-    try:
-        final.close()
-    except:
-        pass
+    concat_videos(video_paths, output_path, copy_streams=False, high_quality=SLIDESHOW_HIGH_QUALITY)
 
 
 def build_slideshow(page_dirs, audio_filename: str, output_path: Path):
-    """Build a slideshow video from pages (legacy method: static images + audio)."""
-    from utils.versioning import get_latest_version_path
+    """
+    Build a slideshow video from pages (legacy method: static images + audio).
     
-    clips = []
+    Each slide is encoded to its own short segment and the segments are joined
+    with the concat demuxer, so memory use doesn't grow with the page count.
+    """
     TARGET_SIZE = (994, 1935)
-    FPS = 24
-    
-    for page_dir in page_dirs:
-        img_path = page_dir / 'image_to_use.png'
-        
-        # Try to get versioned audio first, fallback to legacy
-        if 'en' in audio_filename:
-            aud_path = get_latest_version_path(page_dir, 'en_audio') or page_dir / audio_filename
-        else:
-            aud_path = get_latest_version_path(page_dir, 'hi_audio') or page_dir / audio_filename
-        
-        if not img_path.exists():
-            continue
-        
-        # Resize image
-        resize_image(img_path, TARGET_SIZE)
+    DEFAULT_DURATION = 3
+    
+    # Resize every slide up front; Pillow releases the GIL while resampling and encoding
+    source_images = [p / 'image_to_use.png' for p in page_dirs if (p / 'image_to_use.png').exists()]
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+        resized_images = dict(zip(
+            source_images,
+            executor.map(lambda path: resize_image_cached(path, TARGET_SIZE), source_images)
+        ))
+    
+    with tempfile.TemporaryDirectory(prefix='slideshow_', dir=output_path.parent) as tmp_dir:
+        segments = []
+        for page_dir in page_dirs:
+            img_path = page_dir / 'image_to_use.png'
+            
+            # Try to get versioned audio first, fallback to legacy
+            if 'en' in audio_filename:
+                aud_path = get_latest_version_path(page_dir, 'en_audio') or page_dir / audio_filename
+            else:
+                aud_path = get_latest_version_path(page_dir, 'hi_audio') or page_dir / audio_filename
+            
+            if img_path not in resized_images:
+                continue
+            
+            has_audio = aud_path.exists() and aud_path.stat().st_size > 0
+            segment_path = Path(tmp_dir) / f'slide_{len(segments):04d}.mp4'
+            try:
+                try:
+                    encode_image_segment(
+                        resized_images[img_path], aud_path if has_audio else None, segment_path,
+                        TARGET_SIZE, duration=DEFAULT_DURATION, high_quality=SLIDESHOW_HIGH_QUALITY
+                    )
+                except Exception:
+                    if not has_audio:
+                        raise
+                    # Unreadable audio: keep the slide, silent, at the default duration
+                    encode_image_segment(
+                        resized_images[img_path], None, segment_path,
+                        TARGET_SIZE, duration=DEFAULT_DURATION, high_quality=SLIDESHOW_HIGH_QUALITY
+                    )
+                segments.append(segment_path)
+            except Exception as e:
+                st.warning(f"Failed to process {page_dir.name}: {e}")
+                continue
         
-        # Get duration from audio
-        duration = 3  # default
-        audio_clip = None
+        if not segments:
+            raise ValueError("No valid clips to create slideshow")
         
-        if aud_path and aud_path.exists() and aud_path.stat().st_size > 0:
+        # Every segment was encoded with the same settings, so they join without re-encoding
+        concat_videos(segments, output_path)
+
+
+def _slideshow_scan(page_states: Dict[Path, PageState], expected_version: int) -> Dict:
+    """Count page videos at expected_version and check for legacy audio using the cached page scan."""
+    en_name = f'page_video_en_v{expected_version}.mp4'
+    hi_name = f'page_video_hi_v{expected_version}.mp4'
+    return {
+        'en_count': sum(1 for state in page_states.values() if en_name in state.entries),
+        'hi_count': sum(1 for state in page_states.values() if hi_name in state.entries),
+        'has_audio': any(
+            'final_text_en.mp3' in state.entries or state.latest_path('en_audio')
+            for state in page_states.values()
+        ),
+    }
+
+
+def _create_slideshows(extraction_dir: Path, page_dirs, expected_version: int, has_page_videos_en: bool, has_page_videos_hi: bool):
+    """
+    Build the English and Hindi slideshows concurrently.
+    
+    Each encode runs on a worker thread (the heavy lifting happens in ffmpeg
+    subprocesses), so the script thread stays free to report each slideshow
+    as soon as it finishes.
+    """
+    en_output = extraction_dir / 'english_slideshow.mp4'
+    hi_output = extraction_dir / 'hindi_slideshow.mp4'
+    
+    # Use page videos if available, otherwise fallback to static images + audio
+    jobs = []
+    if has_page_videos_en or has_page_videos_hi:
+        st.info("🎬 Using animated page videos (Step 5)")
+        if has_page_videos_en:
+            jobs.append(("English", en_output, functools.partial(concatenate_page_videos, page_dirs, 'en', expected_version, en_output)))
+        if has_page_videos_hi:
+            jobs.append(("Hindi", hi_output, functools.partial(concatenate_page_videos, page_dirs, 'hi', expected_version, hi_output)))
+    else:
+        st.info("📷 Using static images + audio (legacy method)")
+        jobs.append(("English", en_output, functools.partial(build_slideshow, page_dirs, 'final_text_en.mp3', en_output)))
+        jobs.append(("Hindi", hi_output, functools.partial(build_slideshow, page_dirs, 'final_text_hi.mp3', hi_output)))
+    
+    progress_bar = st.progress(0)
+    # Workers share this script run's context so their st.warning calls still render
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=len(jobs), initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+        futures = {executor.submit(build): (label, output) for label, output, build in jobs}
+        for idx, future in enumerate(as_completed(futures)):
+            label, output = futures[future]
             try:
-                audio_clip = AudioFileClip(str(aud_path))
-                duration = audio_clip.duration
-            except Exception:
-                pass
-        
-        # Create clip
-        try:
-            img_clip = ImageClip(str(img_path)).set_duration(duration)
-            if audio_clip:
-                img_clip = img_clip.set_audio(audio_clip)
-            img_clip = img_clip.set_fps(FPS)
-            clips.append(img_clip)
-        except Exception as e:
-            st.warning(f"Failed to process {page_dir.name}: {e}")
-            continue
-    
-    if not clips:
-        raise ValueError("No valid clips to create slideshow")
-    
-    # Concatenate and write
-    final = concatenate_videoclips(clips, method="compose")
-    final.write_videofile(
-        str(output_path),
-        fps=FPS,
-        codec="libx264",
-        audio_codec="aac",
-        threads=2,
-        temp_audiofile=str(output_path.with_suffix('.temp-audio.m4a')),
-        remove_temp=True,
-    )
-    
-    # Cleanup
-    for clip in clips:
-        try:
-            clip.close()
-        except:
-            pass
+                future.result()
+                st.success(f"✅ {label} slideshow created: {output.name}")
+            except Exception as e:
+                st.error(f"❌ Failed to create {label} slideshow: {e}")
+            progress_bar.progress((idx + 1) / len(futures))
+    progress_bar.empty()
 
 
 def render_slideshow_stage(pdf_stem: str):
     """Render the slideshow creation stage UI."""
-    from utils.versioning import get_latest_version_path
     
     st.subheader("Step 6: Create Slideshow")
     st.write("Build final English and Hindi video slideshows")
     
     extraction_dir = get_extraction_dir(pdf_stem)
-    page_dirs = get_page_directories(pdf_stem)
+    page_dirs = _cached_page_dirs(pdf_stem)
     
     if not page_dirs:
         st.info("ℹ️ Complete Step 1 (Extract Content) first")
@@ -1437,15 +1646,12 @@ def render_slideshow_stage(pdf_stem: str):
     
     # Check if page videos exist (preferred method)
     expected_version = get_expected_version_for_pdf(pdf_stem)
-    has_page_videos_en = any((p / f'page_video_en_v{expected_version}.mp4').exists() for p in page_dirs)
-    has_page_videos_hi = any((p / f'page_video_hi_v{expected_version}.mp4').exists() for p in page_dirs)
+    scan = _slideshow_scan(_get_page_states(pdf_stem, page_dirs), expected_version)
+    has_page_videos_en = scan['en_count'] > 0
+    has_page_videos_hi = scan['hi_count'] > 0
     
     # Fallback: check if any page has audio (for legacy static image slideshows)
-    has_audio = any(
-        (p / 'final_text_en.mp3').exists() or 
-        get_latest_version_path(p, 'en_audio')
-        for p in page_dirs
-    )
+    has_audio = scan['has_audio']
     
     if not has_page_videos_en and not has_page_videos_hi and not has_audio:
         st.info("ℹ️ Complete Step 5 (Generate Videos) first")
@@ -1455,9 +1661,9 @@ def render_slideshow_stage(pdf_stem: str):
     if has_page_videos_en or has_page_videos_hi:
         st.success("✅ Ready to concatenate **animated page videos** (Step 5)")
         if has_page_videos_en:
-            st.caption(f"🎬 English: {sum(1 for p in page_dirs if (p / f'page_video_en_v{expected_version}.mp4').exists())} page videos found")
+            st.caption(f"🎬 English: {scan['en_count']} page videos found")
         if has_page_videos_hi:
-            st.caption(f"🎬 Hindi: {sum(1 for p in page_dirs if (p / f'page_video_hi_v{expected_version}.mp4').exists())} page videos found")
+            st.caption(f"🎬 Hindi: {scan['hi_count']} page videos found")
     else:
         st.warning("⚠️ Will use **static images + audio** (legacy method)")
         st.caption("Tip: Complete Step 5 to create animated page videos for better results")
@@ -1476,37 +1682,7 @@ def render_slideshow_stage(pdf_stem: str):
         col1, col2 = st.columns(2)
         if col1.button("✅ Confirm Create", key=f"{pdf_stem}_confirm_slideshow_btn", use_container_width=True):
             with st.spinner("Creating slideshows... This may take several minutes."):
-                try:
-                    # Use page videos if available, otherwise fallback to static images + audio
-                    if has_page_videos_en or has_page_videos_hi:
-                        st.info("🎬 Using animated page videos (Step 5)")
-                        
-                        # English slideshow from page videos
-                        if has_page_videos_en:
-                            en_output = extraction_dir / 'english_slideshow.mp4'
-                            concatenate_page_videos(page_dirs, 'en', expected_version, en_output)
-                            st.success(f"✅ English slideshow created: {en_output.name}")
-                        
-                        # Hindi slideshow from page videos
-                        if has_page_videos_hi:
-                            hi_output = extraction_dir / 'hindi_slideshow.mp4'
-                            concatenate_page_videos(page_dirs, 'hi', expected_version, hi_output)
-                            st.success(f"✅ Hindi slideshow created: {hi_output.name}")
-                    else:
-                        st.info("📷 Using static images + audio (legacy method)")
-                        
-                        # English slideshow (legacy)
-                        en_output = extraction_dir / 'english_slideshow.mp4'
-                        build_slideshow(page_dirs, 'final_text_en.mp3', en_output)
-                        st.success(f"✅ English slideshow created: {en_output.name}")
-                        
-                        # Hindi slideshow (legacy)
-                        hi_output = extraction_dir / 'hindi_slideshow.mp4'
-                        build_slideshow(page_dirs, 'final_text_hi.mp3', hi_output)
-                        st.success(f"✅ Hindi slideshow created: {hi_output.name}")
-                    
-                except Exception as e:
-                    st.error(f"❌ Failed to create slideshow: {e}")
+                _create_slideshows(extraction_dir, page_dirs, expected_version, has_page_videos_en, has_page_videos_hi)
             
             st.session_state[confirm_key] = False
             st.rerun()
@@ -1523,35 +1699,5 @@ def render_slideshow_stage(pdf_stem: str):
                 st.rerun()
             else:
                 with st.spinner("Creating slideshows... This may take several minutes."):
-                    try:
-                        # Use page videos if available, otherwise fallback to static images + audio
-                        if has_page_videos_en or has_page_videos_hi:
-                            st.info("🎬 Using animated page videos (Step 5)")
-                            
-                            # English slideshow from page videos
-                            if has_page_videos_en:
-                                en_output = extraction_dir / 'english_slideshow.mp4'
-                                concatenate_page_videos(page_dirs, 'en', expected_version, en_output)
-                                st.success(f"✅ English slideshow created")
-                            
-                            # Hindi slideshow from page videos
-                            if has_page_videos_hi:
-                                hi_output = extraction_dir / 'hindi_slideshow.mp4'
-                                concatenate_page_videos(page_dirs, 'hi', expected_version, hi_output)
-                                st.success(f"✅ Hindi slideshow created")
-                        else:
-                            st.info("📷 Using static images + audio (legacy method)")
-                            
-                            # English slideshow (legacy)
-                            en_output = extraction_dir / 'english_slideshow.mp4'
-                            build_slideshow(page_dirs, 'final_text_en.mp3', en_output)
-                            st.success(f"✅ English slideshow created")
-                            
-                            # Hindi slideshow (legacy)
-                            hi_output = extraction_dir / 'hindi_slideshow.mp4'
-                            build_slideshow(page_dirs, 'final_text_hi.mp3', hi_output)
-                            st.success(f"✅ Hindi slideshow created")
-                        
-                    except Exception as e:
-                        st.error(f"❌ Failed to create slideshow: {e}")
+                    _create_slideshows(extraction_dir, page_dirs, expected_version, has_page_videos_en, has_page_videos_hi)
                 st.rerun()
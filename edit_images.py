@@ -4,11 +4,215 @@ Image Editing with Replicate API
 Edit images using qwen/qwen-image-edit-plus model.
 """
 
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
 import os
+import shutil
+import threading
+import time
 import replicate
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from typing import Optional, List
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.retry import retry_with_backoff, async_retry_with_backoff
+
+
+# Maximum Replicate predictions in flight for batch edits
+EDIT_CONCURRENCY = 8
+
+# Shared session so result downloads reuse pooled keep-alive connections
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
+# Read size for streamed result downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Replicate model used for all edits
+EDIT_MODEL = "qwen/qwen-image-edit-plus"
+
+# Successful edits are cached here by input hash; set VEDIC_DISABLE_CACHE=1 to bypass
+EDIT_CACHE_DIR = Path(os.getenv('VEDIC_EDIT_CACHE_DIR', '~/.cache/vedic_edits')).expanduser()
+
+
+@functools.lru_cache(maxsize=512)
+def _file_sha256_cached(path_str: str, mtime_ns: int, size: int) -> str:
+    """Hex SHA-256 of a file, read in chunks; mtime_ns and size only key the cache."""
+    digest = hashlib.sha256()
+    with open(path_str, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_sha256(path: Path) -> str:
+    """Hex SHA-256 of a file, re-read only when the file changes."""
+    stat = os.stat(path)
+    return _file_sha256_cached(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+# Replicate file URLs by content hash, so repeated images are uploaded once while their URL is live.
+# Values are (url, expiry as a Unix timestamp); Replicate file URLs expire
+_UPLOADED_URLS = {}
+_UPLOADED_URLS_LOCK = threading.Lock()
+
+# Re-upload when a remembered URL has less than this many seconds left
+UPLOAD_EXPIRY_MARGIN = 600
+
+# Lifetime assumed for uploads whose expiry Replicate doesn't report
+UPLOAD_DEFAULT_TTL = 3600
+
+
+def _upload_expiry(uploaded) -> float:
+    """Unix timestamp at which an uploaded file's URL stops working."""
+    expires_at = getattr(uploaded, 'expires_at', None)
+    if expires_at:
+        try:
+            return datetime.fromisoformat(str(expires_at).replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return time.time() + UPLOAD_DEFAULT_TTL
+
+
+def _upload_once(path: Path) -> str:
+    """Upload an image to Replicate's file API (once per content hash while the URL is live) and return its URL."""
+    digest = _file_sha256(path)
+    with _UPLOADED_URLS_LOCK:
+        entry = _UPLOADED_URLS.get(digest)
+    if entry and entry[1] - time.time() > UPLOAD_EXPIRY_MARGIN:
+        return entry[0]
+    
+    with open(path, 'rb') as f:
+        def attempt():
+            f.seek(0)
+            return replicate.files.create(f)
+        uploaded = retry_with_backoff(attempt)
+    
+    url = uploaded.urls['get']
+    with _UPLOADED_URLS_LOCK:
+        _UPLOADED_URLS[digest] = (url, _upload_expiry(uploaded))
+    return url
+
+
+def _edit_cache_path(image_path: Path, reference_images: Optional[List[Path]], **params) -> Optional[Path]:
+    """Cache file for an edit request, or None if caching is disabled."""
+    if os.getenv('VEDIC_DISABLE_CACHE') == '1':
+        return None
+    key_data = {
+        "image": _file_sha256(image_path),
+        "references": [_file_sha256(ref) for ref in reference_images or []],
+        **params,
+    }
+    key = hashlib.sha256(json.dumps(key_data, sort_keys=True).encode('utf-8')).hexdigest()
+    return EDIT_CACHE_DIR / f"{key}.{params['output_format']}"
+
+
+def _build_input_data(
+    image_files: list,
+    prompt: str,
+    go_fast: bool,
+    aspect_ratio: str,
+    output_format: str,
+    output_quality: int,
+    seed: Optional[int]
+) -> dict:
+    """Build the qwen-image-edit-plus input from _image_inputs() results."""
+    input_data = {
+        "image": image_files,
+        "prompt": prompt,
+        "go_fast": go_fast,
+        "aspect_ratio": aspect_ratio,
+        "output_format": output_format,
+        "output_quality": output_quality,
+    }
+    
+    if seed is not None:
+        input_data["seed"] = seed
+    
+    return input_data
+
+
+def _image_inputs(stack: contextlib.ExitStack, image_path: Path, reference_images: Optional[List[Path]]) -> list:
+    """
+    Model inputs for the image and any reference images (main image first).
+    
+    Prefers pre-uploaded Replicate URLs so images repeated across edits are sent
+    once; falls back to file handles, kept open until stack exits.
+    """
+    paths = [image_path, *(reference_images or [])]
+    try:
+        return [_upload_once(path) for path in paths]
+    except Exception as e:
+        print(f"Warning: could not pre-upload images, sending them inline: {str(e)}")
+        return [stack.enter_context(open(path, 'rb')) for path in paths]
+
+
+def _rewind_images(input_data: dict):
+    """Seek the input image handles back to the start so a retried upload sends the whole file."""
+    for image_file in input_data["image"]:
+        if hasattr(image_file, 'seek'):
+            image_file.seek(0)
+
+
+def _run_replicate(input_data: dict):
+    """Run the edit model, retrying rate limits and transient server/network errors."""
+    def attempt():
+        _rewind_images(input_data)
+        return replicate.run(EDIT_MODEL, input=input_data)
+    
+    return retry_with_backoff(attempt)
+
+
+async def _run_replicate_async(input_data: dict):
+    """Async counterpart of _run_replicate."""
+    async def attempt():
+        _rewind_images(input_data)
+        return await replicate.async_run(EDIT_MODEL, input=input_data)
+    
+    return await async_retry_with_backoff(attempt)
+
+
+def _first_output_url(output) -> Optional[str]:
+    """URL of the first image in a Replicate output, or None if there is none."""
+    if not output:
+        return None
+    
+    # Take only the first item; any further outputs are never requested
+    first_output = next(iter(output), None)
+    if first_output is None:
+        return None
+    
+    # Get URL - handle both string URLs and FileOutput objects
+    if isinstance(first_output, str):
+        return first_output
+    if hasattr(first_output, 'url'):
+        return first_output.url if isinstance(first_output.url, str) else first_output.url()
+    return str(first_output)
+
+
+def _save_output(url: str, output_path: Path, cache_path: Optional[Path]):
+    """Download the edited image to output_path and store a copy in the edit cache."""
+    # Stream to disk so memory use is bounded by the chunk size, not the image size
+    with _HTTP.get(url, stream=True) as response:
+        response.raise_for_status()
+        with open(output_path, 'wb') as out_f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                out_f.write(chunk)
+    
+    if cache_path:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_cache = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(output_path, tmp_cache)
+            tmp_cache.replace(cache_path)
+        except OSError as e:
+            print(f"Warning: could not cache edited image: {str(e)}")
 
 
 def edit_image_with_prompt(
@@ -45,59 +249,86 @@ def edit_image_with_prompt(
         if not api_token:
             raise ValueError("REPLICATE_API_TOKEN not found in environment")
         
-        # Build input - open image as file handle
-        with open(image_path, 'rb') as f:
-            # Build input
-            input_data = {
-                "image": [f],
-                "prompt": prompt,
-                "go_fast": go_fast,
-                "aspect_ratio": aspect_ratio,
-                "output_format": output_format,
-                "output_quality": output_quality,
-            }
-            
-            if seed is not None:
-                input_data["seed"] = seed
-            
-            # Add reference images if provided
-            if reference_images:
-                for ref_img in reference_images:
-                    with open(ref_img, 'rb') as ref_f:
-                        input_data["image"].append(ref_f)
-            
-            # Run the model using replicate.run() directly
-            output = replicate.run(
-                "qwen/qwen-image-edit-plus",
-                input=input_data
+        # Identical inputs were already edited successfully: reuse that result
+        cache_path = _edit_cache_path(
+            image_path, reference_images,
+            prompt=prompt, go_fast=go_fast, aspect_ratio=aspect_ratio,
+            output_format=output_format, output_quality=output_quality, seed=seed
+        )
+        if cache_path and cache_path.exists():
+            shutil.copyfile(cache_path, output_path)
+            return True
+        
+        # Build input - uploaded URLs, or handles that stay open until the upload is done
+        with contextlib.ExitStack() as stack:
+            input_data = _build_input_data(
+                _image_inputs(stack, image_path, reference_images),
+                prompt, go_fast, aspect_ratio, output_format, output_quality, seed
             )
+            
+            # Run the model (cache hits above never reach the retry loop)
+            output = _run_replicate(input_data)
         
         # Download the first output image
-        # Convert output to list if it's an iterator
-        output_list = list(output) if output else []
+        url = _first_output_url(output)
+        if not url:
+            return False
         
-        if output_list and len(output_list) > 0:
-            # Get URL - handle both string URLs and FileOutput objects
-            first_output = output_list[0]
-            if isinstance(first_output, str):
-                url = first_output
-            elif hasattr(first_output, 'url'):
-                url = first_output.url if isinstance(first_output.url, str) else first_output.url()
-            else:
-                url = str(first_output)
-            
-            # Download the image
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            # Save to output path
-            with open(output_path, 'wb') as out_f:
-                out_f.write(response.content)
-            
+        _save_output(url, output_path, cache_path)
+        return True
+                
+    except Exception as e:
+        print(f"Error editing image: {str(e)}")
+        return False
+
+
+async def edit_image_with_prompt_async(
+    image_path: Path,
+    prompt: str,
+    output_path: Path,
+    reference_images: Optional[List[Path]] = None,
+    go_fast: bool = True,
+    aspect_ratio: str = "match_input_image",
+    output_format: str = "png",
+    output_quality: int = 95,
+    seed: Optional[int] = None
+) -> bool:
+    """
+    Async variant of edit_image_with_prompt.
+    
+    The prediction is awaited with replicate.async_run, so many edits can be
+    outstanding on one event loop; hashing and the download run in worker
+    threads. Takes the same arguments and returns the same result.
+    """
+    try:
+        # Verify API token
+        api_token = os.getenv('REPLICATE_API_TOKEN')
+        if not api_token:
+            raise ValueError("REPLICATE_API_TOKEN not found in environment")
+        
+        cache_path = await asyncio.to_thread(
+            _edit_cache_path, image_path, reference_images,
+            prompt=prompt, go_fast=go_fast, aspect_ratio=aspect_ratio,
+            output_format=output_format, output_quality=output_quality, seed=seed
+        )
+        if cache_path and cache_path.exists():
+            await asyncio.to_thread(shutil.copyfile, cache_path, output_path)
             return True
-        else:
+        
+        with contextlib.ExitStack() as stack:
+            image_inputs = await asyncio.to_thread(_image_inputs, stack, image_path, reference_images)
+            input_data = _build_input_data(
+                image_inputs, prompt, go_fast, aspect_ratio, output_format, output_quality, seed
+            )
+            output = await _run_replicate_async(input_data)
+        
+        url = _first_output_url(output)
+        if not url:
             return False
-                
+        
+        await asyncio.to_thread(_save_output, url, output_path, cache_path)
+        return True
+    
     except Exception as e:
         print(f"Error editing image: {str(e)}")
         return False
@@ -112,6 +343,9 @@ def batch_edit_images(
     """
     Edit multiple images with corresponding prompts.
     
+    Predictions run concurrently (up to EDIT_CONCURRENCY at a time) since each
+    call mostly waits on Replicate; results keep the input order.
+    
     Args:
         image_paths: List of image paths to edit
         prompts: List of prompts (one per image)
@@ -125,16 +359,18 @@ def batch_edit_images(
         raise ValueError("Number of images must match number of prompts")
     
     output_dir.mkdir(parents=True, exist_ok=True)
-    results = []
     
-    for i, (img_path, prompt) in enumerate(zip(image_paths, prompts)):
-        output_path = output_dir / f"edited_{i}_{img_path.name}"
-        success = edit_image_with_prompt(img_path, prompt, output_path, **kwargs)
-        
-        if success:
-            results.append(output_path)
+    jobs = [
+        (img_path, prompt, output_dir / f"edited_{i}_{img_path.name}")
+        for i, (img_path, prompt) in enumerate(zip(image_paths, prompts))
+    ]
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(EDIT_CONCURRENCY, len(jobs)))) as executor:
+        successes = list(executor.map(
+            lambda job: edit_image_with_prompt(job[0], job[1], job[2], **kwargs), jobs
+        ))
     
-    return results
+    return [output_path for (_, _, output_path), success in zip(jobs, successes) if success]
 
 
 def enhance_image(image_path: Path, output_path: Path, enhancement_type: str = "general") -> bool:
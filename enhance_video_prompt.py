@@ -6,56 +6,53 @@ Generate contextually-aware, simple video prompts optimized for children's story
 
 import os
 import time
+import functools
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 import google.generativeai as genai
 
+from utils.rate_limit import RateLimiter
+from utils.retry import retry_with_backoff
 
-def enhance_video_prompt(
-    caption: str,
-    page_text: Optional[str] = None,
-    whole_story: Optional[str] = None,
-    previous_pages: Optional[str] = None
-) -> str:
-    """
-    Enhance a video prompt using current page + story summary for context.
-    
-    Uses whole story summary for understanding context, but creates GENERIC
-    prompts without character names (video model doesn't recognize them).
-    
-    Args:
-        caption: Original AI-generated image caption
-        page_text: Current page text (used for audio) - PRIMARY SOURCE
-        whole_story: Whole story for context (summary created)
-        previous_pages: Not used (kept for API compatibility)
-    
-    Returns:
-        Generic, visually exciting video prompt optimized for kids' storybooks
-    """
-    try:
-        # Configure Gemini
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment")
-        
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        # STEP 1: Create story summary (if whole_story provided)
-        story_summary = None
-        if whole_story:
-            summary_prompt = f"""Provide a 2-sentence summary of this story focusing on the GENRE, SETTING, and MOOD (not characters):
 
-{whole_story[:1000]}
+# Maximum Gemini prompt-enhancement requests in flight during a batch
+ENHANCE_CONCURRENCY = 8
+
+# Threads used to preload captions and page texts before a batch
+PAGE_READ_WORKERS = 16
+
+# Gemini requests per minute across all threads (token bucket; retries count too)
+GEMINI_RPM = float(os.getenv('GEMINI_RPM', '60'))
+_GEMINI_LIMITER = RateLimiter(GEMINI_RPM, 60.0)
+
+# Pages enhanced per Gemini request; a batch that fails to parse is retried page by page
+PROMPT_BATCH_SIZE = 10
+
+# Pages whose caption + page text are at least this similar (word-count cosine)
+# reuse an earlier page's enhanced prompt; set above 1 to disable
+PROMPT_REUSE_THRESHOLD = float(os.getenv('VEDIC_PROMPT_REUSE_THRESHOLD', '0.93'))
+
+_WORD_RE = re.compile(r"\w+")
+
+# Markdown emphasis markers to drop from model output
+_MD_STRIP = re.compile(r"\*+")
+
+
+# Story summary request; {story} is the first 1000 chars of the story
+_SUMMARY_PROMPT_TMPL = """Provide a 2-sentence summary of this story focusing on the GENRE, SETTING, and MOOD (not characters):
+
+{story}
 
 Return ONLY 2 sentences describing the type of story, setting, and emotional tone."""
-            
-            summary_response = model.generate_content(summary_prompt)
-            if summary_response and summary_response.text:
-                story_summary = summary_response.text.strip()
-        
-        # STEP 2: Create enhanced prompt with strict guidelines
-        system_instruction = """You are an expert at creating GENERIC, VISUALLY EXCITING video motion prompts for children's storybook illustrations.
+
+# Strict guidelines sent ahead of every page
+_SYSTEM_INSTRUCTION = """You are an expert at creating GENERIC, VISUALLY EXCITING video motion prompts for children's storybook illustrations.
 
 CRITICAL RULES:
 1. DO NOT use character names or specific names - video models don't recognize them
@@ -80,20 +77,8 @@ GUIDELINES FOR VIDEO PROMPTS:
    
 USE GENERIC TERMS ONLY."""
 
-        # Build input
-        input_parts = [system_instruction, "\n\n"]
-        
-        if story_summary:
-            input_parts.append(f"**STORY CONTEXT (for mood/setting reference only):**\n{story_summary}\n\n")
-        
-        input_parts.append(f"**IMAGE CAPTION:**\n{caption}\n\n")
-        
-        if page_text:
-            input_parts.append(f"**CURRENT PAGE TEXT:**\n{page_text}\n\n")
-        else:
-            input_parts.append("**CURRENT PAGE TEXT:** Not available.\n\n")
-        
-        input_parts.append("""**TASK:**
+# What to do with the page context
+_TASK_RULES = """**TASK:**
 1. Check if the caption matches the page text
 2. Identify the key visual elements and action on this page
 3. Create a GENERIC, VISUALLY EXCITING video motion prompt (1 sentence, max 20 words)
@@ -106,22 +91,132 @@ USE GENERIC TERMS ONLY."""
 - Place names → "the kingdom", "the forest", "the mountain", "the castle"
 - Creature names → "the creature", "the beast", "the dragon", "the guardian"
 
-**OUTPUT FORMAT:**
-Return ONLY the enhanced video motion prompt as a single sentence. No names. No explanation.""")
+"""
+
+_TASK_INSTRUCTION = _TASK_RULES + """**OUTPUT FORMAT:**
+Return ONLY the enhanced video motion prompt as a single sentence. No names. No explanation."""
+
+# Batched variant: numbered pages in, JSON array of prompts out
+_BATCH_TASK_INSTRUCTION = _TASK_RULES.replace("on this page", "on each page") + """**OUTPUT FORMAT:**
+Apply the task to EACH numbered page independently. Return ONLY a JSON array of {count} strings:
+the enhanced video motion prompt for page 1, page 2, ... in order. Each prompt is a single sentence. No names. No explanation."""
+
+# Optional sections of the page prompt
+_STORY_CONTEXT_TMPL = "**STORY CONTEXT (for mood/setting reference only):**\n{summary}\n\n"
+_PAGE_TEXT_TMPL = "**CURRENT PAGE TEXT:**\n{page_text}\n\n"
+_NO_PAGE_TEXT = "**CURRENT PAGE TEXT:** Not available.\n\n"
+
+# Full page prompt, assembled once at import
+_PROMPT_TMPL = _SYSTEM_INSTRUCTION + "\n\n{context}**IMAGE CAPTION:**\n{caption}\n\n{page_section}" + _TASK_INSTRUCTION
+
+# One page inside a batched prompt
+_BATCH_PAGE_TMPL = "**PAGE {number}:**\n**IMAGE CAPTION:**\n{caption}\n\n{page_section}"
+
+# Full batched prompt; {pages} is the joined _BATCH_PAGE_TMPL sections
+_BATCH_PROMPT_TMPL = _SYSTEM_INSTRUCTION + "\n\n{context}{pages}" + _BATCH_TASK_INSTRUCTION
+
+# JSON code fence Gemini sometimes wraps around array output
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_model() -> genai.GenerativeModel:
+    """Configure Gemini and build the model once per process."""
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in environment")
+    
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel('gemini-2.0-flash')
+
+
+def _gen_gemini(model, prompt: str, **kwargs):
+    """Rate-limited generate_content with retries on rate limits and transient server/network errors."""
+    def attempt():
+        _GEMINI_LIMITER.acquire()
+        return model.generate_content(prompt, **kwargs)
+    
+    return retry_with_backoff(attempt)
+
+
+@functools.lru_cache(maxsize=8)
+def summarize_story(whole_story: str) -> Optional[str]:
+    """
+    Summarize a story's genre, setting and mood in 2 sentences.
+    
+    Memoized per story text, so a batch (and later reruns in the same process)
+    make a single Gemini call per story instead of one per page.
+    
+    Args:
+        whole_story: Whole story text (only the first 1000 chars are used)
+    
+    Returns:
+        Summary text, or None if Gemini returned nothing
+    """
+    model = _get_model()
+    
+    summary_response = _gen_gemini(model, _SUMMARY_PROMPT_TMPL.format(story=whole_story[:1000]))
+    if summary_response and summary_response.text:
+        return summary_response.text.strip()
+    return None
+
+
+def _clean_prompt(text: str) -> str:
+    """Strip markdown emphasis and surrounding quotes from a model-written prompt."""
+    # Clean up any markdown or extra formatting
+    cleaned = _MD_STRIP.sub('', text.strip())
+    # Remove one surrounding pair of quotes if present
+    for quote in ('"', "'"):
+        if len(cleaned) >= 2 and cleaned.startswith(quote) and cleaned.endswith(quote):
+            cleaned = cleaned[1:-1]
+    return cleaned
+
+
+def _page_section(page_text: Optional[str]) -> str:
+    """CURRENT PAGE TEXT section of a prompt."""
+    return _PAGE_TEXT_TMPL.format(page_text=page_text) if page_text else _NO_PAGE_TEXT
+
+
+def enhance_video_prompt(
+    caption: str,
+    page_text: Optional[str] = None,
+    whole_story: Optional[str] = None,
+    previous_pages: Optional[str] = None,
+    story_summary: Optional[str] = None
+) -> str:
+    """
+    Enhance a video prompt using current page + story summary for context.
+    
+    Uses whole story summary for understanding context, but creates GENERIC
+    prompts without character names (video model doesn't recognize them).
+    
+    Args:
+        caption: Original AI-generated image caption
+        page_text: Current page text (used for audio) - PRIMARY SOURCE
+        whole_story: Whole story for context (summary created)
+        previous_pages: Not used (kept for API compatibility)
+        story_summary: Precomputed summarize_story() result; skips summarizing whole_story
+    
+    Returns:
+        Generic, visually exciting video prompt optimized for kids' storybooks
+    """
+    try:
+        # Configured once per process
+        model = _get_model()
+        
+        # STEP 1: Create story summary (if whole_story provided and not precomputed)
+        if story_summary is None and whole_story:
+            story_summary = summarize_story(whole_story)
+        
+        # STEP 2: Fill the prompt template with this page's context
+        context = _STORY_CONTEXT_TMPL.format(summary=story_summary) if story_summary else ""
+        prompt = _PROMPT_TMPL.format(context=context, caption=caption, page_section=_page_section(page_text))
         
         # Generate enhanced prompt
-        response = model.generate_content(''.join(input_parts))
+        response = _gen_gemini(model, prompt)
         
         if response and response.text:
-            enhanced_prompt = response.text.strip()
-            # Clean up any markdown or extra formatting
-            enhanced_prompt = enhanced_prompt.replace('**', '').replace('*', '')
-            # Remove quotes if present
-            if enhanced_prompt.startswith('"') and enhanced_prompt.endswith('"'):
-                enhanced_prompt = enhanced_prompt[1:-1]
-            if enhanced_prompt.startswith("'") and enhanced_prompt.endswith("'"):
-                enhanced_prompt = enhanced_prompt[1:-1]
-            return enhanced_prompt
+            return _clean_prompt(response.text)
         else:
             # Fallback to simple prompt
             return "Gentle atmosphere with subtle movement and soft lighting"
@@ -132,6 +227,121 @@ Return ONLY the enhanced video motion prompt as a single sentence. No names. No
         return "Gentle camera movement with soft lighting and minimal motion"
 
 
+def enhance_video_prompts_batch(
+    pages: List[Tuple[str, Optional[str]]],
+    story_summary: Optional[str] = None
+) -> Optional[List[str]]:
+    """
+    Enhance several pages' video prompts with a single Gemini request.
+    
+    Args:
+        pages: (caption, page_text) per page
+        story_summary: Precomputed summarize_story() result shared by all pages
+    
+    Returns:
+        One enhanced prompt per page in input order, or None if the request failed
+        or the response wasn't a JSON array of the right length
+    """
+    try:
+        model = _get_model()
+        
+        context = _STORY_CONTEXT_TMPL.format(summary=story_summary) if story_summary else ""
+        page_sections = ''.join(
+            _BATCH_PAGE_TMPL.format(number=number, caption=caption, page_section=_page_section(page_text))
+            for number, (caption, page_text) in enumerate(pages, start=1)
+        )
+        prompt = _BATCH_PROMPT_TMPL.format(context=context, pages=page_sections, count=len(pages))
+        
+        response = _gen_gemini(model, prompt, generation_config={"response_mime_type": "application/json"})
+        if not (response and response.text):
+            return None
+        
+        enhanced = json.loads(_JSON_FENCE.sub('', response.text.strip()))
+        if not isinstance(enhanced, list) or len(enhanced) != len(pages):
+            print(f"Batch prompt enhancement returned {len(enhanced) if isinstance(enhanced, list) else 'no'} prompts for {len(pages)} pages")
+            return None
+        
+        return [_clean_prompt(str(item)) for item in enhanced]
+    
+    except Exception as e:
+        print(f"Error enhancing prompt batch: {str(e)}")
+        return None
+
+
+def _enhance_chunk(pages: List[Tuple[str, Optional[str]]], story_summary: Optional[str]) -> List[str]:
+    """Enhance a chunk of pages in one request, falling back to one request per page."""
+    if len(pages) > 1:
+        enhanced = enhance_video_prompts_batch(pages, story_summary)
+        if enhanced is not None:
+            return enhanced
+    
+    return [
+        enhance_video_prompt(
+            caption=caption,
+            page_text=page_text,
+            story_summary=story_summary,  # Shared summary/context
+            previous_pages=None  # Not used
+        )
+        for caption, page_text in pages
+    ]
+
+
+def _word_vector(text: str) -> Tuple[Counter, float]:
+    """Lowercased word counts of text and their Euclidean norm."""
+    counts = Counter(_WORD_RE.findall(text.lower()))
+    return counts, math.sqrt(sum(c * c for c in counts.values()))
+
+
+def _find_similar(vector: Tuple[Counter, float], seen: list, threshold: float):
+    """Key of the first seen (key, vector) whose cosine similarity reaches threshold, else None."""
+    counts, norm = vector
+    if not norm:
+        return None
+    for key, (other_counts, other_norm) in seen:
+        if not other_norm:
+            continue
+        dot = sum(c * other_counts[w] for w, c in counts.items() if w in other_counts)
+        if dot / (norm * other_norm) >= threshold:
+            return key
+    return None
+
+
+def _read_page_inputs(page_dir: Path) -> Optional[Tuple[str, Optional[str]]]:
+    """Read a page's (caption, page_text); None if the page has no caption yet."""
+    from utils.versioning import get_latest_version_path
+    
+    # One directory listing answers every existence check below
+    try:
+        with os.scandir(page_dir) as it:
+            entries = {entry.name: entry for entry in it}
+    except FileNotFoundError:
+        return None
+    
+    # Get caption
+    caption_entry = entries.get('image_caption.txt')
+    if caption_entry is None:
+        return None
+    
+    with open(caption_entry.path, 'r', encoding='utf-8') as f:
+        caption = f.read().strip()
+    
+    # Get page text (try versioned first, then legacy)
+    page_text = None
+    en_text_entry = None
+    if 'versions.json' in entries:
+        en_text_path = get_latest_version_path(page_dir, 'en_text')
+        if en_text_path:
+            en_text_entry = entries.get(en_text_path.name)
+    if en_text_entry is None:
+        en_text_entry = entries.get('final_text_en.txt')
+    
+    if en_text_entry is not None:
+        with open(en_text_entry.path, 'r', encoding='utf-8', errors='ignore') as f:
+            page_text = f.read()
+    
+    return caption, page_text
+
+
 def batch_enhance_prompts(
     page_dirs: list[Path],
     pdf_stem: str
@@ -140,6 +350,9 @@ def batch_enhance_prompts(
     Enhance prompts for multiple pages using whole story summary + each page's text.
     
     Creates GENERIC, visually exciting prompts without character names.
+    Pages are sent to Gemini PROMPT_BATCH_SIZE per request, with up to
+    ENHANCE_CONCURRENCY requests in flight.
+    Identical or near-identical pages (see PROMPT_REUSE_THRESHOLD) share one call.
     
     Args:
         page_dirs: List of page directories
@@ -148,7 +361,6 @@ def batch_enhance_prompts(
     Returns:
         Dict mapping page_dir.name to enhanced prompt
     """
-    from utils.versioning import get_latest_version_path
     from utils.workflow import get_extraction_dir
     
     results = {}
@@ -160,41 +372,63 @@ def batch_enhance_prompts(
     if whole_story_file.exists():
         whole_story = whole_story_file.read_text(encoding='utf-8', errors='ignore')
     
+    # Summarize the story once for all pages
+    story_summary = None
+    if whole_story:
+        try:
+            story_summary = summarize_story(whole_story)
+        except Exception as e:
+            print(f"Error summarizing story: {str(e)}")
+    
     sorted_dirs = sorted(page_dirs, key=lambda p: p.name)
-    api_call_count = 0
     
-    for page_dir in sorted_dirs:
-        # Get caption
-        caption_file = page_dir / 'image_caption.txt'
-        if not caption_file.exists():
-            results[page_dir.name] = None
-            continue
-        
-        caption = caption_file.read_text(encoding='utf-8').strip()
-        
-        # Get page text (try versioned first, then legacy)
-        page_text = None
-        en_text_path = get_latest_version_path(page_dir, 'en_text')
-        if not en_text_path:
-            en_text_path = page_dir / 'final_text_en.txt'
-        
-        if en_text_path and en_text_path.exists():
-            page_text = en_text_path.read_text(encoding='utf-8', errors='ignore')
-        
-        # Add delay before API call if this isn't the first call
-        if api_call_count > 0:
-            print(api_call_count)
-        
-        # Enhance prompt using whole story summary + current page context
-        # Creates generic prompts without character names
-        enhanced_prompt = enhance_video_prompt(
-            caption=caption,
-            page_text=page_text,
-            whole_story=whole_story,  # Used for summary/context
-            previous_pages=None  # Not used
-        )
+    # Preload every page's small text files concurrently so the API fan-out starts sooner
+    with ThreadPoolExecutor(max_workers=PAGE_READ_WORKERS) as executor:
+        loaded = list(executor.map(_read_page_inputs, sorted_dirs))
+    
+    # Group pages with identical caption + page text so each combination costs one Gemini call
+    unique_inputs = {}
+    pages_by_key = {}
+    for page_dir, inputs in zip(sorted_dirs, loaded):
+        # Reserve the slot so results stay in page order
+        results[page_dir.name] = None
+        if inputs is not None:
+            caption, page_text = inputs
+            key = hashlib.sha1((caption + '\x00' + (page_text or '')).encode('utf-8')).digest()
+            unique_inputs.setdefault(key, (caption, page_text))
+            pages_by_key.setdefault(key, []).append(page_dir.name)
+    
+    # Near-duplicates (same scene, slightly different wording) share the earlier page's call
+    if PROMPT_REUSE_THRESHOLD <= 1:
+        seen = []
+        for key, (caption, page_text) in list(unique_inputs.items()):
+            vector = _word_vector(caption + ' ' + (page_text or ''))
+            similar_key = _find_similar(vector, seen, PROMPT_REUSE_THRESHOLD)
+            if similar_key is None:
+                seen.append((key, vector))
+            else:
+                del unique_inputs[key]
+                pages_by_key[similar_key].extend(pages_by_key.pop(key))
+    
+    # Send pages to Gemini PROMPT_BATCH_SIZE at a time
+    keys = list(unique_inputs)
+    chunks = [keys[i:i + PROMPT_BATCH_SIZE] for i in range(0, len(keys), PROMPT_BATCH_SIZE)]
+    
+    with ThreadPoolExecutor(max_workers=ENHANCE_CONCURRENCY) as executor:
+        futures = {}
+        for chunk_keys in chunks:
+            # Enhance prompts using whole story summary + each page's context
+            # Creates generic prompts without character names; _gen_gemini paces the requests
+            future = executor.submit(
+                _enhance_chunk,
+                [unique_inputs[key] for key in chunk_keys],
+                story_summary  # Shared summary/context
+            )
+            futures[future] = chunk_keys
         
-        results[page_dir.name] = enhanced_prompt
-        api_call_count += 1
+        for future in as_completed(futures):
+            for key, enhanced in zip(futures[future], future.result()):
+                for page_name in pages_by_key[key]:
+                    results[page_name] = enhanced
     
     return results
@@ -17,7 +17,12 @@ from __future__ import annotations
 
 import argparse
 import json
+import logging
+import multiprocessing
+import os
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Iterable, Tuple, Optional
 
@@ -32,12 +37,83 @@ try:
 except Exception:
     PIL_AVAILABLE = False
 
+# Per-page warnings go through logging (not print) so parallel workers don't contend on stdout;
+# main() sets the level and format for CLI runs
+logger = logging.getLogger(__name__)
+
+# Optional faster JSON encoding for per-scene summaries
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
+# Optional fast OCR preprocessing: OpenCV + NumPy (falls back to the PIL chain)
+try:
+    import cv2
+    import numpy as np
+    CV2_AVAILABLE = True
+except Exception:
+    CV2_AVAILABLE = False
+
+# Optional in-process OCR: tesserocr keeps a loaded Tesseract engine instead of spawning the CLI per page
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except Exception:
+    TESSEROCR_AVAILABLE = False
+
+# 3x3 sharpen kernel for OpenCV OCR preprocessing
+_SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32) if CV2_AVAILABLE else None
+
+# Embedded images smaller than this are decorative glyphs, not artwork
+MIN_EMBEDDED_IMAGE_BYTES = 1024
+
+# Preferred extensions for a page's first extracted image, in order
+PRIMARY_IMAGE_EXTS = ("png", "jpg", "jpeg", "webp")
+
+# zlib level for rendered/re-encoded PNGs; these are intermediates, so favour encode speed over size
+PNG_COMPRESS_LEVEL = 1
+
+# Default OCR render resolution (PDF user space is 72 DPI, so 144 DPI is a 2x zoom)
+OCR_DPI = 144
+
+# Tesseract CLI resolved once at import, so per-page OCR skips the PATH lookup
+TESSERACT_BIN = shutil.which("tesseract")
+
+# Blank-page probe: pages whose low-res render is this flat, or has fewer dark pixels than this, skip OCR
+BLANK_PROBE_ZOOM = 0.3
+BLANK_PROBE_MIN_STD = 8.0
+BLANK_PROBE_MIN_INK = 0.01
+
+# One tesserocr engine per thread (the Streamlit app runs extractions in threads; an engine is not thread-safe)
+_tess_local = threading.local()
+
+
+def _save_pixmap_png(pix: fitz.Pixmap, out_path: Path) -> None:
+    """Write a pixmap as PNG at PNG_COMPRESS_LEVEL (PyMuPDF's own writer when Pillow is missing)."""
+    if PIL_AVAILABLE:
+        pix.pil_save(str(out_path), format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    else:
+        pix.save(str(out_path))
+
+
+def _write_json(path: Path, obj: dict) -> None:
+    """Write obj as 2-space-indented JSON, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(obj, indent=2))
+
 
 def find_pdfs(input_dir: Path) -> Iterable[Path]:
     """Yield all PDF files (case-insensitive) in the given directory (non-recursive)."""
-    for p in sorted(input_dir.iterdir()):
-        if p.is_file() and p.suffix.lower() == ".pdf":
-            yield p
+    # scandir's DirEntry answers is_file() from the directory listing, without a stat per entry
+    with os.scandir(input_dir) as it:
+        entries = [e for e in it if e.name.lower().endswith(".pdf") and e.is_file()]
+    entries.sort(key=lambda e: e.name)
+    for e in entries:
+        yield Path(e.path)
 
 
 def ensure_dir(p: Path) -> None:
@@ -46,53 +122,125 @@ def ensure_dir(p: Path) -> None:
 
 def _tesseract_cli_ready() -> bool:
     """Return True if the tesseract binary is available on PATH."""
-    return shutil.which("tesseract") is not None
+    return TESSERACT_BIN is not None
 
 
 def _ocr_with_tesseract_cli(pil_img: Image.Image, debug_path: Path | None = None) -> str:
     """Run Tesseract CLI on a PIL image and return extracted text.
 
-    Saves a temporary PNG next to page_dir when debug_path is provided for inspection.
+    The image is piped to tesseract on stdin, so nothing is written to a temp file.
+    Saves a PNG to debug_path when provided for inspection.
     """
     try:
-        from tempfile import NamedTemporaryFile
-        with NamedTemporaryFile(suffix=".png", delete=False) as tmp_in:
-            pil_img.save(tmp_in.name)
+        import io
+        buf = io.BytesIO()
+        pil_img.save(buf, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+        if debug_path is not None:
+            try:
+                pil_img.save(debug_path)
+            except Exception:
+                pass
+        # Read image from stdin, write text to stdout: tesseract stdin stdout
+        proc = subprocess.run(
+            [TESSERACT_BIN or "tesseract", "stdin", "stdout", "--psm", "6"],
+            input=buf.getvalue(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE if debug_path is not None else subprocess.DEVNULL,
+            check=False,
+        )
+        if proc.returncode != 0:
+            if debug_path is not None:
+                print(f"  - tesseract failed: {proc.stderr.decode('utf-8', errors='replace').strip()[-300:]}")
+            return ""
+        return proc.stdout.decode("utf-8", errors="replace") if proc.stdout else ""
+    except Exception:
+        return ""
+
+
+def _ocr_with_tesserocr(pil_img: Image.Image) -> Optional[str]:
+    """OCR a PIL image with this thread's tesserocr engine. Returns None if tesserocr fails."""
+    try:
+        api = getattr(_tess_local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang="eng", psm=tesserocr.PSM.SINGLE_BLOCK)
+            _tess_local.api = api
+        api.SetImage(pil_img)
+        return api.GetUTF8Text() or ""
+    except Exception:
+        return None
+
+
+def _ocr_image(pil_img: Image.Image, debug_path: Path | None = None) -> str:
+    """OCR a PIL image, preferring in-process tesserocr and falling back to the Tesseract CLI."""
+    if TESSEROCR_AVAILABLE:
+        text = _ocr_with_tesserocr(pil_img)
+        if text is not None:
             if debug_path is not None:
                 try:
                     pil_img.save(debug_path)
                 except Exception:
                     pass
-            # Use stdout output: tesseract <input> stdout
-            proc = subprocess.run(
-                ["tesseract", tmp_in.name, "stdout", "--psm", "6"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=False,
-                text=True,
-            )
-        if proc.returncode != 0:
-            return ""
-        return proc.stdout or ""
-    except Exception:
+            return text
+    if not _tesseract_cli_ready():
         return ""
+    return _ocr_with_tesseract_cli(pil_img, debug_path=debug_path)
+
+
+def _looks_blank(page: fitz.Page) -> bool:
+    """Cheap check on a low-res grayscale render: True if the page is blank or almost all white."""
+    if not CV2_AVAILABLE:
+        return False
+    probe = page.get_pixmap(matrix=fitz.Matrix(BLANK_PROBE_ZOOM, BLANK_PROBE_ZOOM), colorspace=fitz.csGRAY, alpha=False)
+    arr = np.frombuffer(probe.samples, dtype=np.uint8)
+    if arr.size == 0:
+        return True
+    return float(arr.std()) < BLANK_PROBE_MIN_STD or float((arr < 200).mean()) < BLANK_PROBE_MIN_INK
+
+
+def _preprocess_for_ocr_cv2(pix: fitz.Pixmap, crop: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+    """Grayscale -> CLAHE contrast -> sharpen in one OpenCV pass over the pixmap buffer."""
+    arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    if crop is not None:
+        x0, y0, x1, y1 = crop
+        arr = arr[y0:y1, x0:x1]
+    if pix.n == 1:
+        gray = np.ascontiguousarray(arr[:, :, 0])
+    else:
+        gray = cv2.cvtColor(arr, cv2.COLOR_RGBA2GRAY if pix.n == 4 else cv2.COLOR_RGB2GRAY)
+    eq = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+    sharp = cv2.filter2D(eq, -1, _SHARPEN_KERNEL)
+    return Image.fromarray(sharp)
+
+
+def _preprocess_for_ocr_pil(pix: fitz.Pixmap, crop: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+    """Grayscale -> autocontrast -> sharpen with PIL (used when OpenCV is unavailable)."""
+    mode = {1: "L", 3: "RGB", 4: "RGBA"}.get(pix.n, "RGB")
+    img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    # Optionally crop the image (for legacy spread half-page OCR)
+    if crop is not None:
+        try:
+            img = img.crop(crop)
+        except Exception:
+            pass
+    gray = img if img.mode == "L" else ImageOps.grayscale(img)
+    enhanced = ImageOps.autocontrast(gray, cutoff=2)
+    return enhanced.filter(ImageFilter.SHARPEN)
 
 
-def extract_page_text(page: fitz.Page, page_dir: Path, debug: bool = False, ocr_crop: Optional[Tuple[int, int, int, int]] = None) -> str:
+def extract_page_text(page: fitz.Page, page_dir: Path, debug: bool = False, ocr_crop: Optional[Tuple[int, int, int, int]] = None, ocr_dpi: int = OCR_DPI) -> str:
     """Extract text from a page.
 
     1) Try embedded text via PyMuPDF
-    2) If none and OCR available, render page to image and OCR
+    2) If none and OCR available, render page to a grayscale image at ocr_dpi and OCR
     """
     # 1) Embedded text
-    # Try both PyMuPDF API variants for compatibility
-    # Use PyMuPDF legacy API for compatibility
-    text = page.get_text("text") or ""
+    # Parse the page's content stream once; the block filter and plain text both read from it
+    textpage = page.get_textpage()
     # If a crop is provided (legacy spread), attempt spatially filtered embedded text
     if ocr_crop is not None:
         try:
             x0c, y0c, x1c, y1c = ocr_crop
-            blocks = page.get_text("blocks") or []
+            blocks = page.get_text("blocks", textpage=textpage) or []
             filtered_parts: list[str] = []
             for blk in blocks:
                 # blk: (x0, y0, x1, y1, text, block_no, ...)
@@ -115,40 +263,42 @@ def extract_page_text(page: fitz.Page, page_dir: Path, debug: bool = False, ocr_
         except Exception:
             pass
     # Otherwise, if embedded text exists, return it
+    text = page.get_text("text", textpage=textpage) or ""
+    textpage = None
     if text.strip():
         return text
 
-    # 2) OCR fallback via Tesseract CLI
-    if not PIL_AVAILABLE or not _tesseract_cli_ready():
+    # 2) OCR fallback via tesserocr or the Tesseract CLI
+    if not PIL_AVAILABLE or not (TESSEROCR_AVAILABLE or _tesseract_cli_ready()):
         if debug and not PIL_AVAILABLE:
             print("  - OCR not available: missing Pillow (PIL)")
-        elif debug and not _tesseract_cli_ready():
+        elif debug:
             print("  - OCR not available: Tesseract binary not found. Install it (e.g., brew install tesseract)")
         return text  # empty or whitespace
 
     try:
-        # Render at higher resolution for better OCR results
-        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-        from PIL import Image, ImageOps, ImageFilter
-        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-        # Optionally crop the image (for legacy spread half-page OCR)
-        if ocr_crop is not None:
-            x0, y0, x1, y1 = ocr_crop
-            try:
-                img = img.crop((x0, y0, x1, y1))
-            except Exception:
-                pass
-        # Basic preprocessing: grayscale -> increase contrast -> slight sharpen -> binary
-        gray = ImageOps.grayscale(img)
-        enhanced = ImageOps.autocontrast(gray, cutoff=2)
-        enhanced = enhanced.filter(ImageFilter.SHARPEN)
+        # Skip the full-resolution render + OCR for blank pages
+        if _looks_blank(page):
+            if debug:
+                print("  - OCR skipped: page looks blank")
+            return text
+        # Render straight to grayscale at OCR resolution (1 byte per pixel, no RGB->gray pass)
+        zoom = ocr_dpi / 72.0
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        # Basic preprocessing: grayscale -> increase contrast -> slight sharpen
+        if CV2_AVAILABLE:
+            enhanced = _preprocess_for_ocr_cv2(pix, ocr_crop)
+        else:
+            enhanced = _preprocess_for_ocr_pil(pix, ocr_crop)
+        # The preprocessed image is a copy; free the page-sized pixmap before the slow OCR call
+        pix = None
         # Save preprocessed image for debugging if requested
         if debug:
             ensure_dir(page_dir)
             enhanced.save(page_dir / "ocr_preprocessed.png")
-        # OCR via tesseract CLI
+        # OCR via tesserocr, or the tesseract CLI
         debug_img_path = page_dir / "ocr_preprocessed.png" if debug else None
-        ocr_text = _ocr_with_tesseract_cli(enhanced, debug_path=debug_img_path)
+        ocr_text = _ocr_image(enhanced, debug_path=debug_img_path)
         return ocr_text if ocr_text is not None else ""
     except Exception:
         # If anything goes wrong in OCR, return empty string
@@ -156,30 +306,49 @@ def extract_page_text(page: fitz.Page, page_dir: Path, debug: bool = False, ocr_
 
 
 
-def extract_page_images(doc: fitz.Document, page: fitz.Page, page_dir: Path) -> int:
-    """Extract embedded images from the page. Returns count of saved images."""
+def extract_page_images(doc: fitz.Document, page: fitz.Page, page_dir: Path, xref_cache: Optional[dict[int, Path]] = None) -> int:
+    """Extract embedded images from the page. Returns count of saved images.
+
+    xref_cache maps xrefs already written for this document to their file, so an image
+    shared by many pages (logos, backgrounds) is extracted once and copied afterwards
+    (copied, not linked, so an in-place edit of one page's file can't reach the others).
+    """
     images = page.get_images(full=True)
     count = 0
     for idx, img in enumerate(images, start=1):
         xref = img[0]
+        cached = xref_cache.get(xref) if xref_cache is not None else None
+        if cached is not None and cached.exists():
+            out_path = page_dir / f"image_{idx:03d}{cached.suffix}"
+            try:
+                if out_path.exists():
+                    out_path.unlink()
+                shutil.copy2(cached, out_path)
+                count += 1
+                continue
+            except Exception:
+                pass  # fall through to a fresh extraction
         try:
             image_info = doc.extract_image(xref)
         except Exception as e:
             # If extraction fails for a specific xref, skip it
-            print(f"  - Warn: failed to extract image xref={xref}: {e}")
+            logger.warning(f"failed to extract image xref={xref}: {e}")
             continue
         if not image_info:
             continue
         img_bytes = image_info.get("image")
         ext = image_info.get("ext", "png")
-        if not img_bytes:
+        # Skip empty images and tiny decorative glyphs
+        if not img_bytes or len(img_bytes) < MIN_EMBEDDED_IMAGE_BYTES:
             continue
         out_path = page_dir / f"image_{idx:03d}.{ext}"
         try:
             out_path.write_bytes(img_bytes)
             count += 1
+            if xref_cache is not None:
+                xref_cache[xref] = out_path
         except Exception as e:
-            print(f"  - Warn: failed to write image {out_path.name}: {e}")
+            logger.warning(f"failed to write image {out_path.name}: {e}")
     return count
 
 
@@ -195,10 +364,10 @@ def render_page_png(page: fitz.Page, page_dir: Path, zoom: float = 2.0) -> Path:
         mat = fitz.Matrix(zoom, zoom)
         pix = page.get_pixmap(matrix=mat)
         out_path = page_dir / "page_render.png"
-        pix.save(str(out_path))
+        _save_pixmap_png(pix, out_path)
         return out_path
     except Exception as e:
-        print(f"  - Warn: failed to render page PNG: {e}")
+        logger.warning(f"failed to render page PNG: {e}")
         return page_dir / "page_render.png"
 
 
@@ -216,20 +385,17 @@ def save_primary_image_for_layout(page_dir: Path, page_number: int, layout_mode:
     """
     try:
         from PIL import Image
-        # Find source image candidate(s)
-        candidates = []
-        for ext in ("png", "jpg", "jpeg", "webp"):
-            p = page_dir / f"image_001.{ext}"
-            if p.exists():
-                candidates.append(p)
+        # Find source image candidate(s) from one directory listing
+        with os.scandir(page_dir) as it:
+            names = {e.name for e in it if e.is_file()}
+        candidates = [page_dir / f"image_001.{ext}" for ext in PRIMARY_IMAGE_EXTS if f"image_001.{ext}" in names]
         if not candidates:
-            images = sorted(page_dir.glob("image_*.*"))
+            images = sorted(n for n in names if n.startswith("image_") and "." in n[len("image_"):])
             if images:
-                candidates.append(images[0])
+                candidates.append(page_dir / images[0])
         # Fallback to page_render.png
-        render_png = page_dir / "page_render.png"
-        if not candidates and render_png.exists():
-            candidates.append(render_png)
+        if not candidates and "page_render.png" in names:
+            candidates.append(page_dir / "page_render.png")
         if not candidates:
             return None
 
@@ -255,13 +421,16 @@ def save_primary_image_for_layout(page_dir: Path, page_number: int, layout_mode:
                 im.save(out_path)
             return out_path
     except Exception as e:
-        print(f"  - Warn: failed to prepare primary image: {e}")
+        logger.warning(f"failed to prepare primary image: {e}")
         return None
 
 
-def _save_image_for_scene(doc: fitz.Document, page: fitz.Page, scene_dir: Path, debug: bool = False) -> Optional[Path]:
+def _save_image_for_scene(doc: fitz.Document, page: fitz.Page, scene_dir: Path, debug: bool = False, xref_cache: Optional[dict[int, Path]] = None) -> Optional[Path]:
     """Save a representative image from the given page into scene_dir/image.png.
-    Falls back to rendered PNG if no embedded images. Returns saved path or None."""
+    Falls back to rendered PNG if no embedded images. Returns saved path or None.
+
+    xref_cache maps xrefs already saved for this document to their image.png, so an
+    image reused across scenes is copied instead of extracted and encoded again."""
     ensure_dir(scene_dir)
     image_out = scene_dir / "image.png"
     try:
@@ -269,32 +438,102 @@ def _save_image_for_scene(doc: fitz.Document, page: fitz.Page, scene_dir: Path,
         if images:
             # Take first embedded image
             xref = images[0][0]
+            cached = xref_cache.get(xref) if xref_cache is not None else None
+            if cached is not None and cached.exists():
+                shutil.copy2(cached, image_out)
+                return image_out
             image_info = doc.extract_image(xref)
             if image_info:
                 img_bytes = image_info.get("image")
                 ext = image_info.get("ext", "png")
                 if img_bytes:
-                    tmp = scene_dir / f"_tmp_embed.{ext}"
-                    tmp.write_bytes(img_bytes)
-                    from PIL import Image as _PILImage
-                    with _PILImage.open(tmp) as im:
-                        im.save(image_out)
-                    try:
-                        tmp.unlink()
-                    except Exception:
-                        pass
+                    if ext == "png":
+                        # Already PNG: write the extracted bytes as-is, no decode/encode
+                        image_out.write_bytes(img_bytes)
+                    else:
+                        # Decode from memory and re-encode as PNG (no temp file round-trip)
+                        import io
+                        from PIL import Image as _PILImage
+                        with _PILImage.open(io.BytesIO(img_bytes)) as im:
+                            im.save(image_out, compress_level=PNG_COMPRESS_LEVEL)
+                    if xref_cache is not None:
+                        xref_cache[xref] = image_out
                     return image_out
         # Fallback: render page
         pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-        pix.save(str(image_out))
+        _save_pixmap_png(pix, image_out)
         return image_out
     except Exception as e:
         if debug:
-            print(f"  - Warn: scene image extraction failed: {e}")
+            logger.warning(f"scene image extraction failed: {e}")
         return None
 
 
-def process_pdf(pdf_path: Path, out_root: Path, force: bool = False, debug: bool = False, no_images: bool = False, layout_mode: str = "auto", pdf_format: str = "updated") -> Tuple[int, int]:
+def _process_scene(doc: fitz.Document, i: int, scene_index: int, scene_dir: Path, debug: bool = False, no_images: bool = False, ocr_dpi: int = OCR_DPI, xref_cache: Optional[dict[int, Path]] = None) -> int:
+    """Extract one scene (PDF pages i and i+1) into scene_dir. Returns count of saved images."""
+    page_count = doc.page_count
+    text_page = doc.load_page(i)
+    image_page = doc.load_page(i + 1) if i + 1 < page_count else text_page  # fallback if odd
+
+    # TEXT from first page of pair
+    text = extract_page_text(text_page, scene_dir, debug=debug, ocr_dpi=ocr_dpi)
+    (scene_dir / "text.txt").write_text(text, encoding="utf-8")
+
+    # IMAGE from second page of pair
+    img_count = 0
+    if not no_images:
+        img_path = _save_image_for_scene(doc, image_page, scene_dir, debug=debug, xref_cache=xref_cache)
+        if img_path and img_path.exists():
+            img_count = 1
+            # For compatibility with downstream code expecting image_to_use.png
+            compat_path = scene_dir / "image_to_use.png"
+            try:
+                if compat_path.exists():
+                    compat_path.unlink()
+                # A real copy, not a link: downstream stages (e.g. make_slideshows' resize)
+                # rewrite image_to_use.png in place, which must not touch image.png
+                shutil.copy2(img_path, compat_path)
+            except Exception:
+                pass
+
+    # Summary
+    summary = {
+        "scene_index": scene_index,
+        "source_page_indices": [i, i + 1 if i + 1 < page_count else i],
+        "text_page_number": i + 1,
+        "image_page_number": i + 2 if i + 1 < page_count else i + 1,
+        "text_chars": len(text),
+        "images": img_count,
+    }
+
+    # Release page objects so their resources can leave MuPDF's store
+    text_page = image_page = None
+
+    _write_json(scene_dir / "summary.json", summary)
+    (scene_dir / "done.flag").write_text("ok")
+    return img_count
+
+
+def _process_scene_range(pdf_path: Path, jobs: list[tuple[int, int, Path]], debug: bool = False, no_images: bool = False, ocr_dpi: int = OCR_DPI) -> Tuple[int, int]:
+    """Extract (i, scene_index, scene_dir) jobs serially with a private document and xref cache.
+
+    Runs in a worker process. Returns (scenes_processed, images_extracted).
+    """
+    doc = fitz.open(str(pdf_path))
+    xref_cache: dict[int, Path] = {}
+    total_images = 0
+    try:
+        for i, scene_index, scene_dir in jobs:
+            total_images += _process_scene(doc, i, scene_index, scene_dir, debug=debug, no_images=no_images, ocr_dpi=ocr_dpi, xref_cache=xref_cache)
+            # Empty MuPDF's cached resources so RSS stays flat across long ranges. The store is
+            # process-global, which is safe here: a worker process runs one scene at a time
+            fitz.TOOLS.store_shrink(100)
+    finally:
+        doc.close()
+    return (len(jobs), total_images)
+
+
+def process_pdf(pdf_path: Path, out_root: Path, force: bool = False, debug: bool = False, no_images: bool = False, layout_mode: str = "auto", pdf_format: str = "updated", workers: int = 1, ocr_dpi: int = OCR_DPI) -> Tuple[int, int]:
     """Process a single PDF. Returns (units_processed, images_extracted).
 
     pdf_format:
@@ -307,6 +546,14 @@ def process_pdf(pdf_path: Path, out_root: Path, force: bool = False, debug: bool
       - image comes from second page in the pair
       - if the PDF has an odd number of pages, the last scene will use the last page for both text and image (fallback)
 
+    ocr_dpi:
+      Render resolution for pages that need OCR.
+
+    workers:
+      Number of worker processes extracting scenes concurrently. Each process
+      opens its own document, since MuPDF is not thread-safe even across
+      separate documents.
+
     # layout_mode (legacy single-page mode only) controls page image post-processing.
     """
     pdf_name = pdf_path.stem
@@ -335,55 +582,47 @@ def process_pdf(pdf_path: Path, out_root: Path, force: bool = False, debug: bool
         "source": str(pdf_path.name),
         "pages": int(doc.page_count),
     }
-    (pdf_out_dir / "metadata.json").write_text(json.dumps(meta, indent=2))
+    _write_json(pdf_out_dir / "metadata.json", meta)
+
+    # Images already saved for this document, keyed by xref (serial path; worker processes keep their own)
+    xref_cache: dict[int, Path] = {}
 
     if pdf_format == "updated":
-        scene_index = 1
-        for i in range(0, doc.page_count, 2):
-            text_page = doc.load_page(i)
-            image_page = doc.load_page(i + 1) if i + 1 < doc.page_count else text_page  # fallback if odd
+        # Collect pending scenes first so they can be dispatched serially or in parallel
+        pending = []
+        for scene_index, i in enumerate(range(0, doc.page_count, 2), start=1):
             scene_dir = pdf_out_dir / f"scene_{scene_index:04d}"
             ensure_dir(scene_dir)
 
             scene_done_flag = scene_dir / "done.flag"
             if scene_done_flag.exists() and not force:
                 pages_done += 1
-                scene_index += 1
                 continue
-
-            # TEXT from first page of pair
-            text = extract_page_text(text_page, scene_dir, debug=debug)
-            (scene_dir / "text.txt").write_text(text, encoding="utf-8")
-
-            # IMAGE from second page of pair
-            img_count = 0
-            if not no_images:
-                img_path = _save_image_for_scene(doc, image_page, scene_dir, debug=debug)
-                if img_path and img_path.exists():
-                    img_count = 1
-                    total_images += 1
-                    # For compatibility with downstream code expecting image_to_use.png
-                    compat_path = scene_dir / "image_to_use.png"
-                    try:
-                        if compat_path.exists():
-                            compat_path.unlink()
-                        shutil.copy2(img_path, compat_path)
-                    except Exception:
-                        pass
-
-            # Summary
-            summary = {
-                "scene_index": scene_index,
-                "source_page_indices": [i, i + 1 if i + 1 < doc.page_count else i],
-                "text_page_number": i + 1,
-                "image_page_number": i + 2 if i + 1 < doc.page_count else i + 1,
-                "text_chars": len(text),
-                "images": img_count,
-            }
-            (scene_dir / "summary.json").write_text(json.dumps(summary, indent=2))
-            scene_done_flag.write_text("ok")
-            pages_done += 1
-            scene_index += 1
+            pending.append((i, scene_index, scene_dir))
+
+        if workers and workers > 1 and len(pending) > 1:
+            # MuPDF's global context isn't thread-safe, so scenes run in processes: each
+            # gets a contiguous range (keeping repeated xrefs in one cache) and its own document
+            n_workers = min(workers, len(pending))
+            per_worker = -(-len(pending) // n_workers)
+            ranges = [pending[start:start + per_worker] for start in range(0, len(pending), per_worker)]
+            # spawn: callers such as the Streamlit app are multi-threaded, which fork doesn't tolerate
+            with ProcessPoolExecutor(max_workers=len(ranges), mp_context=multiprocessing.get_context("spawn")) as ex:
+                futures = [
+                    ex.submit(_process_scene_range, pdf_path, jobs, debug=debug, no_images=no_images, ocr_dpi=ocr_dpi)
+                    for jobs in ranges
+                ]
+                for future in as_completed(futures):
+                    scenes, images = future.result()
+                    pages_done += scenes
+                    total_images += images
+        else:
+            for i, scene_index, scene_dir in pending:
+                total_images += _process_scene(doc, i, scene_index, scene_dir, debug=debug, no_images=no_images, ocr_dpi=ocr_dpi, xref_cache=xref_cache)
+                pages_done += 1
+            # Once, after the loop: the store is process-global and process_pdf may be called
+            # from a process that holds other documents open
+            fitz.TOOLS.store_shrink(100)
     # LEGACY FORMAT DISABLED - Old single-page mode commented out
     # else:
     #     # Legacy single-page mode
@@ -458,7 +697,11 @@ def main(argv: list[str] | None = None) -> int:
     # parser.add_argument("--layout_mode", choices=["auto", "spread", "legacy_spread", "single"], default="auto", help="Page image post-processing mode (legacy single-page mode only).")
     parser.add_argument("--pdf_format", choices=["updated"], default="updated", help="PDF format: 'updated' (2 pages = 1 scene).")
     # Legacy 'old' format removed from choices - was: choices=["old", "updated"], default="old"
+    parser.add_argument("--max_workers", type=int, default=None, help="PDFs processed in parallel, one process each (default: CPU count)")
+    parser.add_argument("--ocr_dpi", type=int, default=OCR_DPI, help=f"Render DPI for OCR of pages without embedded text (default: {OCR_DPI})")
+    parser.add_argument("--page_workers", type=int, default=1, help="Worker processes extracting scenes within each PDF (default: 1). Multiplies with --max_workers, so raise one or the other")
     args = parser.parse_args(argv)
+    layout_mode = "auto"  # --layout_mode is disabled along with the legacy format
 
     input_dir: Path = args.input_dir.resolve()
     out_dir: Path = args.out_dir.resolve()
@@ -476,12 +719,37 @@ def main(argv: list[str] | None = None) -> int:
     total_pages = 0
     total_images = 0
 
-    for pdf in pdfs:
-        print(f"Processing: {pdf.name} (format={args.pdf_format}, layout_mode={args.layout_mode})")
-        pages, images = process_pdf(pdf, out_dir, force=args.force, debug=args.debug, no_images=args.no_images, layout_mode=args.layout_mode, pdf_format=args.pdf_format)
-        print(f"  -> pages: {pages}, images: {images}")
-        total_pages += pages
-        total_images += images
+    max_workers = max(1, min(args.max_workers or os.cpu_count() or 1, len(pdfs)))
+
+    # Per-page warnings: shown for serial runs and --debug; errors only when many processes share the terminal
+    logging.basicConfig(
+        level=logging.WARNING if (max_workers == 1 or args.debug) else logging.ERROR,
+        format="  - Warn: %(message)s",
+    )
+    process_kwargs = dict(force=args.force, debug=args.debug, no_images=args.no_images, layout_mode=layout_mode, pdf_format=args.pdf_format, workers=args.page_workers, ocr_dpi=args.ocr_dpi)
+
+    if max_workers == 1:
+        for pdf in pdfs:
+            print(f"Processing: {pdf.name} (format={args.pdf_format}, layout_mode={layout_mode})")
+            pages, images = process_pdf(pdf, out_dir, **process_kwargs)
+            print(f"  -> pages: {pages}, images: {images}")
+            total_pages += pages
+            total_images += images
+    else:
+        # Rendering and OCR are CPU-bound and PyMuPDF holds the GIL, so use one process per PDF
+        print(f"Processing {len(pdfs)} PDF(s) with {max_workers} worker processes (format={args.pdf_format}, layout_mode={layout_mode})")
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            futures = {ex.submit(process_pdf, pdf, out_dir, **process_kwargs): pdf for pdf in pdfs}
+            for future in as_completed(futures):
+                pdf = futures[future]
+                try:
+                    pages, images = future.result()
+                except Exception as e:
+                    print(f"Error: failed to process {pdf.name}: {e}")
+                    continue
+                print(f"  {pdf.name} -> pages: {pages}, images: {images}")
+                total_pages += pages
+                total_images += images
 
     print("\nSummary:")
     print(f"  PDFs: {len(pdfs)}")
@@ -6,9 +6,19 @@ Generate descriptive captions for images using the BLIP-2 model.
 
 import os
 import replicate
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 
+from utils.retry import retry_with_backoff
+
+
+# Maximum Replicate caption predictions in flight during a batch
+CAPTION_CONCURRENCY = 8
+
+# BLIP-2 model version used for captions
+CAPTION_MODEL = "andreasjansson/blip-2:f677695e5e89f8b236e52ecd1d3f01beb44c34606419bcc19345e046d8f786f9"
+
 
 def generate_image_caption(
     image_path: Path,
@@ -57,11 +67,12 @@ def generate_image_caption(
             if context:
                 input_data["context"] = context
             
-            # Run the model
-            output = replicate.run(
-                "andreasjansson/blip-2:f677695e5e89f8b236e52ecd1d3f01beb44c34606419bcc19345e046d8f786f9",
-                input=input_data
-            )
+            # Run the model, retrying rate limits and transient failures
+            def attempt():
+                f.seek(0)
+                return replicate.run(CAPTION_MODEL, input=input_data)
+            
+            output = retry_with_backoff(attempt)
         
         # Return the caption/answer
         if output:
@@ -74,48 +85,78 @@ def generate_image_caption(
         return None
 
 
+def _caption_page_dir(
+    page_dir: Path,
+    use_caption_mode: bool,
+    question: Optional[str],
+    force: bool = False
+) -> Optional[str]:
+    """Caption one page's latest image and save image_caption.txt. Safe to run in a worker thread."""
+    # Resume: a saved caption means this page was already done
+    caption_file = page_dir / 'image_caption.txt'
+    if not force and caption_file.exists():
+        return caption_file.read_text(encoding='utf-8')
+    
+    # Get latest image
+    from utils.versioning import get_latest_version_path
+    image_path = get_latest_version_path(page_dir, 'image')
+    
+    if not image_path or not image_path.exists():
+        # Try legacy
+        image_path = page_dir / 'image_to_use.png'
+        if not image_path.exists():
+            return None
+    
+    # Generate caption
+    caption = generate_image_caption(
+        image_path,
+        question=question,
+        use_caption_mode=use_caption_mode
+    )
+    
+    # Save caption to file if generated
+    if caption:
+        caption_file.write_text(caption, encoding='utf-8')
+    
+    return caption
+
+
 def batch_generate_captions(
     page_dirs: list[Path],
     use_caption_mode: bool = True,
-    question: Optional[str] = None
+    question: Optional[str] = None,
+    concurrency: int = CAPTION_CONCURRENCY,
+    force: bool = False
 ) -> dict[str, Optional[str]]:
     """
     Generate captions for multiple pages.
     
+    Predictions run concurrently (up to `concurrency` at a time) since each
+    call mostly waits on Replicate; the result dict keeps page order. Each
+    caption is saved as soon as it arrives, and pages that already have an
+    image_caption.txt are reused unless force is set, so an interrupted batch
+    resumes where it stopped.
+    
     Args:
         page_dirs: List of page directories
         use_caption_mode: If True, generates captions; if False, asks questions
         question: Optional question to ask (used when use_caption_mode=False)
+        concurrency: Maximum predictions in flight
+        force: Regenerate captions that already exist
     
     Returns:
         Dict mapping page_dir.name to generated caption/answer
     """
-    results = {}
+    results = {page_dir.name: None for page_dir in page_dirs}
+    if not page_dirs:
+        return results
     
-    for page_dir in page_dirs:
-        # Get latest image
-        from utils.versioning import get_latest_version_path
-        image_path = get_latest_version_path(page_dir, 'image')
-        
-        if not image_path or not image_path.exists():
-            # Try legacy
-            image_path = page_dir / 'image_to_use.png'
-            if not image_path.exists():
-                results[page_dir.name] = None
-                continue
-        
-        # Generate caption
-        caption = generate_image_caption(
-            image_path,
-            question=question,
-            use_caption_mode=use_caption_mode
-        )
-        
-        results[page_dir.name] = caption
-        
-        # Save caption to file if generated
-        if caption:
-            caption_file = page_dir / 'image_caption.txt'
-            caption_file.write_text(caption, encoding='utf-8')
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(page_dirs)))) as executor:
+        futures = {
+            executor.submit(_caption_page_dir, page_dir, use_caption_mode, question, force): page_dir
+            for page_dir in page_dirs
+        }
+        for future in as_completed(futures):
+            results[futures[future].name] = future.result()
     
     return results
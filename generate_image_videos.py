@@ -6,9 +6,33 @@ Convert images to videos using wan-video/wan-2.2-5b-fast model.
 
 import os
 import replicate
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.retry import retry_with_backoff
+
+
+# Maximum Replicate video predictions in flight during a batch
+VIDEO_CONCURRENCY = 4
+
+# Image-to-video model
+VIDEO_MODEL = "wan-video/wan-2.2-i2v-fast"
+
+# Shared session: pooled keep-alive connections across a batch, with retries on transient download errors
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+# Read size and (connect, read) timeouts for streamed video downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_TIMEOUT = (10, 600)
 
 
 def generate_video_from_image(
@@ -74,13 +98,15 @@ def generate_video_from_image(
             if optimize_prompt:
                 input_data["optimize_prompt"] = optimize_prompt
             
-            # Run the model
-            output = replicate.run(
-                "wan-video/wan-2.2-i2v-fast",
-                input=input_data
-            )
+            # Run the model, retrying rate limits and transient failures
+            def attempt():
+                f.seek(0)
+                return replicate.run(VIDEO_MODEL, input=input_data)
+            
+            output = retry_with_backoff(attempt)
         
         # Handle output - it should be a single video file
+        part_path = output_path.with_name(output_path.name + '.part')
         if output:
             # Get URL from output
             if isinstance(output, str):
@@ -89,20 +115,22 @@ def generate_video_from_image(
                 url = output.url if isinstance(output.url, str) else output.url()
             elif hasattr(output, 'read'):
                 # FileOutput object
-                with open(output_path, 'wb') as out_f:
+                with open(part_path, 'wb') as out_f:
                     out_f.write(output.read())
+                part_path.replace(output_path)
                 return True
             else:
                 url = str(output)
             
-            # Download the video
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            # Save to output path
-            with open(output_path, 'wb') as out_f:
-                out_f.write(response.content)
+            # Stream the video to disk so memory use is bounded by the chunk size
+            with _HTTP.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb') as out_f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        out_f.write(chunk)
             
+            # Only a complete download appears at output_path (batch resume treats it as done)
+            part_path.replace(output_path)
             return True
         else:
             return False
@@ -136,55 +164,80 @@ def generate_default_prompt(page_index: int, page_text: Optional[str] = None) ->
     return prompts[page_index % len(prompts)]
 
 
+def _generate_page_dir_video(
+    page_dir: Path,
+    prompts: Optional[dict[str, str]],
+    force: bool = False,
+    **kwargs
+) -> bool:
+    """Animate one page's latest image into page_image_video_temp.mp4. Safe to run in a worker thread."""
+    # Resume: a saved video means this page was already done
+    output_path = page_dir / 'page_image_video_temp.mp4'
+    if not force and output_path.exists():
+        return True
+    
+    # Get latest image
+    from utils.versioning import get_latest_version_path
+    image_path = get_latest_version_path(page_dir, 'image')
+    
+    if not image_path or not image_path.exists():
+        # Try legacy
+        image_path = page_dir / 'image_to_use.png'
+        if not image_path.exists():
+            return False
+    
+    # Get prompt
+    if prompts and page_dir.name in prompts:
+        prompt = prompts[page_dir.name]
+    else:
+        # Extract page number from directory name
+        page_num = int(page_dir.name.split('_')[1]) if '_' in page_dir.name else 1
+        prompt = generate_default_prompt(page_num)
+    
+    # Generate video
+    return generate_video_from_image(
+        image_path,
+        prompt,
+        output_path,
+        **kwargs
+    )
+
+
 def batch_generate_videos(
     page_dirs: list[Path],
     prompts: Optional[dict[str, str]] = None,
+    concurrency: int = VIDEO_CONCURRENCY,
+    force: bool = False,
     **kwargs
 ) -> dict[str, bool]:
     """
     Generate videos for multiple pages.
     
+    Predictions run concurrently (up to `concurrency` at a time) since each
+    call mostly waits on Replicate; the result dict keeps page order. Pages
+    that already have a page_image_video_temp.mp4 are skipped unless force is
+    set, so an interrupted batch resumes where it stopped.
+    
     Args:
         page_dirs: List of page directories
         prompts: Optional dict mapping page_dir.name to prompt
+        concurrency: Maximum predictions in flight
+        force: Regenerate videos that already exist
         **kwargs: Additional arguments for generate_video_from_image
     
     Returns:
         Dict mapping page_dir.name to success status
     """
-    results = {}
+    results = {page_dir.name: False for page_dir in page_dirs}
+    if not page_dirs:
+        return results
     
-    for page_dir in page_dirs:
-        # Get latest image
-        from utils.versioning import get_latest_version_path
-        image_path = get_latest_version_path(page_dir, 'image')
-        
-        if not image_path or not image_path.exists():
-            # Try legacy
-            image_path = page_dir / 'image_to_use.png'
-            if not image_path.exists():
-                results[page_dir.name] = False
-                continue
-        
-        # Get prompt
-        if prompts and page_dir.name in prompts:
-            prompt = prompts[page_dir.name]
-        else:
-            # Extract page number from directory name
-            page_num = int(page_dir.name.split('_')[1]) if '_' in page_dir.name else 1
-            prompt = generate_default_prompt(page_num)
-        
-        # Generate output path
-        output_path = page_dir / 'page_image_video_temp.mp4'
-        
-        # Generate video
-        success = generate_video_from_image(
-            image_path,
-            prompt,
-            output_path,
-            **kwargs
-        )
-        
-        results[page_dir.name] = success
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(page_dirs)))) as executor:
+        futures = {
+            executor.submit(_generate_page_dir_video, page_dir, prompts, force, **kwargs): page_dir
+            for page_dir in page_dirs
+        }
+        for future in as_completed(futures):
+            results[futures[future].name] = future.result()
     
     return results
@@ -2,8 +2,11 @@
 import os
 import sys
 import argparse
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
 import time
 
 try:
@@ -12,6 +15,9 @@ except ImportError as e:
     print("Missing dependency: elevenlabs. Install with: pip install -r requirements.txt", file=sys.stderr)
     raise
 
+from utils.rate_limit import AdaptiveConcurrency, RateLimiter
+from utils.retry import next_retry_delay
+
 DEFAULT_BASE_DIR = "extracted"
 DEFAULT_MODEL_ID = "eleven_flash_v2_5"
 DEFAULT_VOICE_ID = "7tRwuZTD1EWi6nydVerp"  # Jhonny
@@ -20,53 +26,136 @@ TARGET_FILES = [
     ("final_text_en.txt", "final_text_en.mp3"),
     ("final_text_hi.txt", "final_text_hi.mp3"),
 ]
+TARGET_NAMES = dict(TARGET_FILES)
+MIN_MP3_BYTES = 512  # Anything smaller is a truncated/failed TTS stream
+DEFAULT_CONCURRENCY = 2  # ElevenLabs free plan allows 2 concurrent requests
+MAX_CONCURRENCY = 5  # Creator plan ceiling; higher values only trip "too many concurrent requests"
+DEFAULT_RPM = 120  # Requests per minute paced across all workers
+RETRY_BASE_DELAY = 2.0  # Seconds; retries back off with jitter from here unless the server says otherwise
+WRITE_BATCH_BYTES = 64 * 1024  # Audio chunks are coalesced into writes of at least this size
+WRITE_BUFFER_BYTES = 1 << 20  # File buffer for MP3 output
+
+
+def is_valid_mp3(path: Path, min_bytes: int = MIN_MP3_BYTES) -> bool:
+    """Return True if path exists and is large enough to be a usable MP3."""
+    try:
+        return path.stat().st_size > min_bytes
+    except OSError:
+        return False
 
 
 def save_audio_stream_to_file(audio_stream: Iterable[bytes], out_path: Path) -> None:
-    """Write a streaming/generator response to a file without loading into memory."""
+    """Write a streaming/generator response to a file without loading into memory.
+
+    The SDK yields many small chunks, so they are gathered into
+    WRITE_BATCH_BYTES batches before each write rather than written one by one.
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("wb") as f:
+    buf = bytearray()
+    with out_path.open("wb", buffering=WRITE_BUFFER_BYTES) as f:
         for chunk in audio_stream:
             if not chunk:
                 continue
-            # Expect bytes chunks from ElevenLabs SDK
-            if isinstance(chunk, bytes):
-                f.write(chunk)
-            else:
-                # Fallback for file-like
-                data = getattr(chunk, "read", lambda: b"")()
-                if data:
-                    f.write(data)
+            # Expect bytes chunks from ElevenLabs SDK; fall back to file-like
+            if not isinstance(chunk, (bytes, bytearray, memoryview)):
+                chunk = getattr(chunk, "read", lambda: b"")()
+            buf += chunk
+            if len(buf) >= WRITE_BATCH_BYTES:
+                f.write(buf)
+                buf.clear()
+        if buf:
+            f.write(buf)
+
+
+def _is_throttled(err: Exception) -> bool:
+    """Return True if err is ElevenLabs rejecting the request for rate or concurrency."""
+    status = getattr(err, "status_code", None) or getattr(getattr(err, "response", None), "status_code", None)
+    msg = str(err).lower()
+    return status == 429 or "too_many_concurrent_requests" in msg or "too many concurrent" in msg
+
+
+def _tts_stream_method(client):
+    """Streaming TTS call for the installed SDK: stream (2.x), convert_as_stream or convert (1.x)."""
+    tts = client.text_to_speech
+    return getattr(tts, "stream", None) or getattr(tts, "convert_as_stream", None) or tts.convert
 
 
-def generate_mp3(client: ElevenLabs, text: str, voice_id: str, model_id: str, out_path: Path, retries: int = 3) -> None:
-    """Generate an MP3 with simple retry logic."""
-    backoff = 2
+def generate_mp3(
+    client: ElevenLabs,
+    text: str,
+    voice_id: str,
+    model_id: str,
+    out_path: Path,
+    retries: int = 3,
+    rate_limiter: Optional[RateLimiter] = None,
+    concurrency: Optional[AdaptiveConcurrency] = None,
+) -> None:
+    """Generate an MP3 with simple retry logic.
+
+    Audio comes from the streaming endpoint so it lands on disk as it is
+    synthesized. Only failures before the first chunk are retried; a stream
+    that breaks part-way is fatal and its partial file is removed.
+
+    When shared rate_limiter/concurrency controllers are passed, each attempt
+    is paced to the RPM budget and counted against the AIMD in-flight window,
+    which shrinks whenever ElevenLabs throttles and regrows on success.
+    """
+    delay = RETRY_BASE_DELAY
     last_err = None
     for attempt in range(1, retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        if concurrency is not None:
+            concurrency.acquire()
+        throttled = False
         try:
-            audio = client.text_to_speech.convert(
-                text=text,
-                voice_id=voice_id,
-                model_id=model_id,
-                output_format="mp3_44100_128",
-            )
-            save_audio_stream_to_file(audio, out_path)
-            return
-        except Exception as e:  # noqa: BLE001 (broad to retry transient http)
-            last_err = e
-            if attempt < retries:
-                time.sleep(backoff)
-                backoff *= 2
+            try:
+                audio = iter(_tts_stream_method(client)(
+                    text=text,
+                    voice_id=voice_id,
+                    model_id=model_id,
+                    output_format="mp3_44100_128",
+                ))
+                # The request is only known to have succeeded once audio arrives
+                first = next(audio, b"")
+            except Exception as e:  # noqa: BLE001 (broad to retry transient http)
+                last_err = e
+                throttled = _is_throttled(e)
+                if attempt >= retries:
+                    raise last_err
             else:
-                raise last_err
+                try:
+                    save_audio_stream_to_file(itertools.chain((first,), audio), out_path)
+                except BaseException:
+                    out_path.unlink(missing_ok=True)
+                    raise
+                return
+        finally:
+            if concurrency is not None:
+                concurrency.release(throttled=throttled)
+        delay = next_retry_delay(last_err, delay, RETRY_BASE_DELAY)
+        time.sleep(delay)
 
 
-def find_targets(base_dir: Path):
-    for txt_name, mp3_name in TARGET_FILES:
-        for txt_path in base_dir.rglob(txt_name):
-            mp3_path = txt_path.parent / mp3_name
-            yield txt_path, mp3_path
+def find_targets(base_dir: Path, names: Optional[Iterable[str]] = None):
+    """Yield (txt_path, mp3_path) for every target text file under base_dir.
+
+    The tree is walked once with os.scandir, matching all target names in the
+    same pass. names restricts the walk to a subset of TARGET_NAMES.
+    """
+    wanted = TARGET_NAMES if names is None else {n: TARGET_NAMES[n] for n in names}
+    stack = [str(base_dir)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name in wanted:
+                        txt_path = Path(entry.path)
+                        yield txt_path, txt_path.parent / wanted[entry.name]
+        except OSError:
+            continue
 
 
 def main():
@@ -78,6 +167,10 @@ def main():
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing MP3 files")
     parser.add_argument("--only-hi", action="store_true", help="Process only Hindi files (final_text_hi.txt)")
     parser.add_argument("--only-en", action="store_true", help="Process only English files (final_text_en.txt)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Parallel TTS requests, clamped to 1-{MAX_CONCURRENCY} (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM,
+                        help=f"Maximum TTS requests per minute across all workers (default: {DEFAULT_RPM})")
     args = parser.parse_args()
 
     api_key = os.environ.get("ELEVENLABS_API_KEY")
@@ -92,33 +185,21 @@ def main():
         print(f"ERROR: Base directory not found: {base_dir}", file=sys.stderr)
         sys.exit(1)
 
-    total = 0
-    skipped = 0
-    generated = 0
-
-    for txt_path, mp3_path in find_targets(base_dir):
-        # Filter by language if requested
-        is_hi = (txt_path.name == "final_text_hi.txt")
-        if args.only_hi and not is_hi:
-            continue
-        if args.only_en and is_hi:
-            continue
-        total += 1
-        try:
-            if mp3_path.exists() and not args.overwrite:
-                skipped += 1
-                print(f"Skip (exists): {mp3_path}")
-                continue
-
-            text = txt_path.read_text(encoding="utf-8").strip()
-            if not text:
-                skipped += 1
-                print(f"Skip (empty text): {txt_path}")
-                continue
+    counts = {"total": 0, "skipped": 0, "generated": 0}
+    counts_lock = threading.Lock()
+    stop = threading.Event()
 
-            # Choose voice based on language file
-            voice_id = args.hi_voice_id if txt_path.name == "final_text_hi.txt" else args.voice_id
+    def bump(key: str) -> None:
+        with counts_lock:
+            counts[key] += 1
 
+    def process(txt_path: Path, mp3_path: Path, text: str) -> None:
+        # Quota hit by another worker: don't spend a request on this one
+        if stop.is_set():
+            return
+        # Choose voice based on language file
+        voice_id = args.hi_voice_id if txt_path.name == "final_text_hi.txt" else args.voice_id
+        try:
             print(f"Generating: {txt_path} -> {mp3_path}")
             generate_mp3(
                 client=client,
@@ -126,13 +207,48 @@ def main():
                 voice_id=voice_id,
                 model_id=args.model_id,
                 out_path=mp3_path,
+                rate_limiter=rate_limiter,
+                concurrency=adaptive,
             )
-            generated += 1
+            bump("generated")
         except Exception as e:  # noqa: BLE001
             print(f"ERROR processing {txt_path}: {e}", file=sys.stderr)
-            if "quota_exceeded" in str(e):
+            if "quota_exceeded" in str(e) and not stop.is_set():
+                stop.set()
                 print("Quota exceeded detected. Aborting further processing.", file=sys.stderr)
+
+    # Filter by language if requested
+    names = [
+        name for name in TARGET_NAMES
+        if not (args.only_hi and name != "final_text_hi.txt") and not (args.only_en and name == "final_text_hi.txt")
+    ]
+
+    concurrency = max(1, min(args.concurrency, MAX_CONCURRENCY))
+    rate_limiter = RateLimiter(max(1, args.rpm))
+    adaptive = AdaptiveConcurrency(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for txt_path, mp3_path in find_targets(base_dir, names):
+            if stop.is_set():
                 break
+            bump("total")
+            try:
+                if mp3_path.exists() and not args.overwrite:
+                    bump("skipped")
+                    print(f"Skip (exists): {mp3_path}")
+                    continue
+
+                text = txt_path.read_text(encoding="utf-8").strip()
+                if not text:
+                    bump("skipped")
+                    print(f"Skip (empty text): {txt_path}")
+                    continue
+            except Exception as e:  # noqa: BLE001
+                print(f"ERROR processing {txt_path}: {e}", file=sys.stderr)
+                continue
+
+            ex.submit(process, txt_path, mp3_path, text)
+
+    total, skipped, generated = counts["total"], counts["skipped"], counts["generated"]
 
     print("\nSummary:")
     print(f"- Total targets: {total}")
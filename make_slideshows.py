@@ -11,22 +11,40 @@ The script will:
 - Iterate pages in natural (zero-padded) order.
 - For each language, pair the image with the corresponding audio clip.
 - Set the slide duration to the audio duration.
-- Concatenate into one video per language and save at extracted/download/.
+- Encode each slide with ffmpeg and join the slides with the concat demuxer
+  into one video per language, saved at extracted/download/.
 
 Outputs:
 - extracted/download/english_slideshow.mp4
 - extracted/download/hindi_slideshow.mp4
 
-Requires: moviepy, imageio-ffmpeg
+Requires: ffmpeg (on PATH or via imageio-ffmpeg), Pillow
 """
 from __future__ import annotations
 
+import hashlib
+import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
-from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips
 from PIL import Image
+from tqdm import tqdm
+
+from utils.media import (
+    MUX_FFMPEG_THREADS, MUX_WORKERS, SEGMENT_AUDIO_ARGS, can_concat_copy, concat_videos, detect_hw_encoder,
+    encode_image_segment, encoder_video_args, get_ffprobe_exe, probe_duration
+)
+
+# Optional: OpenCV's SIMD resize is several times faster than Pillow's
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except Exception:
+    CV2_AVAILABLE = False
 
 
 ROOT = Path(__file__).resolve().parent
@@ -41,20 +59,109 @@ OUT_EN = DOWNLOAD_DIR / "english_slideshow.mp4"
 OUT_HI = DOWNLOAD_DIR / "hindi_slideshow.mp4"
 
 FPS = 24
-VIDEO_CODEC = "libx264"
-AUDIO_CODEC = "aac"
 
+# Encoded slides, named by a hash of their inputs, kept next to the slideshow
+# outputs so rebuilds only re-encode pages whose image or narration changed
+SEGMENT_CACHE_DIRNAME = "slide_cache"
 
-def resize_and_replace_image(image_path: Path, target_size: tuple[int, int]):
-    """Resizes an image to the target size and overwrites the original."""
+# slide_cache eviction: segments unused for this long go first, then the oldest
+# until the cache fits; segments used by the current build are always kept
+SEGMENT_CACHE_MAX_AGE = 14 * 24 * 3600  # seconds
+SEGMENT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# zlib level for resized PNGs (OpenCV path); low levels write much faster for little size cost
+PNG_COMPRESSION = 3
+
+# Pillow path uses bilinear instead of Lanczos when each side changes by at most this fraction
+NEAR_SIZE_TOLERANCE = 0.1
+
+# Sidecar marking an image as already at TARGET_IMAGE_SIZE (e.g. image_to_use.resized)
+RESIZED_SENTINEL_SUFFIX = ".resized"
+
+# (path, size) pairs resized or verified during this run
+_SIZED_IMAGES: set[tuple[str, tuple[int, int]]] = set()
+
+
+def _resize_with_cv2(image_path: Path, target_size: tuple[int, int]) -> bool:
+    """Resize with OpenCV. Returns False if OpenCV could not decode the image."""
+    img = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return False
+    height, width = img.shape[:2]
+    if (width, height) != target_size:
+        print(f"[INFO] Resizing {image_path.name} to {target_size}...")
+        # INTER_AREA is the anti-aliased choice for shrinking; Lanczos for enlarging
+        shrinking = target_size[0] * target_size[1] < width * height
+        interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LANCZOS4
+        resized = cv2.resize(img, target_size, interpolation=interpolation)
+        if not cv2.imwrite(str(image_path), resized, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION]):
+            raise OSError(f"cv2.imwrite failed for {image_path}")
+    return True
+
+
+def _is_near_size(size: tuple[int, int], target_size: tuple[int, int]) -> bool:
+    """True if both dimensions are within NEAR_SIZE_TOLERANCE of the target."""
+    return all(abs(s - t) <= t * NEAR_SIZE_TOLERANCE for s, t in zip(size, target_size))
+
+
+def _resize_image(image_path: Path, target_size: tuple[int, int]) -> None:
+    """Resize image_path in place to target_size; raises on failure."""
+    # Image.open only parses the header, so correctly sized images are never decoded
     try:
         with Image.open(image_path) as img:
-            if img.size != target_size:
-                print(f"[INFO] Resizing {image_path.name} to {target_size}...")
-                resized_img = img.resize(target_size, Image.Resampling.LANCZOS)
-                resized_img.save(image_path)
+            if img.size == target_size:
+                return
+    except Exception:
+        pass  # Let OpenCV try formats Pillow can't identify
+
+    if CV2_AVAILABLE and _resize_with_cv2(image_path, target_size):
+        return
+    with Image.open(image_path) as img:
+        if img.size != target_size:
+            print(f"[INFO] Resizing {image_path.name} to {target_size}...")
+            # JPEG can decode at a reduced scale, skipping most of the IDCT work
+            if image_path.suffix.lower() in (".jpg", ".jpeg"):
+                img.draft("RGB", target_size)
+            # Small rescales don't need Lanczos' wide kernel
+            resample = Image.Resampling.BILINEAR if _is_near_size(img.size, target_size) else Image.Resampling.LANCZOS
+            resized_img = img.resize(target_size, resample)
+            resized_img.save(image_path)
+
+
+def _sentinel_stamp(image_path: Path, target_size: tuple[int, int]) -> str:
+    """Sentinel contents for image_path at its current mtime: "<w>x<h> <mtime_ns>"."""
+    return f"{target_size[0]}x{target_size[1]} {image_path.stat().st_mtime_ns}"
+
+
+def resize_and_replace_image(image_path: Path, target_size: tuple[int, int]):
+    """Resizes an image to the target size and overwrites the original.
+
+    Images already handled are remembered in this process and in a sidecar
+    sentinel file next to the image (stamped with its size and mtime), so later
+    language passes and later runs skip them without opening the image.
+    """
+    key = (str(image_path), target_size)
+    if key in _SIZED_IMAGES:
+        return
+    sentinel = image_path.with_suffix(RESIZED_SENTINEL_SUFFIX)
+    try:
+        if sentinel.read_text(encoding="utf-8") == _sentinel_stamp(image_path, target_size):
+            _SIZED_IMAGES.add(key)
+            return
+    except OSError:
+        pass
+
+    try:
+        _resize_image(image_path, target_size)
     except Exception as e:
         print(f"[ERROR] Failed to resize image {image_path}: {e}")
+        return
+
+    _SIZED_IMAGES.add(key)
+    try:
+        sentinel.write_text(_sentinel_stamp(image_path, target_size), encoding="utf-8")
+    except OSError as e:
+        print(f"[WARN] Could not write resize sentinel {sentinel}: {e}")
 
 
 def get_pages(download_dir: Path) -> List[Path]:
@@ -65,12 +172,94 @@ def get_pages(download_dir: Path) -> List[Path]:
 DEFAULT_SLIDE_DURATION = 3  # seconds
 
 
+def _encode_settings() -> str:
+    """Everything besides the inputs that shapes a segment's streams: encoder, its arguments, size, rate."""
+    codec = detect_hw_encoder()
+    width, height = TARGET_IMAGE_SIZE
+    video_args = encoder_video_args(codec, [f"scale={width}:{height}"], still_image=True)
+    return "|".join([codec, *video_args, *SEGMENT_AUDIO_ARGS, str(FPS), str(DEFAULT_SLIDE_DURATION)])
+
+
+def _segment_key(img_path: Path, aud_path: Optional[Path], settings: str) -> str:
+    """Hash of a slide's image and audio bytes plus the encode settings."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in (img_path, aud_path):
+        if path is not None:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        digest.update(b"\x00")
+    digest.update(settings.encode())
+    return digest.hexdigest()
+
+
+def _prune_segment_cache(cache_dir: Path, keep: set[Path]) -> None:
+    """Evict stale or excess segments from the slide cache, never touching those in keep."""
+    now = time.time()
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, Path(entry.path)))
+    entries.sort()  # oldest first
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in entries:
+        if path in keep:
+            continue
+        if now - mtime > SEGMENT_CACHE_MAX_AGE or total > SEGMENT_CACHE_MAX_BYTES:
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+
+def _encode_slide(img_path: Path, aud_path: Optional[Path], cache_dir: Path, settings: str) -> Path:
+    """
+    Return the cached segment for a slide, encoding it first on a cache miss.
+
+    Falls back to a silent default-length slide if the audio can't be used.
+    """
+    # ffprobe only parses the container header (and its result is reused by the
+    # encode), so unreadable narration is caught without a failed ffmpeg run
+    if aud_path is not None and get_ffprobe_exe() and not probe_duration(aud_path):
+        print(f"[WARN] Failed to load audio {aud_path}, using default duration: no readable duration")
+        aud_path = None
+    for audio in ([aud_path, None] if aud_path is not None else [None]):
+        segment_path = cache_dir / f"{_segment_key(img_path, audio, settings)}.mp4"
+        if segment_path.exists():
+            # Refresh the mtime so eviction treats it as recently used
+            os.utime(segment_path)
+            return segment_path
+        # Unique temp name: the same slide may be encoded by two workers at once
+        tmp_path = cache_dir / f"{segment_path.stem}.{threading.get_ident()}.tmp.mp4"
+        try:
+            encode_image_segment(
+                img_path, audio, tmp_path,
+                TARGET_IMAGE_SIZE, duration=DEFAULT_SLIDE_DURATION, fps=FPS, threads=MUX_FFMPEG_THREADS
+            )
+            tmp_path.replace(segment_path)
+            return segment_path
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            if audio is None:
+                raise
+            print(f"[WARN] Failed to load audio {aud_path}, using default duration: {e}")
+
+
 def build_language_slideshow(
     pages: List[Path], audio_filename: str, out_path: Path, force_all_pages: bool = False
 ) -> None:
-    clips = []
     skipped_pages = 0
+    cache_dir = out_path.parent / SEGMENT_CACHE_DIRNAME
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    settings = _encode_settings()
 
+    # (page, image, audio or None for a silent slide) in slideshow order
+    jobs: List[Tuple[Path, Path, Optional[Path]]] = []
     for page in pages:
         img_path = page / IMAGE_NAME
         aud_path = page / audio_filename
@@ -83,68 +272,52 @@ def build_language_slideshow(
         # Resize the image before creating the clip
         resize_and_replace_image(img_path, TARGET_IMAGE_SIZE)
 
-        audio_clip = None
-        duration = DEFAULT_SLIDE_DURATION
-
         has_audio = aud_path.exists() and aud_path.stat().st_size > 0
 
-        if has_audio:
-            try:
-                audio_clip = AudioFileClip(str(aud_path))
-                duration = audio_clip.duration
-            except Exception as e:
-                print(f"[WARN] Failed to load audio {aud_path}, using default duration: {e}")
-        elif force_all_pages:
-            print(f"[INFO] Missing or empty audio for {aud_path}, using default duration.")
-        else:
-            print(f"[WARN] Missing or empty audio, skipping page: {aud_path}")
-            skipped_pages += 1
-            continue
-
-        try:
-            img_clip = ImageClip(str(img_path)).set_duration(duration)
-            if audio_clip:
-                img_clip = img_clip.set_audio(audio_clip)
-            img_clip = img_clip.set_fps(FPS)
-            clips.append(img_clip)
-        except Exception as e:
-            print(f"[WARN] Failed to build clip for page {page.name}: {e}")
-            skipped_pages += 1
-            continue
-
-    # Test: Verify that the number of clips matches the expected number of pages.
-    expected_clips = len(pages) - skipped_pages
-    if len(clips) != expected_clips:
-        print(f"[ERROR] Clip count mismatch! Expected {expected_clips}, but found {len(clips)}.")
-        # Clean up any created clips before exiting
-        for c in clips:
-            if c: c.close()
-        return
-
-    if not clips:
+        if not has_audio:
+            if force_all_pages:
+                print(f"[INFO] Missing or empty audio for {aud_path}, using default duration.")
+            else:
+                print(f"[WARN] Missing or empty audio, skipping page: {aud_path}")
+                skipped_pages += 1
+                continue
+
+        jobs.append((page, img_path, aud_path if has_audio else None))
+
+    # Slides are independent encodes; each ffmpeg is capped at MUX_FFMPEG_THREADS
+    # so MUX_WORKERS of them together fill the cores without oversubscribing
+    segments: List[Optional[Path]] = [None] * len(jobs)
+    if jobs:
+        with ThreadPoolExecutor(max_workers=min(MUX_WORKERS, len(jobs))) as executor:
+            futures = {
+                executor.submit(_encode_slide, img_path, aud_path, cache_dir, settings): i
+                for i, (_, img_path, aud_path) in enumerate(jobs)
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc=f"Encoding {audio_filename} slides"):
+                i = futures[future]
+                try:
+                    segments[i] = future.result()
+                except Exception as e:
+                    print(f"[WARN] Failed to build clip for page {jobs[i][0].name}: {e}")
+                    skipped_pages += 1
+
+    segments = [segment for segment in segments if segment is not None]
+    if not segments:
         print(f"[ERROR] No valid clips for {audio_filename}. Nothing to render.")
         return
 
-    try:
-        final = concatenate_videoclips(clips, method="compose")
-        # Write the video file
-        print(f"[INFO] Writing video: {out_path}")
-        final.write_videofile(
-            str(out_path),
-            fps=FPS,
-            codec=VIDEO_CODEC,
-            audio_codec=AUDIO_CODEC,
-            threads=2,
-            temp_audiofile=str(out_path.with_suffix('.temp-audio.m4a')),
-            remove_temp=True,
-        )
-    finally:
-        # Close clips to release resources
-        for c in clips:
-            try:
-                c.close()
-            except Exception:
-                pass
+    # Cached segments normally share one encoding and join packet-for-packet;
+    # re-encode the join if any of them differ
+    print(f"[INFO] Writing video: {out_path}")
+    if can_concat_copy(segments):
+        try:
+            concat_videos(segments, out_path)
+        except Exception as e:
+            print(f"[WARN] Concat stream copy failed, re-encoding: {e}")
+            concat_videos(segments, out_path, copy_streams=False)
+    else:
+        concat_videos(segments, out_path, copy_streams=False)
+    _prune_segment_cache(cache_dir, set(segments))
 
     if skipped_pages:
         print(f"[INFO] Completed with {skipped_pages} skipped pages for {audio_filename}.")
@@ -19,14 +19,19 @@ Requirements:
 from __future__ import annotations
 
 import argparse
+import functools
 import os
+import re
 import time
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Deque, List, Optional, Tuple
 
 from tqdm import tqdm
 
+from utils.retry import next_retry_delay
+
 try:
     import google.generativeai as genai
     GENAI_AVAILABLE = True
@@ -83,7 +88,14 @@ def list_pages(pdf_dir: Path) -> List[PageItem]:
     return pages
 
 
+_initialized = False
+
+
 def _ensure_gemini_ready() -> None:
+    """Configure the Gemini SDK once per process."""
+    global _initialized
+    if _initialized:
+        return
     if not GENAI_AVAILABLE:
         raise RuntimeError("google-generativeai package not installed. Please `pip install -r requirements.txt`.")
     import google.generativeai as genai
@@ -91,6 +103,171 @@ def _ensure_gemini_ready() -> None:
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY is not set in environment.")
     genai.configure(api_key=api_key)
+    _initialized = True
+
+
+# Instructions shared by the single-page and batched prompts
+_SYSTEM_PROMPT = (
+    "You are a helpful writing assistant for high-octane storybooks.\n"
+    "- Audience: children aged 15-25.\n"
+    "- Keep language simple, friendly, and high-octane engaging.\n"
+    "- Avoid difficult vocabulary.\n"
+    "- Preserve core meaning but simplify.\n"
+    "- Maintain coherence within the page.\n"
+    "- 2 short sentences max.\n"
+    "- Ensure narrative continuity from previous pages.\n"
+    "- Use respectful pronouns for deities and gods (e.g., 'He/Him/His' capitalized, 'They/Them/Their' capitalized).\n"
+    "- In Hindi, use respectful forms like 'वे', 'उन्होंने', 'उनका' for deities.\n"
+)
+
+_SPEECH_CONTROLS = (
+    "TEXTUAL CONTROLS FOR SPEECH (use these to enhance audio narration):\n"
+    "- Timed Pauses: Use new line for pauses (up to 3)."
+    "- Emphasis: Use ALL CAPS for strong vocal emphasis. Example: This is URGENT!\n"
+    "- Hesitation: Use ellipsis (...) for pauses and uncertainty. Example: I'm not sure... maybe later?\n"
+    "- Pacing: Use punctuation (comma, period, em-dash —) naturally for flow.\n"
+    "- Sentence Length: Vary sentence length—short for impact, longer for flow.\n\n"
+)
+
+# (category, threshold) pairs; a tuple so it can key the model cache
+_SAFETY_SETTINGS = (
+    ("HARM_CATEGORY_HARASSMENT", "BLOCK_NONE"),
+    ("HARM_CATEGORY_HATE_SPEECH", "BLOCK_NONE"),
+    ("HARM_CATEGORY_SEXUALLY_EXPLICIT", "BLOCK_NONE"),
+    ("HARM_CATEGORY_DANGEROUS_CONTENT", "BLOCK_NONE"),
+)
+
+# Pages rewritten per Gemini request by process_pdf_dir
+DEFAULT_BATCH_SIZE = 8
+
+# Continuity context: the last CONTEXT_RECENT_PAGES pages are sent verbatim; once
+# CONTEXT_SUMMARY_EVERY pages have piled up, the older ones are folded into a
+# rolling summary so the prompt stays the same size however long the book is
+CONTEXT_RECENT_PAGES = 5
+CONTEXT_SUMMARY_EVERY = 10
+
+# Upper bound on verbatim previous-page text, in characters
+MAX_CONTEXT_CHARS = 8000
+
+# Output token budget per page; batched requests scale it by page count
+MAX_OUTPUT_TOKENS_PER_PAGE = 2048
+
+_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": MAX_OUTPUT_TOKENS_PER_PAGE,
+}
+
+# "[P3]" marker lines that open each page's section in a batched response
+_PAGE_MARKER_RE = re.compile(r"^\s*\[P(\d+)\]\s*$", re.MULTILINE)
+
+# An [EN]/[HI] tag line and the block after it, up to the next tag line or the end
+_TAG_RE = re.compile(r"^[ \t]*\[(EN|HI)\][ \t]*(?:\r?\n|\Z)(.*?)(?=^[ \t]*\[(?:EN|HI)\][ \t]*\r?$|\Z)", re.MULTILINE | re.DOTALL)
+
+# Any complete [EN]/[HI]/[P<i>] tag line, used to stop streaming once the requested blocks are done
+_TAG_LINE_RE = re.compile(r"^[ \t]*\[(?:EN|HI|P\d+)\][ \t]*\r?\n", re.MULTILINE)
+
+
+def _context_section(whole_story: Optional[str], previous_pages: Optional[str]) -> str:
+    context_section = ""
+    if whole_story:
+        context_section += f"\n--- FULL STORY CONTEXT (for reference) ---\n{whole_story}\n\n"
+
+    if previous_pages:
+        context_section += f"--- STORY SO FAR (previous pages narration) ---\n{previous_pages}\n\n"
+    return context_section
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(name: str, safety_settings: Tuple[Tuple[str, str], ...] = _SAFETY_SETTINGS):
+    """Build the Gemini model once per (name, safety settings) instead of on every request."""
+    _ensure_gemini_ready()
+    import google.generativeai as genai
+    return genai.GenerativeModel(
+        name,
+        safety_settings=[{"category": category, "threshold": threshold} for category, threshold in safety_settings],
+    )
+
+
+def _generate_text(
+    model: str,
+    prompt: str,
+    page_text: str,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS_PER_PAGE,
+    expected_tags: Optional[int] = None
+) -> str:
+    """
+    Run one streamed Gemini request and return its text, raising on blocked or empty responses.
+
+    When expected_tags is given, streaming stops as soon as a tag line beyond
+    that many appears: every expected block is then complete and anything
+    further is the model running on past the requested format.
+    """
+    generation_config = _GENERATION_CONFIG
+    if max_output_tokens != MAX_OUTPUT_TOKENS_PER_PAGE:
+        generation_config = {**_GENERATION_CONFIG, "max_output_tokens": max_output_tokens}
+    resp = _get_model(model).generate_content(prompt, generation_config=generation_config, stream=True)
+
+    parts: List[str] = []
+    for chunk in resp:
+        # Check if prompt was blocked
+        if hasattr(chunk, 'prompt_feedback'):
+            feedback = chunk.prompt_feedback
+            if hasattr(feedback, 'block_reason') and feedback.block_reason:
+                # Log the specific reason and try to provide helpful info
+                block_reason = feedback.block_reason
+                safety_ratings = getattr(feedback, 'safety_ratings', [])
+                error_msg = f"Prompt blocked: {block_reason}"
+                if safety_ratings:
+                    error_msg += f", ratings: {safety_ratings}"
+                raise RuntimeError(error_msg)
+
+        # Try to get text, handle blocking gracefully
+        try:
+            text = chunk.text
+        except (ValueError, AttributeError) as e:
+            # A trailing chunk with no parts just ends a response that already has text
+            if parts:
+                break
+            # Response was blocked after generation
+            if hasattr(chunk, 'candidates') and chunk.candidates:
+                candidate = chunk.candidates[0]
+                finish_reason = getattr(candidate, 'finish_reason', 'UNKNOWN')
+                safety_ratings = getattr(candidate, 'safety_ratings', [])
+
+                # Provide helpful debug info
+                error_msg = f"Response blocked: finish_reason={finish_reason}"
+                if safety_ratings:
+                    error_msg += f"\nSafety ratings: {safety_ratings}"
+                else:
+                    error_msg += "\nNo safety ratings available (likely prompt-level block)"
+
+                # If it's a safety block, suggest next steps
+                if finish_reason == 1:  # SAFETY
+                    error_msg += f"\n\nPage text that triggered block:\n{page_text[:200]}..."
+
+                raise RuntimeError(error_msg)
+            raise RuntimeError(f"Unable to access response text: {str(e)}")
+
+        parts.append(text)
+        if expected_tags is not None:
+            full = "".join(parts)
+            tags = list(_TAG_LINE_RE.finditer(full))
+            if len(tags) > expected_tags:
+                parts = [full[:tags[expected_tags].start()]]
+                break
+
+    full = "".join(parts).strip()
+    if not full:
+        raise RuntimeError("Empty response from Gemini")
+    return full
+
+
+def _parse_dual(full: str) -> Tuple[str, str]:
+    """Split a "[EN] ... [HI] ..." response into (en_text, hi_text); either may be empty."""
+    matches = {m.group(1): m.group(2).strip() for m in _TAG_RE.finditer(full)}
+    return matches.get("EN", ""), matches.get("HI", "")
 
 
 def _call_gemini_dual(
@@ -110,148 +287,33 @@ def _call_gemini_dual(
         whole_story: Optional full story context for overall understanding
         previous_pages: Optional text from all previous pages for continuity
         max_retries: Number of retry attempts
-        retry_delay: Delay between retries
+        retry_delay: Base delay between retries; grows with jitter, or follows the server's retry hint
     
     Returns:
         (en_text, hi_text)
     """
     _ensure_gemini_ready()
-    import google.generativeai as genai
     last_err: Optional[Exception] = None
-    system = (
-        "You are a helpful writing assistant for high-octane storybooks.\n"
-        "- Audience: children aged 15-25.\n"
-        "- Keep language simple, friendly, and high-octane engaging.\n"
-        "- Avoid difficult vocabulary.\n"
-        "- Preserve core meaning but simplify.\n"
-        "- Maintain coherence within the page.\n"
-        "- 2 short sentences max.\n"
-        "- Ensure narrative continuity from previous pages.\n"
-        "- Use respectful pronouns for deities and gods (e.g., 'He/Him/His' capitalized, 'They/Them/Their' capitalized).\n"
-        "- In Hindi, use respectful forms like 'वे', 'उन्होंने', 'उनका' for deities.\n"
-    )
-    
-    # Build context section
-    context_section = ""
-    if whole_story:
-        context_section += f"\n--- FULL STORY CONTEXT (for reference) ---\n{whole_story}\n\n"
-    
-    if previous_pages:
-        context_section += f"--- STORY SO FAR (previous pages narration) ---\n{previous_pages}\n\n"
-    
     user = (
         "Rewrite the following text into two versions for a simple high-octane storybook (age 15-25):\n"
         "1) English (simple narration). 2 short sentences max.\n"
         "2) Simple colloquial Hindi in Devanagari script (हिन्दी), easy words and 2 short sentences max.\n\n"
         "IMPORTANT: Maintain narrative flow and continuity from the previous pages.\n"
         "Use the story context to understand the overall plot, and the previous pages to continue smoothly.\n\n"
-        "TEXTUAL CONTROLS FOR SPEECH (use these to enhance audio narration):\n"
-        "- Timed Pauses: Use new line for pauses (up to 3)."
-        "- Emphasis: Use ALL CAPS for strong vocal emphasis. Example: This is URGENT!\n"
-        "- Hesitation: Use ellipsis (...) for pauses and uncertainty. Example: I'm not sure... maybe later?\n"
-        "- Pacing: Use punctuation (comma, period, em-dash —) naturally for flow.\n"
-        "- Sentence Length: Vary sentence length—short for impact, longer for flow.\n\n"
-        f"{context_section}"
+        f"{_SPEECH_CONTROLS}"
+        f"{_context_section(whole_story, previous_pages)}"
         "Return output exactly in this format (no extra commentary):\n"
         "[EN]\n<english text>\n\n[HI]\n<hindi text>\n\n"
         f"--- CURRENT PAGE TEXT TO REWRITE ---\n{page_text}"
     )
+    # Simplify the prompt format - don't use SYSTEM/USER labels
+    # Just provide the instructions directly
+    combined_prompt = f"{_SYSTEM_PROMPT}\n\n{user}"
+    delay = retry_delay
     for attempt in range(1, max_retries + 1):
         try:
-            # Configure safety settings using the correct format
-            # Use list of dicts with 'category' and 'threshold' keys
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
-            
-            # Simplify the prompt format - don't use SYSTEM/USER labels
-            # Just provide the instructions directly
-            combined_prompt = f"{system}\n\n{user}"
-            
-            model_obj = genai.GenerativeModel(model)
-            resp = model_obj.generate_content(
-                combined_prompt,
-                safety_settings=safety_settings,
-                generation_config={
-                    "temperature": 0.7,
-                    "top_p": 0.95,
-                    "top_k": 40,
-                    "max_output_tokens": 2048,
-                }
-            )
-            
-            # Check if prompt was blocked
-            if hasattr(resp, 'prompt_feedback'):
-                feedback = resp.prompt_feedback
-                if hasattr(feedback, 'block_reason') and feedback.block_reason:
-                    # Log the specific reason and try to provide helpful info
-                    block_reason = feedback.block_reason
-                    safety_ratings = getattr(feedback, 'safety_ratings', [])
-                    error_msg = f"Prompt blocked: {block_reason}"
-                    if safety_ratings:
-                        error_msg += f", ratings: {safety_ratings}"
-                    raise RuntimeError(error_msg)
-            
-            # Try to get text, handle blocking gracefully
-            try:
-                full = resp.text.strip()
-            except (ValueError, AttributeError) as e:
-                # Response was blocked after generation
-                if hasattr(resp, 'candidates') and resp.candidates:
-                    candidate = resp.candidates[0]
-                    finish_reason = getattr(candidate, 'finish_reason', 'UNKNOWN')
-                    safety_ratings = getattr(candidate, 'safety_ratings', [])
-                    
-                    # Provide helpful debug info
-                    error_msg = f"Response blocked: finish_reason={finish_reason}"
-                    if safety_ratings:
-                        error_msg += f"\nSafety ratings: {safety_ratings}"
-                    else:
-                        error_msg += "\nNo safety ratings available (likely prompt-level block)"
-                    
-                    # If it's a safety block, suggest next steps
-                    if finish_reason == 1:  # SAFETY
-                        error_msg += f"\n\nPage text that triggered block:\n{page_text[:200]}..."
-                    
-                    raise RuntimeError(error_msg)
-                raise RuntimeError(f"Unable to access response text: {str(e)}")
-            
-            if not full:
-                raise RuntimeError("Empty response from Gemini")
-            # Parse blocks
-            en_text = ""
-            hi_text = ""
-            # Normalize line endings
-            lines = full.replace("\r\n", "\n").split("\n")
-            current = None
-            buf: List[str] = []
-            def flush():
-                nonlocal en_text, hi_text, buf, current
-                text = "\n".join(buf).strip()
-                if current == "EN":
-                    en_text = text
-                elif current == "HI":
-                    hi_text = text
-                buf = []
-            for ln in lines:
-                tag = ln.strip()
-                if tag == "[EN]":
-                    if current is not None:
-                        flush()
-                    current = "EN"
-                    buf = []
-                elif tag == "[HI]":
-                    if current is not None:
-                        flush()
-                    current = "HI"
-                    buf = []
-                else:
-                    buf.append(ln)
-            if current is not None:
-                flush()
+            full = _generate_text(model, combined_prompt, page_text, expected_tags=2)
+            en_text, hi_text = _parse_dual(full)
             if not en_text or not hi_text:
                 # Fallback: if tags missing, split halfway heuristically (rare)
                 half = len(full) // 2
@@ -260,11 +322,164 @@ def _call_gemini_dual(
             return en_text.strip(), hi_text.strip()
         except Exception as e:
             last_err = e
-            time.sleep(retry_delay * attempt)
+            if attempt < max_retries:
+                delay = next_retry_delay(e, delay, retry_delay)
+                time.sleep(delay)
     raise RuntimeError(f"Gemini request failed after {max_retries} retries: {last_err}")
 
 
-def process_pdf_dir(pdf_dir: Path, model: str, force: bool = False, skip_missing: bool = False) -> None:
+def _call_gemini_batch(
+    model: str,
+    page_texts: List[str],
+    whole_story: Optional[str] = None,
+    previous_pages: Optional[str] = None,
+    max_retries: int = 3,
+    retry_delay: float = 2.0
+) -> Optional[List[Tuple[str, str]]]:
+    """
+    Rewrite several consecutive pages in one Gemini call.
+
+    The story context and previous narration are sent once for the whole
+    batch, and each page's output is tagged "[P<i>]" followed by the usual
+    [EN]/[HI] blocks.
+
+    Args:
+        model: Gemini model name
+        page_texts: Texts of consecutive pages to rewrite, in story order
+        whole_story: Optional full story context for overall understanding
+        previous_pages: Optional narration of the pages before this batch
+        max_retries: Number of retry attempts
+        retry_delay: Base delay between retries; grows with jitter, or follows the server's retry hint
+
+    Returns:
+        One (en_text, hi_text) per page, or None if the request kept failing
+        or the response could not be split into every page (callers then fall
+        back to _call_gemini_dual per page).
+    """
+    _ensure_gemini_ready()
+    count = len(page_texts)
+    pages_section = "".join(
+        f"--- PAGE P{i} TEXT TO REWRITE ---\n{text}\n\n" for i, text in enumerate(page_texts, 1)
+    )
+    user = (
+        f"Rewrite each of the following {count} consecutive pages into two versions for a simple high-octane storybook (age 15-25):\n"
+        "1) English (simple narration). 2 short sentences max.\n"
+        "2) Simple colloquial Hindi in Devanagari script (हिन्दी), easy words and 2 short sentences max.\n\n"
+        "IMPORTANT: Maintain narrative flow and continuity from the previous pages and between these pages.\n"
+        "Use the story context to understand the overall plot, and the previous pages to continue smoothly.\n\n"
+        f"{_SPEECH_CONTROLS}"
+        f"{_context_section(whole_story, previous_pages)}"
+        f"Produce output for pages P1..P{count}. Return output exactly in this format for every page, in order (no extra commentary):\n"
+        "[P<i>]\n[EN]\n<english text>\n\n[HI]\n<hindi text>\n\n"
+        f"{pages_section}"
+    )
+    combined_prompt = f"{_SYSTEM_PROMPT}\n\n{user}"
+    delay = retry_delay
+    for attempt in range(1, max_retries + 1):
+        try:
+            full = _generate_text(
+                model,
+                combined_prompt,
+                page_texts[0],
+                max_output_tokens=MAX_OUTPUT_TOKENS_PER_PAGE * count,
+                expected_tags=3 * count,
+            )
+        except Exception as e:
+            print(f"  - Batched rewrite attempt {attempt} failed: {e}")
+            if attempt < max_retries:
+                delay = next_retry_delay(e, delay, retry_delay)
+                time.sleep(delay)
+            continue
+
+        # Slice the response at each [P<i>] marker; every page needs both languages
+        sections = {}
+        markers = list(_PAGE_MARKER_RE.finditer(full))
+        for m, nxt in zip(markers, markers[1:] + [None]):
+            body = full[m.end():nxt.start() if nxt else len(full)]
+            sections[int(m.group(1))] = _parse_dual(body)
+        results = [sections.get(i, ("", "")) for i in range(1, count + 1)]
+        if all(en and hi for en, hi in results):
+            return results
+        print(f"  - Batched rewrite response missing pages ({len(sections)}/{count} parsed); falling back to per-page")
+        return None
+    return None
+
+
+def _summarize_story_so_far(model: str, summary: str, pages: List[str]) -> Optional[str]:
+    """Fold narrated pages into the rolling summary. Returns None if Gemini fails."""
+    _ensure_gemini_ready()
+    prompt = (
+        "Summarize the story so far for a narrator who must continue it smoothly.\n"
+        "Keep the main characters, where they are, and what just happened. "
+        "Plain prose, at most 150 words, no commentary.\n\n"
+        + (f"--- EARLIER SUMMARY ---\n{summary}\n\n" if summary else "")
+        + "--- PAGES SINCE THEN ---\n" + "\n\n".join(pages)
+    )
+    try:
+        return _generate_text(model, prompt, pages[0])
+    except Exception as e:
+        print(f"  - Story-so-far summary failed, keeping pages verbatim: {e}")
+        return None
+
+
+class _RollingContext:
+    """Previous-page narration for continuity: a rolling summary plus the latest pages verbatim."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.summary = ""
+        self.recent: Deque[str] = deque()
+        self._recent_chars = 0
+        # Last rendered context; None when a page was added since
+        self._rendered: Optional[str] = None
+
+    def add(self, page: PageItem, en_text: str) -> None:
+        entry = f"[Page {page.index}] {en_text}"
+        self.recent.append(entry)
+        self._recent_chars += len(entry)
+        # Hard cap for when summaries keep failing: drop the oldest pages
+        while self._recent_chars > MAX_CONTEXT_CHARS and len(self.recent) > 1:
+            self._recent_chars -= len(self.recent.popleft())
+        self._rendered = None
+
+    def render(self) -> Optional[str]:
+        """Context for the next request, summarizing older pages first if enough have piled up."""
+        if self._rendered is not None:
+            return self._rendered or None
+        # Summarized lazily so resuming a finished folder costs no extra requests
+        if len(self.recent) >= CONTEXT_SUMMARY_EVERY:
+            older = list(self.recent)[:-CONTEXT_RECENT_PAGES]
+            summary = _summarize_story_so_far(self.model, self.summary, older)
+            if summary:
+                self.summary = summary
+                for _ in older:
+                    self._recent_chars -= len(self.recent.popleft())
+        parts = ([f"[Summary of earlier pages] {self.summary}"] if self.summary else []) + list(self.recent)
+        self._rendered = "\n\n".join(parts)
+        return self._rendered or None
+
+
+def _read_source_text(page: PageItem, skip_missing: bool) -> Optional[str]:
+    """Return the text to rewrite for page, or None if it has none."""
+    if page.input_path.exists():
+        return page.input_path.read_text(encoding="utf-8", errors="ignore")
+    if skip_missing:
+        return None
+    # If missing, try to fall back to raw text.txt
+    raw_fallback = page.path / "text.txt"
+    if not raw_fallback.exists():
+        print(f"  - Missing input for {page.path}")
+        return None
+    return raw_fallback.read_text(encoding="utf-8", errors="ignore")
+
+
+def process_pdf_dir(
+    pdf_dir: Path,
+    model: str,
+    force: bool = False,
+    skip_missing: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> None:
     pages = list_pages(pdf_dir)
     if not pages:
         print(f"No pages found in {pdf_dir}")
@@ -276,51 +491,67 @@ def process_pdf_dir(pdf_dir: Path, model: str, force: bool = False, skip_missing
     if whole_story_file.exists():
         whole_story = whole_story_file.read_text(encoding="utf-8", errors="ignore")
     
-    # Accumulate previous pages for continuity
-    previous_pages_en = []
-    previous_pages_hi = []
-    
-    for page in tqdm(pages, desc=f"Rewriting for kids in {pdf_dir.name}"):
-        if not page.input_path.exists():
-            if skip_missing:
-                continue
-            else:
-                # If missing, try to fall back to raw text.txt
-                raw_fallback = page.path / "text.txt"
-                if not raw_fallback.exists():
-                    print(f"  - Missing input for {page.path}")
-                    continue
-                src_text = raw_fallback.read_text(encoding="utf-8", errors="ignore")
+    # Previous pages' English narration for continuity
+    previous = _RollingContext(model)
+
+    # Consecutive pages still to rewrite, sent together in one request
+    pending: List[Tuple[PageItem, str]] = []
+
+    def save(page: PageItem, en_text: str, hi_text: str) -> None:
+        page.out_en_path.write_text(en_text, encoding="utf-8")
+        page.out_hi_path.write_text(hi_text, encoding="utf-8")
+
+        # Add to previous pages for next iteration
+        previous.add(page, en_text)
+
+    def flush_pending() -> None:
+        if not pending:
+            return
+        # Build context from previous pages
+        prev_context = previous.render()
+
+        results = None
+        if len(pending) > 1:
+            results = _call_gemini_batch(
+                model,
+                [text for _, text in pending],
+                whole_story=whole_story,
+                previous_pages=prev_context
+            )
+        if results is not None:
+            for (page, _), (en_text, hi_text) in zip(pending, results):
+                save(page, en_text, hi_text)
         else:
-            src_text = page.input_path.read_text(encoding="utf-8", errors="ignore")
+            for page, src_text in pending:
+                prev_context = previous.render()
+                # Generate with context
+                en_text, hi_text = _call_gemini_dual(
+                    model, 
+                    src_text,
+                    whole_story=whole_story,
+                    previous_pages=prev_context
+                )
+                save(page, en_text, hi_text)
+        pending.clear()
+
+    for page in tqdm(pages, desc=f"Rewriting for kids in {pdf_dir.name}"):
+        src_text = _read_source_text(page, skip_missing)
+        if src_text is None:
+            continue
 
         if (not force) and page.out_en_path.exists() and page.out_hi_path.exists():
+            # Pending pages come first in the story, so rewrite them before this one
+            flush_pending()
             # Already done - load existing text for continuity
             existing_en = page.out_en_path.read_text(encoding="utf-8", errors="ignore")
-            existing_hi = page.out_hi_path.read_text(encoding="utf-8", errors="ignore")
-            previous_pages_en.append(f"[Page {page.index}] {existing_en}")
-            previous_pages_hi.append(f"[Page {page.index}] {existing_hi}")
+            previous.add(page, existing_en)
             continue
 
-        # Build context from previous pages
-        prev_context = None
-        if previous_pages_en:
-            prev_context = "\n\n".join(previous_pages_en)
-        
-        # Generate with context
-        en_text, hi_text = _call_gemini_dual(
-            model, 
-            src_text,
-            whole_story=whole_story,
-            previous_pages=prev_context
-        )
-        
-        page.out_en_path.write_text(en_text, encoding="utf-8")
-        page.out_hi_path.write_text(hi_text, encoding="utf-8")
-        
-        # Add to previous pages for next iteration
-        previous_pages_en.append(f"[Page {page.index}] {en_text}")
-        previous_pages_hi.append(f"[Page {page.index}] {hi_text}")
+        pending.append((page, src_text))
+        if len(pending) >= max(1, batch_size):
+            flush_pending()
+
+    flush_pending()
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -330,6 +561,7 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--model", type=str, default=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"), help="Gemini model name to use")
     parser.add_argument("--force", action="store_true", help="Rewrite even if final_text files already exist")
     parser.add_argument("--skip_missing", action="store_true", help="Skip pages without clean_text.txt instead of falling back to text.txt")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE, help="Pages rewritten per Gemini request (1 disables batching)")
     args = parser.parse_args(argv)
 
     root = args.root_dir.resolve()
@@ -343,6 +575,7 @@ def main(argv: list[str] | None = None) -> int:
     if not os.getenv("GEMINI_API_KEY"):
         print("GEMINI_API_KEY is not set in environment.")
         return 1
+    _ensure_gemini_ready()
 
     pdf_dirs = list_pdf_dirs(root)
     if args.only:
@@ -356,7 +589,7 @@ def main(argv: list[str] | None = None) -> int:
     print(f"Found {len(pdf_dirs)} folder(s) under {root}")
     for d in pdf_dirs:
         print(f"Processing folder: {d.name}")
-        process_pdf_dir(d, model=args.model, force=args.force, skip_missing=args.skip_missing)
+        process_pdf_dir(d, model=args.model, force=args.force, skip_missing=args.skip_missing, batch_size=args.batch_size)
 
     print("Done.")
     return 0
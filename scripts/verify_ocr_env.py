@@ -9,36 +9,91 @@ Prints availability of:
 Exit code 0 even if something is missing (informational).
 """
 from __future__ import annotations
-import shutil, subprocess, sys
+import importlib, importlib.util, json, os, shutil, subprocess, sys
+from importlib import metadata
+from pathlib import Path
+
+# Results of the slow checks (tesseract --version, package imports), each stored with a key
+# describing what was checked, so warm runs skip them until that key changes
+CACHE_FILE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "vedic-clock" / "ocr-env.json"
+
+try:
+    cache = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+except (OSError, ValueError):
+    cache = {}
+cache_dirty = False
+
+
+def cached(name: str, key: str | None) -> str | None:
+    """Stored result for name if it was recorded under the same key."""
+    entry = cache.get(name)
+    if key and isinstance(entry, dict) and entry.get("key") == key:
+        return entry.get("value")
+    return None
+
+
+def remember(name: str, key: str | None, value: str) -> None:
+    global cache_dirty
+    if key:
+        cache[name] = {"key": key, "value": value}
+        cache_dirty = True
+
+
+def file_key(path: str | None) -> str | None:
+    """path|mtime|size, or None if path can't be stat'ed."""
+    try:
+        st = os.stat(path)
+        return f"{path}|{st.st_mtime_ns}|{st.st_size}"
+    except (OSError, TypeError):
+        return None
+
 
 report = []
 
 # Tesseract binary
 path = shutil.which("tesseract")
 if path:
-    try:
-        proc = subprocess.run(["tesseract", "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=5)
-        version_info = proc.stdout.splitlines()[0] if proc.stdout else "(no output)"
-    except Exception as e:
-        version_info = f"error reading version: {e}" 
+    cache_key = file_key(path)
+    version_info = cached("tesseract", cache_key)
+    if version_info is None:
+        try:
+            proc = subprocess.run([path, "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=5)
+            version_info = proc.stdout.splitlines()[0] if proc.stdout else "(no output)"
+            if proc.returncode == 0:
+                remember("tesseract", cache_key, version_info)
+        except Exception as e:
+            version_info = f"error reading version: {e}"
     report.append(f"tesseract: FOUND at {path} | {version_info}")
 else:
     report.append("tesseract: NOT FOUND (install required for OCR fallback)")
 
-# Pillow
-try:
-    import PIL
-    from PIL import Image
-    report.append(f"Pillow: FOUND version {PIL.__version__}")
-except Exception as e:
-    report.append(f"Pillow: NOT FOUND ({e})")
+# Python packages: really imported, since an installed package can still fail to load
+# (missing shared libraries, ABI mismatch). A successful import is cached under the
+# distribution version plus the package's location, so only failures and changed installs re-import.
+for label, module, extra, dist in (("Pillow", "PIL", "PIL.Image", "Pillow"), ("PyMuPDF(fitz)", "fitz", None, "PyMuPDF")):
+    try:
+        spec = importlib.util.find_spec(module)
+        cache_key = f"{metadata.version(dist)}|{file_key(spec.origin)}" if spec and spec.origin else None
+    except Exception:
+        cache_key = None
+    version = cached(label, cache_key)
+    if version is None:
+        try:
+            version = importlib.import_module(module).__version__
+            if extra:
+                importlib.import_module(extra)
+            remember(label, cache_key, version)
+        except Exception as e:
+            report.append(f"{label}: NOT FOUND ({e})")
+            continue
+    report.append(f"{label}: FOUND version {version}")
 
-# PyMuPDF
-try:
-    import fitz
-    report.append(f"PyMuPDF(fitz): FOUND version {fitz.__version__}")
-except Exception as e:
-    report.append(f"PyMuPDF(fitz): NOT FOUND ({e})")
+if cache_dirty:
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_FILE.write_text(json.dumps(cache), encoding="utf-8")
+    except OSError:
+        pass
 
 print("\nOCR Environment Check:\n" + "\n".join(report))
 
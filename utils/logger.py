@@ -4,11 +4,14 @@ Logging Utility
 Centralized logging for tracking all operations in the pipeline.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Any
+from typing import Optional, Any, Iterable
 
 
 # Create logs directory
@@ -31,7 +34,13 @@ file_formatter = logging.Formatter(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+
+# File writes happen on a listener thread so logging never blocks UI handlers on disk I/O
+_log_queue = queue.SimpleQueue()
+_file_listener = logging.handlers.QueueListener(_log_queue, file_handler, respect_handler_level=True)
+_file_listener.start()
+atexit.register(_file_listener.stop)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
 
 # Console handler - important logs only
 console_handler = logging.StreamHandler(sys.stdout)
@@ -79,6 +88,21 @@ def log_file_operation(operation: str, file_path: Path, success: bool = True):
     logger.debug(f"FILE OP: {operation} | {status} | Path: {file_path}")
 
 
+def log_file_operations_bulk(records: Iterable[dict]):
+    """
+    Log many file operations as a single log record.
+    
+    Args:
+        records: Dicts with 'op', 'path' and optional 'success' (default True)
+    """
+    lines = []
+    for record in records:
+        status = "SUCCESS" if record.get('success', True) else "FAILED"
+        lines.append(f"FILE OP: {record['op']} | {status} | Path: {record['path']}")
+    if lines:
+        logger.debug(f"FILE OPS ({len(lines)}):\n" + "\n".join(lines))
+
+
 def log_api_call(api: str, model: str, input_length: int, success: bool = True):
     """Log API calls to external services."""
     status = "SUCCESS" if success else "FAILED"
@@ -0,0 +1,483 @@
+"""
+Media Utilities
+===============
+Thin ffmpeg wrappers used by the page video and slideshow stages.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from utils.logger import logger
+
+
+# Number of page videos muxed by a single ffmpeg process in batch renders
+MUX_GROUP_SIZE = 8
+
+# Concurrent ffmpeg processes for batch renders; each re-encode is capped at
+# MUX_FFMPEG_THREADS so parallel jobs don't oversubscribe the CPU
+MUX_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+MUX_FFMPEG_THREADS = 2
+
+# Output frame rate for page videos when the video stream has to be re-encoded
+PAGE_VIDEO_FPS = 24
+
+# Audio format for still-image segments; silent slides use the same format so
+# segments can be joined with the concat demuxer without re-encoding
+SEGMENT_AUDIO_ARGS = ["-c:a", "aac", "-ar", "44100", "-ac", "2"]
+
+# (image_video_path, audio_path, output_path)
+MuxJob = Tuple[Path, Path, Path]
+
+# (image_video_path, [(audio_path, output_path), ...]) sharing one video input
+SharedVideoJob = Tuple[Path, Sequence[Tuple[Path, Path]]]
+
+
+@lru_cache(maxsize=1)
+def get_ffmpeg_exe() -> str:
+    """
+    Resolve the ffmpeg binary once.
+
+    Prefers ffmpeg on PATH (installed in the Docker image) and falls back to
+    the binary bundled with imageio-ffmpeg, which MoviePy already depends on.
+    """
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+@lru_cache(maxsize=1)
+def get_ffprobe_exe() -> Optional[str]:
+    """Resolve ffprobe once; None if only the bundled imageio ffmpeg is available."""
+    exe = shutil.which("ffprobe")
+    if exe:
+        return exe
+    sibling = Path(get_ffmpeg_exe()).with_name("ffprobe")
+    return str(sibling) if sibling.exists() else None
+
+
+@lru_cache(maxsize=1024)
+def _probe_duration_cached(path_str: str, mtime_ns: int) -> Optional[float]:
+    """ffprobe the container duration; mtime_ns only keys the cache."""
+    ffprobe = get_ffprobe_exe()
+    if not ffprobe:
+        return None
+    proc = subprocess.run(
+        [ffprobe, "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=nokey=1:noprint_wrappers=1", path_str],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=False,
+    )
+    try:
+        return float(proc.stdout.strip())
+    except ValueError:
+        return None
+
+
+def probe_duration(path: Path) -> Optional[float]:
+    """
+    Return the duration of a media file in seconds without opening a decoder.
+
+    Results are memoized per (path, mtime), so a re-rendered file is probed
+    again. Returns None if ffprobe is unavailable or the file can't be read.
+    """
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    return _probe_duration_cached(str(path), mtime_ns)
+
+
+def _run_ffmpeg(args: List[str]) -> None:
+    """Run ffmpeg with the given arguments, raising RuntimeError with stderr on failure."""
+    cmd = [get_ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error"] + args
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+    if proc.returncode != 0:
+        err = proc.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"ffmpeg exited with {proc.returncode}: {err[-500:]}")
+
+
+# Extra output parameters per encoder
+_ENCODER_PARAMS = {
+    'h264_nvenc': ["-preset", "p4", "-rc", "vbr", "-cq", "23"],
+    'h264_vaapi': ["-qp", "23"],
+    'h264_videotoolbox': ["-b:v", "4M"],
+    'libx264': ["-preset", "veryfast", "-crf", "23"],
+}
+
+# Hardware encoders in order of preference; libx264 is the fallback
+_HW_ENCODER_PRIORITY = ('h264_nvenc', 'h264_vaapi', 'h264_videotoolbox')
+
+# DRM render node used for VAAPI encodes (Intel/AMD GPUs on Linux)
+VAAPI_DEVICE = '/dev/dri/renderD128'
+
+# libx264 settings used instead when high quality output is requested
+_X264_HIGH_QUALITY_PARAMS = ["-preset", "medium", "-crf", "23"]
+
+
+def _encoder_works(codec: str) -> bool:
+    """Return True if ffmpeg can actually encode a tiny test clip with codec."""
+    try:
+        _run_ffmpeg(
+            encoder_input_args(codec)
+            + ["-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1"]
+            + encoder_video_args(codec) + ["-f", "null", "-"]
+        )
+        return True
+    except Exception:
+        return False
+
+
+@lru_cache(maxsize=1)
+def detect_hw_encoder() -> str:
+    """
+    Pick the H.264 encoder for re-encodes, probed once per process.
+
+    Tries h264_nvenc, then h264_vaapi (only if the render node exists), then
+    h264_videotoolbox; the first one ffmpeg was built with that also accepts a
+    test encode wins. Falls back to libx264.
+    """
+    try:
+        proc = subprocess.run(
+            [get_ffmpeg_exe(), "-hide_banner", "-encoders"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False,
+        )
+        encoders = proc.stdout.decode("utf-8", "replace")
+    except Exception:
+        return 'libx264'
+    for codec in _HW_ENCODER_PRIORITY:
+        if codec not in encoders:
+            continue
+        if codec == 'h264_vaapi' and not os.path.exists(VAAPI_DEVICE):
+            continue
+        if _encoder_works(codec):
+            logger.info(f"Using hardware encoder {codec}")
+            return codec
+    return 'libx264'
+
+
+def encoder_input_args(codec: str) -> List[str]:
+    """Global options that must precede the inputs for codec (e.g. the VAAPI device)."""
+    if codec == 'h264_vaapi':
+        return ["-vaapi_device", VAAPI_DEVICE]
+    return []
+
+
+def encoder_video_args(codec: str, filters: Sequence[str] = (), high_quality: bool = False, still_image: bool = False) -> List[str]:
+    """
+    Video filter and codec output arguments for an H.264 encode with codec.
+
+    The pixel format conversion is appended to filters: yuv420p for software
+    and NVENC/VideoToolbox, nv12 uploaded to the GPU for VAAPI.
+    """
+    chain = list(filters)
+    if codec == 'h264_vaapi':
+        chain += ["format=nv12", "hwupload"]
+    else:
+        chain.append("format=yuv420p")
+    return (["-vf", ",".join(chain), "-c:v", codec]
+            + encoder_ffmpeg_params(codec, high_quality=high_quality, still_image=still_image))
+
+
+def encoder_ffmpeg_params(codec: str, high_quality: bool = False, still_image: bool = False) -> List[str]:
+    """
+    Output parameters to pass alongside codec (e.g. MoviePy ffmpeg_params).
+
+    Args:
+        codec: Encoder returned by detect_hw_encoder
+        high_quality: Use the slower x264 "medium" preset instead of "veryfast"
+        still_image: Source is mostly static images (adds x264 -tune stillimage)
+    """
+    if codec != 'libx264':
+        return list(_ENCODER_PARAMS.get(codec, []))
+    params = list(_X264_HIGH_QUALITY_PARAMS if high_quality else _ENCODER_PARAMS['libx264'])
+    if still_image:
+        params += ["-tune", "stillimage"]
+    return params
+
+
+def _video_codec_args(copy_video: bool) -> List[str]:
+    """Video codec arguments: stream copy, or an H.264 re-encode as the fallback."""
+    if copy_video:
+        return ["-c:v", "copy"]
+    codec = detect_hw_encoder()
+    args = encoder_video_args(codec) + ["-r", str(PAGE_VIDEO_FPS)]
+    if codec == 'libx264':
+        args += ["-threads", str(MUX_FFMPEG_THREADS)]
+    return args
+
+
+def mux_video_with_audio_batch(jobs: Sequence[MuxJob], copy_video: bool = True) -> None:
+    """
+    Loop each image video to the length of its audio and mux them together.
+
+    All outputs are produced by one ffmpeg process so codec/process start-up
+    is paid once per group rather than once per page. With copy_video the
+    already H.264-encoded image video is stream-copied, so only the audio is
+    encoded and no video frame is decoded.
+
+    Args:
+        jobs: Sequence of (image_video_path, audio_path, output_path) tuples
+        copy_video: Stream-copy the video track instead of re-encoding it
+    """
+    if not jobs:
+        return
+    # Fast-forwarded versions may be hardlinks of each other; replace rather
+    # than truncate an existing output so the other versions keep their content
+    for _, _, output_path in jobs:
+        Path(output_path).unlink(missing_ok=True)
+    args: List[str] = [] if copy_video else encoder_input_args(detect_hw_encoder())
+    for video_path, audio_path, _ in jobs:
+        args += ["-stream_loop", "-1", "-i", str(video_path), "-i", str(audio_path)]
+    for k, (_, audio_path, output_path) in enumerate(jobs):
+        args += ["-map", f"{2 * k}:v:0", "-map", f"{2 * k + 1}:a:0"]
+        args += _video_codec_args(copy_video)
+        # An explicit length stops the looped video exactly at the end of the
+        # audio; -shortest alone can overshoot by up to a GOP
+        audio_duration = probe_duration(audio_path)
+        if audio_duration:
+            args += ["-t", f"{audio_duration:.3f}"]
+        args += ["-c:a", "aac", "-shortest", "-movflags", "+faststart", str(output_path)]
+    _run_ffmpeg(args)
+
+
+def mux_page_video(image_video_path: Path, audio_path: Path, output_path: Path) -> None:
+    """
+    Loop/trim an image video to its audio and mux them in a single ffmpeg pass.
+
+    The video stream is copied when possible; if ffmpeg rejects the copy the
+    video is re-encoded once with the detected H.264 encoder.
+    """
+    job = (image_video_path, audio_path, output_path)
+    try:
+        mux_video_with_audio_batch([job], copy_video=True)
+    except Exception as e:
+        logger.warning(f"Stream copy failed for {image_video_path.name}, re-encoding: {e}")
+        mux_video_with_audio_batch([job], copy_video=False)
+
+
+def _mux_group(group: List[MuxJob]) -> List[Tuple[MuxJob, Optional[Exception]]]:
+    """Mux a group with one ffmpeg process, retrying page by page if that fails."""
+    if len(group) > 1:
+        try:
+            mux_video_with_audio_batch(group)
+            return [(job, None) for job in group]
+        except Exception as e:
+            logger.warning(f"Grouped mux failed, retrying {len(group)} page(s) individually: {e}")
+    results: List[Tuple[MuxJob, Optional[Exception]]] = []
+    for job in group:
+        try:
+            mux_page_video(*job)
+            results.append((job, None))
+        except Exception as e:
+            results.append((job, e))
+    return results
+
+
+def mux_page_videos(jobs: Sequence[MuxJob], group_size: int = MUX_GROUP_SIZE, workers: int = MUX_WORKERS) -> Iterator[Tuple[MuxJob, Optional[Exception]]]:
+    """
+    Mux a batch of page videos, yielding each job as its group completes.
+
+    Jobs are split into groups that run as concurrent ffmpeg processes. If a
+    grouped run fails, the jobs in that group are retried one by one (falling
+    back to a re-encode) so a single bad input only fails its own page.
+
+    Args:
+        jobs: Sequence of (image_video_path, audio_path, output_path) tuples
+        group_size: Maximum number of outputs per ffmpeg invocation
+        workers: Number of ffmpeg processes run in parallel
+
+    Yields:
+        (job, error) where error is None on success
+    """
+    if not jobs:
+        return
+    workers = max(1, workers)
+    # Spread small batches across all workers instead of filling one group
+    per_worker = -(-len(jobs) // workers)
+    group_size = max(1, min(group_size, per_worker))
+    groups = [list(jobs[start:start + group_size]) for start in range(0, len(jobs), group_size)]
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as executor:
+        futures = [executor.submit(_mux_group, group) for group in groups]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def encode_image_segment(
+    image_path: Path,
+    audio_path: Optional[Path],
+    output_path: Path,
+    size: Tuple[int, int],
+    duration: float = 3,
+    fps: int = PAGE_VIDEO_FPS,
+    high_quality: bool = False,
+    threads: Optional[int] = None,
+) -> None:
+    """
+    Encode one still image (plus optional narration) as a video segment.
+
+    ffmpeg loops the image itself, so no frames pass through Python. With
+    audio_path the segment lasts as long as the audio; otherwise it is
+    `duration` seconds with a silent audio track.
+
+    Args:
+        image_path: Slide image
+        audio_path: Narration for the slide, or None for a silent slide
+        output_path: Segment file to write
+        size: Output (width, height)
+        duration: Length of a silent slide in seconds
+        fps: Output frame rate
+        high_quality: Use the slower x264 preset
+        threads: Cap on encoder threads, for running several encodes in parallel
+    """
+    codec = detect_hw_encoder()
+    args = encoder_input_args(codec) + ["-loop", "1", "-framerate", str(fps), "-i", str(image_path)]
+    if audio_path:
+        args += ["-i", str(audio_path)]
+    else:
+        args += ["-f", "lavfi", "-t", f"{duration:.3f}", "-i", "anullsrc=r=44100:cl=stereo"]
+    width, height = size
+    args += ["-map", "0:v:0", "-map", "1:a:0"]
+    args += encoder_video_args(codec, [f"scale={width}:{height}"], high_quality=high_quality, still_image=True)
+    args += ["-r", str(fps)] + SEGMENT_AUDIO_ARGS
+    if threads:
+        args += ["-threads", str(threads)]
+    # Cap the looped image at the exact narration length; -shortest alone lets
+    # the video run on for the encoder's buffered frames
+    slide_duration = probe_duration(audio_path) if audio_path else duration
+    if slide_duration:
+        args += ["-t", f"{slide_duration:.3f}"]
+    args += ["-shortest", str(output_path)]
+    _run_ffmpeg(args)
+
+
+def mux_video_with_audios(video_path: Path, outputs: Sequence[Tuple[Path, Path]], copy_video: bool = True) -> None:
+    """
+    Mux one image video with several audio tracks into one output per track.
+
+    The video is opened once and feeds every output (e.g. the EN and HI page
+    videos), so it is demuxed (or decoded) once instead of once per language.
+
+    Args:
+        video_path: Image video, looped to each audio's length
+        outputs: Sequence of (audio_path, output_path) pairs
+        copy_video: Stream-copy the video track instead of re-encoding it
+    """
+    if not outputs:
+        return
+    for _, output_path in outputs:
+        Path(output_path).unlink(missing_ok=True)
+    args: List[str] = [] if copy_video else encoder_input_args(detect_hw_encoder())
+    args += ["-stream_loop", "-1", "-i", str(video_path)]
+    for audio_path, _ in outputs:
+        args += ["-i", str(audio_path)]
+    for k, (audio_path, output_path) in enumerate(outputs, start=1):
+        args += ["-map", "0:v:0", "-map", f"{k}:a:0"]
+        args += _video_codec_args(copy_video)
+        audio_duration = probe_duration(audio_path)
+        if audio_duration:
+            args += ["-t", f"{audio_duration:.3f}"]
+        args += ["-c:a", "aac", "-shortest", "-movflags", "+faststart", str(output_path)]
+    _run_ffmpeg(args)
+
+
+def _mux_shared_video(job: SharedVideoJob) -> List[Tuple[Path, Optional[Exception]]]:
+    """Mux all outputs of a job in one process, retrying output by output if that fails."""
+    video_path, outputs = job
+    try:
+        mux_video_with_audios(video_path, outputs)
+        return [(output_path, None) for _, output_path in outputs]
+    except Exception as e:
+        logger.warning(f"Shared-video mux failed for {video_path.name}, retrying per output: {e}")
+    results: List[Tuple[Path, Optional[Exception]]] = []
+    for audio_path, output_path in outputs:
+        try:
+            mux_page_video(video_path, audio_path, output_path)
+            results.append((output_path, None))
+        except Exception as e:
+            results.append((output_path, e))
+    return results
+
+
+def mux_shared_video_pages(jobs: Sequence[SharedVideoJob], workers: int = MUX_WORKERS) -> Iterator[Tuple[SharedVideoJob, List[Tuple[Path, Optional[Exception]]]]]:
+    """
+    Run mux_video_with_audios for many pages in parallel, yielding each page as it completes.
+
+    Yields:
+        (job, [(output_path, error), ...]) where error is None on success
+    """
+    if not jobs:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as executor:
+        futures = {executor.submit(_mux_shared_video, job): job for job in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _stream_signature(path: Path) -> Optional[tuple]:
+    """Codec/size/rate parameters that must match for concat stream copy."""
+    ffprobe = get_ffprobe_exe()
+    if not ffprobe:
+        return None
+    proc = subprocess.run(
+        [ffprobe, "-v", "error", "-show_entries",
+         "stream=codec_type,codec_name,width,height,pix_fmt,r_frame_rate,sample_rate,channels",
+         "-of", "json", str(path)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False,
+    )
+    if proc.returncode != 0:
+        return None
+    streams = json.loads(proc.stdout or b"{}").get("streams", [])
+    return tuple(sorted(tuple(sorted(stream.items())) for stream in streams))
+
+
+def can_concat_copy(paths: Sequence[Path]) -> bool:
+    """True if all inputs share stream parameters, so the concat demuxer can copy them."""
+    signatures = set()
+    for path in paths:
+        signature = _stream_signature(path)
+        if signature is None:
+            return False
+        signatures.add(signature)
+        if len(signatures) > 1:
+            return False
+    return bool(signatures)
+
+
+def concat_videos(paths: Sequence[Path], output_path: Path, copy_streams: bool = True, high_quality: bool = False) -> None:
+    """
+    Concatenate videos with the ffmpeg concat demuxer in a single process.
+
+    With copy_streams the packets are joined without re-encoding, which needs
+    inputs that share codec, resolution and frame rate (see can_concat_copy).
+    Otherwise the joined stream is re-encoded once with the detected encoder.
+    """
+    if copy_streams:
+        input_args, codec_args = [], ["-c", "copy"]
+    else:
+        codec = detect_hw_encoder()
+        input_args = encoder_input_args(codec)
+        codec_args = encoder_video_args(codec, high_quality=high_quality) + ["-c:a", "aac"]
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as list_file:
+        for path in paths:
+            escaped = str(Path(path).resolve()).replace("'", "'\\''")
+            list_file.write(f"file '{escaped}'\n")
+        list_path = Path(list_file.name)
+    try:
+        _run_ffmpeg(
+            input_args + ["-f", "concat", "-safe", "0", "-i", str(list_path)]
+            + codec_args + ["-movflags", "+faststart", str(output_path)]
+        )
+    finally:
+        list_path.unlink(missing_ok=True)
@@ -0,0 +1,77 @@
+"""
+Rate Limiting
+=============
+Thread-safe token bucket for keeping API request rates under provider quotas.
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` acquisitions per `period` seconds.
+
+    The bucket starts full, so a short burst of up to `rate` calls goes out
+    immediately; after that callers are spaced to the steady-state rate.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        if rate <= 0 or period <= 0:
+            raise ValueError("rate and period must be positive")
+        self.capacity = float(rate)
+        self.fill_rate = rate / period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.fill_rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD cap on requests in flight, for providers that reject bursts of
+    concurrent calls.
+
+    The window grows by `increase` after each success (up to `max_concurrent`)
+    and is multiplied by `decrease` whenever the provider throttles, so
+    concurrent workers converge on what the account actually allows.
+    """
+
+    def __init__(self, max_concurrent: int, increase: float = 0.5, decrease: float = 0.5):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.increase = increase
+        self.decrease = decrease
+        self.window = float(max_concurrent)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until the number of requests in flight is below the current window."""
+        with self._cond:
+            while self._in_flight >= max(1, int(self.window)):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled: bool = False):
+        """Finish a request, growing the window on success or shrinking it when throttled."""
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.window = max(1.0, self.window * self.decrease)
+            else:
+                self.window = min(float(self.max_concurrent), self.window + self.increase)
+            self._cond.notify_all()
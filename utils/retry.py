@@ -0,0 +1,153 @@
+"""
+Retry Helpers
+=============
+Exponential backoff with jitter for transient API failures (rate limits,
+5xx responses, dropped connections) from Replicate, Gemini and ElevenLabs.
+"""
+
+import asyncio
+import random
+import re
+import time
+from typing import Any, Callable, Optional
+
+from utils.logger import logger
+
+
+# HTTP statuses worth retrying
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Exception class names that indicate a transient failure. Matched by name so
+# the google.api_core / httpx / requests exception modules needn't be imported.
+TRANSIENT_ERROR_NAMES = {
+    # google.api_core
+    'ResourceExhausted', 'ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded',
+    'TooManyRequests', 'GatewayTimeout', 'BadGateway',
+    # httpx (used by replicate) / requests
+    'ConnectError', 'ConnectTimeout', 'ReadTimeout', 'ReadError', 'WriteError',
+    'RemoteProtocolError', 'PoolTimeout', 'ConnectionError', 'Timeout', 'ChunkedEncodingError',
+    # builtins
+    'TimeoutError', 'ConnectionResetError', 'ConnectionAbortedError',
+}
+
+# "retry in 23.5s" / "retry_delay { seconds: 23 }" hints in quota error messages
+_RETRY_HINT_RE = re.compile(r"retry(?:\s+in|_delay\s*\{\s*seconds:)\s*([\d.]+)", re.IGNORECASE)
+
+# Longest single wait for next_retry_delay
+RETRY_MAX_DELAY = 60.0
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Return True if error looks like a rate limit, server error or network hiccup."""
+    for cls in type(error).__mro__:
+        if cls.__name__ in TRANSIENT_ERROR_NAMES:
+            return True
+
+    # replicate.exceptions.ReplicateError carries .status; requests/httpx errors carry a response
+    status = getattr(error, 'status', None) or getattr(error, 'status_code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    try:
+        return int(status) in TRANSIENT_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+def _retry_after(error: BaseException) -> float:
+    """Seconds requested by a Retry-After header on the error (or its response), or 0."""
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None)
+    try:
+        value = headers.get('Retry-After') or headers.get('retry-after') if headers else None
+        return max(0.0, float(value)) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def retry_after_hint(error: BaseException) -> float:
+    """
+    Seconds the server asked us to wait before retrying, or 0 if it didn't say.
+
+    Checks a Retry-After header first, then hints in the message such as
+    Gemini quota errors' "Please retry in 23.5s" / "retry_delay { seconds: 23 }".
+    """
+    delay = _retry_after(error)
+    if delay:
+        return delay
+    match = _RETRY_HINT_RE.search(str(error))
+    try:
+        return float(match.group(1)) if match else 0.0
+    except ValueError:
+        return 0.0
+
+
+def next_retry_delay(error: BaseException, previous: float, base: float, cap: float = RETRY_MAX_DELAY) -> float:
+    """
+    Delay before the next attempt of a hand-rolled retry loop.
+
+    Uses the server's requested wait when the error carries one; otherwise
+    decorrelated jitter, uniform between base and three times the previous
+    delay. Either way the result is capped at cap seconds.
+    """
+    hint = retry_after_hint(error)
+    if hint:
+        return min(cap, hint)
+    return min(cap, random.uniform(base, max(base, previous * 3)))
+
+
+def _backoff_delay(attempt: int, initial_delay: float, max_delay: float, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential delay for the given (1-based) failed attempt, honouring server retry hints."""
+    delay = random.uniform(0, min(max_delay, initial_delay * (2 ** (attempt - 1))))
+    if error is not None:
+        delay = max(delay, min(max_delay, retry_after_hint(error)))
+    return delay
+
+
+def retry_with_backoff(
+    func: Callable[..., Any],
+    *args,
+    attempts: int = 5,
+    initial_delay: float = 1.0,
+    max_delay: float = 30.0,
+    **kwargs
+) -> Any:
+    """
+    Call func(*args, **kwargs), retrying transient failures with jittered exponential backoff.
+
+    Non-transient errors (bad input, auth) and the last failure are re-raised.
+
+    Args:
+        func: Callable to invoke
+        attempts: Maximum number of calls
+        initial_delay: Upper bound of the first backoff in seconds
+        max_delay: Cap on any single backoff in seconds
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= attempts or not is_transient_error(e):
+                raise
+            delay = _backoff_delay(attempt, initial_delay, max_delay, e)
+            logger.warning(f"Transient error from {getattr(func, '__name__', func)} (attempt {attempt}/{attempts}), retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+
+async def async_retry_with_backoff(
+    func: Callable[..., Any],
+    *args,
+    attempts: int = 5,
+    initial_delay: float = 1.0,
+    max_delay: float = 30.0,
+    **kwargs
+) -> Any:
+    """Async counterpart of retry_with_backoff for coroutine functions."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= attempts or not is_transient_error(e):
+                raise
+            delay = _backoff_delay(attempt, initial_delay, max_delay, e)
+            logger.warning(f"Transient error from {getattr(func, '__name__', func)} (attempt {attempt}/{attempts}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
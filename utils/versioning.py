@@ -120,14 +120,23 @@ def create_new_version(
     else:
         raise ValueError(f"Unknown content_type: {content_type}")
     
-    # Get next version number
+    # Get next version number: one past the highest existing version rather than the count,
+    # since after delete_version the count can name a file that is still in use
     versions = metadata[content_type]['versions']
-    next_version = len(versions) + 1
+    next_version = max(len(versions), max_versions_in_dir(page_dir).get(content_type, 0))
+    for version_info in versions:
+        match = _VERSION_FILE_RE.match(version_info.get('file', ''))
+        if match:
+            next_version = max(next_version, int(match.group('version')))
+    next_version += 1
     
     # Create new version filename
     new_filename = f"{base_name}_v{next_version}{extension}"
     new_filepath = page_dir / new_filename
     
+    # Never write through an existing file: it may share an inode with other versions
+    new_filepath.unlink(missing_ok=True)
+    
     # Save content
     if is_binary:
         # For binary files (audio, image), content is the source path to copy from
@@ -253,6 +262,46 @@ def get_version_count(page_dir: Path, content_type: str) -> int:
     return len(get_all_versions(page_dir, content_type))
 
 
+# Versioned filename -> content type, e.g. final_text_en_v3.mp3 -> en_audio
+_VERSION_FILE_RE = re.compile(
+    r'^(?P<base>final_text_en|final_text_hi|image_to_use|page_image_video|page_video_en|page_video_hi)'
+    r'_v(?P<version>\d+)(?P<ext>\.txt|\.mp3|\.png|\.mp4)$'
+)
+_VERSION_FILE_TYPES = {
+    ('final_text_en', '.txt'): 'en_text',
+    ('final_text_hi', '.txt'): 'hi_text',
+    ('final_text_en', '.mp3'): 'en_audio',
+    ('final_text_hi', '.mp3'): 'hi_audio',
+    ('image_to_use', '.png'): 'image',
+    ('page_image_video', '.mp4'): 'image_video',
+    ('page_video_en', '.mp4'): 'en_video',
+    ('page_video_hi', '.mp4'): 'hi_video',
+}
+
+
+def max_versions_in_dir(page_dir: Path) -> Dict[str, int]:
+    """
+    Get the highest version number on disk for every content type in one directory scan.
+    
+    Content types with no versioned files are absent from the result.
+    """
+    max_versions: Dict[str, int] = {}
+    try:
+        with os.scandir(page_dir) as it:
+            for entry in it:
+                match = _VERSION_FILE_RE.match(entry.name)
+                if not match:
+                    continue
+                content_type = _VERSION_FILE_TYPES.get((match.group('base'), match.group('ext')))
+                if content_type:
+                    version = int(match.group('version'))
+                    if version > max_versions.get(content_type, 0):
+                        max_versions[content_type] = version
+    except FileNotFoundError:
+        pass
+    return max_versions
+
+
 def get_latest_version_number(page_dir: Path, content_type: str) -> int:
     """
     Get the version number of the latest version.
@@ -275,9 +324,29 @@ def get_latest_version_number(page_dir: Path, content_type: str) -> int:
     return get_version_count(page_dir, content_type)
 
 
+def _link_or_copy(src: Path, dst: Path):
+    """
+    Give dst the same content as src, as a hardlink when possible.
+    
+    Version files are never modified in place, so sharing an inode is safe and
+    avoids duplicating audio/video bytes. Falls back to a copy across
+    filesystems or where hardlinks aren't supported.
+    """
+    # Already the same file (e.g. dst is src, or a hardlink of it): nothing to do, and
+    # unlinking dst first would destroy the only copy
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    # Never write through an existing dst: it may itself share an inode with another version
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
 def fast_forward_version(page_dir: Path, content_type: str, target_version: int, model: str = 'fast-forward') -> bool:
     """
-    Fast forward an existing version to target version by copying it.
+    Fast forward an existing version to target version by hardlinking (or copying) it.
     Creates intermediate versions if needed.
     
     Args:
@@ -346,13 +415,8 @@ def fast_forward_version(page_dir: Path, content_type: str, target_version: int,
         new_filename = f"{base_name}_v{version}{extension}"
         new_path = page_dir / new_filename
         
-        # Copy the file content
-        if extension == '.txt':
-            content = latest_path.read_text(encoding='utf-8')
-            new_path.write_text(content, encoding='utf-8')
-        else:  # Binary file (mp3, mp4)
-            content = latest_path.read_bytes()
-            new_path.write_bytes(content)
+        # Same content as the latest version, hardlinked rather than copied
+        _link_or_copy(latest_path, new_path)
         
         # Add to metadata
         version_info = {
@@ -367,6 +431,70 @@ def fast_forward_version(page_dir: Path, content_type: str, target_version: int,
     return True
 
 
+# Content types the "fast forward everything" action brings up to date
+FAST_FORWARD_TYPES = ('en_text', 'hi_text', 'en_audio', 'hi_audio', 'en_video', 'hi_video', 'image_video')
+
+# Content type -> (base_name, extension), the inverse of _VERSION_FILE_TYPES
+_CONTENT_FILE_NAMES = {content_type: key for key, content_type in _VERSION_FILE_TYPES.items()}
+
+
+def bulk_fast_forward(
+    page_dir: Path,
+    target_version: int,
+    content_types=FAST_FORWARD_TYPES,
+    model: str = 'fast-forward'
+) -> int:
+    """
+    Fast forward several content types of one page to target_version in a single pass.
+    
+    Equivalent to calling fast_forward_version for each content type, but the
+    directory is scanned once and versions.json is read and written once.
+    
+    Returns:
+        Number of content types that were fast forwarded
+    """
+    metadata = load_version_metadata(page_dir)
+    on_disk = max_versions_in_dir(page_dir)
+    forwarded = 0
+    
+    for content_type in content_types:
+        base_name, extension = _CONTENT_FILE_NAMES[content_type]
+        
+        # Videos aren't tracked in metadata yet, so their version comes from disk
+        if content_type in ['en_video', 'hi_video']:
+            current_version = on_disk.get(content_type, 0)
+            latest_name = f"{base_name}_v{current_version}{extension}"
+        else:
+            entry = metadata.get(content_type) or {}
+            current_version = len(entry.get('versions') or [])
+            latest_name = entry.get('latest')
+        
+        if current_version == 0 or current_version >= target_version or not latest_name:
+            continue
+        latest_path = page_dir / latest_name
+        if not latest_path.exists():
+            continue
+        
+        if not isinstance(metadata.get(content_type), dict):
+            metadata[content_type] = {'versions': [], 'latest': None}
+        metadata[content_type].setdefault('versions', [])
+        
+        for version in range(current_version + 1, target_version + 1):
+            new_filename = f"{base_name}_v{version}{extension}"
+            _link_or_copy(latest_path, page_dir / new_filename)
+            metadata[content_type]['versions'].append({
+                'file': new_filename,
+                'created': datetime.now().isoformat(),
+                'model': model
+            })
+            metadata[content_type]['latest'] = new_filename
+        forwarded += 1
+    
+    if forwarded:
+        save_version_metadata(page_dir, metadata)
+    return forwarded
+
+
 def delete_version(page_dir: Path, content_type: str, version_number: int) -> bool:
     """
     Delete a specific version (except if it's the only one or the latest).